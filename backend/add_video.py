@@ -1,12 +1,13 @@
 import os
 import hashlib
-import tempfile
 import shutil
 import io
-from moviepy import VideoFileClip
+from contextlib import ExitStack
 from dotenv import load_dotenv
 from typing import Union, Tuple, Dict, Any, BinaryIO
 
+from scratch import scratch_file, input_size
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,44 +20,53 @@ load_dotenv()
 MAX_DURATION = 10          # saniye
 MAX_FILE_SIZE = 50 * 1024 * 1024   # 50 MB
 
+
+def _video_file_clip(path: str):
+    # moviepy (numpy, imageio ve ffmpeg binary araması) import maliyeti yüksek;
+    # API süreci açılırken değil ilk video işlenirken yüklenir.
+    from moviepy import VideoFileClip
+    return VideoFileClip(path)
+
+
 def crop_video(input_path: str, output_buffer: io.BytesIO, max_duration: int = MAX_DURATION) -> Tuple[bool, str]:
     try:
-        with VideoFileClip(input_path) as clip:
+        with _video_file_clip(input_path) as clip:
             duration = clip.duration
 
             if duration <= max_duration:
                 # Kısa videoyu olduğu gibi kopyala
                 with open(input_path, 'rb') as input_file:
-                    output_buffer.write(input_file.read())
+                    shutil.copyfileobj(input_file, output_buffer)
                 return True, f"Video {max_duration} saniyeden kısa, olduğu gibi kullanıldı."
 
-            # Kırpma işlemi - write to buffer instead of file
             cropped_clip = clip.subclipped(0, max_duration)
-            
-            # Create a temporary file for moviepy output, then read to buffer
-            with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_output:
-                temp_output_path = temp_output.name
-            
-            try:
-                cropped_clip.write_videofile(temp_output_path, logger=None)
-                
-                # Read the processed video into memory buffer
-                with open(temp_output_path, 'rb') as temp_file:
-                    output_buffer.write(temp_file.read())
-                    
-                return True, f"Video {max_duration} saniyeye kırpıldı (orijinal: {duration:.2f} saniye)"
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_output_path):
-                    os.remove(temp_output_path)
-                    
+
+            # moviepy çıktısı bellek destekli scratch dosyasına yazılır; boyut tahmini girdi boyutu.
+            # Ses izi ayrı bir ffmpeg ile uzantıya göre biçim seçilerek yazıldığından adlı (named)
+            # dosya gerekir; moviepy'nin çalışma dizinine bıraktığı geçici ses dosyası da böylece
+            # hata durumunda bile silinir.
+            with ExitStack() as stack:
+                output = stack.enter_context(scratch_file(size_hint=os.path.getsize(input_path)))
+                audio = stack.enter_context(scratch_file(suffix=".mp3", named=True)) if clip.audio else None
+
+                cropped_clip.write_videofile(
+                    output.path,
+                    codec="libx264",
+                    # memfd yolu uzantı taşımaz; biçim açıkça verilir
+                    ffmpeg_params=["-f", "mp4"],
+                    temp_audiofile=audio.path if audio else None,
+                    logger=None
+                )
+                output.copy_to(output_buffer)
+
+            return True, f"Video {max_duration} saniyeye kırpıldı (orijinal: {duration:.2f} saniye)"
+
     except Exception as e:
         return False, f"Video kırpılırken hata oluştu: {e}"
 
 
 def validate_video(file: Union[str, BinaryIO]) -> Tuple[bool, Dict[str, Any]]:
-    temp_file_path = None
-    try:
+    with ExitStack() as stack:
         if isinstance(file, str):
             logger.info(f"Dosya yolu kontrol ediliyor: {file}")
             if not os.path.exists(file):
@@ -64,25 +74,22 @@ def validate_video(file: Union[str, BinaryIO]) -> Tuple[bool, Dict[str, Any]]:
                 return False, {"error": "Dosya bulunamadı.", "processed_path": None}
             file_path = file
         else:
-            logger.info("Bellekten video alınıyor, geçici dosya oluşturuluyor")
-            temp_fd, temp_file_path = tempfile.mkstemp(suffix=".mp4")
-            with os.fdopen(temp_fd, "wb") as f:
-                shutil.copyfileobj(file, f)
-            file_path = temp_file_path
-            logger.info(f"Geçici dosya oluşturuldu: {file_path}")
+            # Bellekteki yükleme ffmpeg'e yol olarak verilebilen scratch dosyasına (memfd/tmpfs/disk) yazılır;
+            # blok nasıl biterse bitsin ExitStack dosyayı kapatıp siler
+            scratch = stack.enter_context(scratch_file(size_hint=input_size(file)))
+            scratch.write(file)
+            file_path = scratch.path
+            logger.info(f"Geçici dosya oluşturuldu ({scratch.kind}): {file_path}")
 
         file_size = os.path.getsize(file_path)
         logger.info(f"Dosya boyutu: {file_size} byte")
         if file_size > MAX_FILE_SIZE:
             logger.error("Dosya çok büyük")
-            if temp_file_path:
-                os.remove(temp_file_path)
             return False, {"error": "Dosya çok büyük", "processed_path": None}
 
         logger.info("Video açılıyor ve süresi alınıyor")
-        clip = VideoFileClip(file_path)
-        duration = clip.duration
-        clip.close()
+        with _video_file_clip(file_path) as clip:
+            duration = clip.duration
         logger.info(f"Video süresi: {duration:.2f} saniye")
 
         # Process video in memory buffer instead of file
@@ -94,14 +101,12 @@ def validate_video(file: Union[str, BinaryIO]) -> Tuple[bool, Dict[str, Any]]:
             success, message = crop_video(file_path, video_buffer)
             logger.info(message)
             if not success:
-                if temp_file_path:
-                    os.remove(temp_file_path)
                 return False, {"error": message, "processed_path": None}
             processed_duration = min(duration, MAX_DURATION)
         else:
             # Copy original video to buffer
             with open(file_path, 'rb') as original_file:
-                video_buffer.write(original_file.read())
+                shutil.copyfileobj(original_file, video_buffer)
         
         # Reset buffer position for reading
         video_buffer.seek(0)
@@ -115,11 +120,6 @@ def validate_video(file: Union[str, BinaryIO]) -> Tuple[bool, Dict[str, Any]]:
         hash_hex = sha256_hash.hexdigest()
         logger.info(f"Hash oluşturuldu: {hash_hex}")
 
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            logger.info(f"Geçici dosya siliniyor: {temp_file_path}")
-            os.remove(temp_file_path)
-
     return True, {
         "hash": hash_hex,
         "processed_path": None,  # No persistent path needed
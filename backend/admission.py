@@ -0,0 +1,139 @@
+import os
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# Aynı anda çalışabilecek moviepy/ffmpeg işi sayısı
+VIDEO_MAX_CONCURRENT_JOBS = int(os.getenv("VIDEO_MAX_CONCURRENT_JOBS", "2"))
+# Slot bekleyebilecek en fazla istek sayısı; dolunca 503 döner
+VIDEO_MAX_QUEUED_JOBS = int(os.getenv("VIDEO_MAX_QUEUED_JOBS", "16"))
+# 503 yanıtındaki Retry-After başlığı (saniye)
+VIDEO_QUEUE_RETRY_AFTER = int(os.getenv("VIDEO_QUEUE_RETRY_AFTER", "5"))
+
+
+class AdmissionRejected(Exception):
+    """
+    Bekleme kuyruğu dolu olduğunda fırlatılır. Endpoint'ler bunu 503 + Retry-After'a çevirir.
+    """
+    def __init__(self, retry_after: int):
+        super().__init__("Video işleme kuyruğu dolu")
+        self.retry_after = retry_after
+
+
+class VideoJobLimiter:
+    """
+    Video işleme işleri için kabul kontrolü (admission control).
+
+    - En fazla `max_concurrent` iş aynı anda çalışır.
+    - Slot bekleyenler anahtar (muhabir cüzdanı) bazında ayrı kuyruklarda tutulur ve
+      slotlar kuyruklar arasında round-robin dağıtılır; böylece bir muhabirin toplu
+      yüklemesi diğerlerini aç bırakmaz.
+    - Toplam bekleyen sayısı `max_queued`'a ulaşınca yeni istekler AdmissionRejected alır.
+
+    Sadece event loop thread'inden kullanılmalıdır.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, retry_after: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self._active = 0
+        self._queued = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self._active,
+            "queued": self._queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+
+    @asynccontextmanager
+    async def slot(self, key: str):
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, key: str) -> None:
+        if self._active < self.max_concurrent and self._queued == 0:
+            self._active += 1
+            return
+
+        if self._queued >= self.max_queued:
+            logger.warning(f"Video kuyruğu dolu, istek reddedildi: key={key}")
+            raise AdmissionRejected(self.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        self._queued += 1
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot verildi ama istek iptal edildi → slotu bir sonrakine devret
+                self._release()
+            else:
+                self._remove_waiter(key, waiter)
+            raise
+
+    def _remove_waiter(self, key: str, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(key)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+            self._queued -= 1
+        except ValueError:
+            return
+        if not queue:
+            del self._queues[key]
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._wake_next()
+
+    def _wake_next(self) -> None:
+        while self._active < self.max_concurrent and self._queues:
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self._queued -= 1
+            if queue:
+                # Round-robin: bu anahtar sıranın sonuna geçer
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+
+            if waiter.done():
+                continue
+            self._active += 1
+            waiter.set_result(None)
+
+
+video_jobs = VideoJobLimiter(
+    max_concurrent=VIDEO_MAX_CONCURRENT_JOBS,
+    max_queued=VIDEO_MAX_QUEUED_JOBS,
+    retry_after=VIDEO_QUEUE_RETRY_AFTER,
+)
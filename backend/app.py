@@ -1,9 +1,21 @@
-from fastapi import FastAPI, Depends, HTTPException, Body, UploadFile, File
+import startup_profile
+startup_profile.install_if_enabled()
+
+from fastapi import FastAPI, Depends, HTTPException, Body, UploadFile, File, Request, Response, Query, Header
+from typing import List
+from uuid import UUID
+import os
+import orjson
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlmodel import Session
+from sqlalchemy.exc import StatementError
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 import io
+import hmac
 import base64
+import asyncio
 
 from stellar_utils import (
     submit_stellar_transaction,
@@ -11,42 +23,133 @@ from stellar_utils import (
 )
 from hashing import (
     generate_hash_from_video_file,
+    hash_raw_video,
+    find_video_by_raw_hash,
+    as_existing_response,
     process_video_preparation,
-    generate_hash_from_video_url
+    generate_hash_from_video_url,
+    generate_hashes_from_video_urls,
+    find_videos_by_raw_hashes,
+    validate_video_hash,
+    resolve_batch_hashes,
+    process_video_batch_preparation,
+    BATCH_HASH_WORKERS
 )
 
 from models import (
     Reporter,
+    Video,
     ReporterCreateRequest,
     VideoPrepareRequest, 
+    VideoBatchPrepareRequest,
     SubmitTransactionRequest,
     VerificationRequest,
+    ReporterInfo,
+    ReporterResponse,
+    VideoInfo,
+    VideoListItem,
+    VideoPageResponse,
+    PrepareResponse,
+    BatchPrepareResponse,
+    SubmitResponse,
+    VerifyResponse,
+    OnChainInfo,
+    DataHashCheckResponse,
+    ExcerptResponse,
+    HealthResponse,
+    ReadinessResponse,
+    ReceiptResponse,
+    ReceiptKeyResponse,
+    InvalidHexHash,
 )
 from db import (
+    engine,
     create_db_and_tables,
     get_session,
     get_reporter_by_wallet,
     create_reporter_record,
     update_video_status,
     get_video_by_url,
-    get_video_by_data_hash
+    get_video_by_data_hash,
+    get_status_events_after,
+    get_onchain_memo,
+    list_videos,
+    encode_video_cursor,
+    decode_video_cursor
+)
+from admission import video_jobs, AdmissionRejected
+from horizon_budget import HorizonBudgetExceeded
+from horizon_pool import SubmitOutcomeUnknown
+from singleflight import registration_flights, verification_flights
+from cancellation import (
+    OperationCancelled,
+    DeadlineExceeded,
+    install_process_tracking,
+    request_scope,
+    cancel_scope,
+    run_stage,
+)
+from group_commit import stop_group_writer
+from memo_indexer import MEMO_INDEX_ENABLED, memo_indexer_loop
+from retention import RETENTION_ENABLED, retention_loop
+from warmup import warm_up, warmup_state
+from receipts import RECEIPT_VERSION, receipt_from_transaction, transaction_anchors
+from events import (
+    video_events,
+    EVENTS_POLL_SECONDS,
+    EVENTS_KEEPALIVE_SECONDS,
+    EVENTS_RETRY_MS,
+    TERMINAL_STATUSES
+)
+from records_io import iter_export_lines
+from media_fetcher import URL_HASH_MODE
+from segment_index import (
+    SEGMENT_INDEX_ENABLED,
+    compute_segment_hashes,
+    index_video_segments,
+    find_excerpt_source
 )
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Tek toplu prepare isteğinde kabul edilen en fazla video sayısı
+BATCH_PREPARE_MAX_ITEMS = int(os.getenv("BATCH_PREPARE_MAX_ITEMS", "100"))
+# /export yalnızca X-Admin-Token başlığı bu değerle eşleşirse açılır; boşsa endpoint kapalıdır
+# (döküm için records_io.py CLI'ı kullanılır)
+EXPORT_ADMIN_TOKEN = os.getenv("EXPORT_ADMIN_TOKEN", "")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    # İptal edilen isteklerin ffmpeg alt süreçleri öldürülebilsin diye takip edilir
+    install_process_tracking()
+    startup_profile.log_import_report()
+    # Servis hesabının HashMemo geçmişi arka planda yerel index'e aktarılır
+    indexer_task = asyncio.create_task(memo_indexer_loop()) if MEMO_INDEX_ENABLED else None
+    # İmzalanmayan (prepared) ve başarısız kayıtlar TTL sonunda video_archive'a taşınır
+    retention_task = asyncio.create_task(retention_loop()) if RETENTION_ENABLED else None
+    # ffmpeg/moviepy, Horizon bağlantıları ve önbellekler ilk istekten önce ısıtılır;
+    # /readyz warm-up bitene kadar 503 döner
+    warmup_task = asyncio.create_task(warm_up())
     print("Uygulama başlatıldı")
     yield
+    warmup_task.cancel()
+    if indexer_task:
+        indexer_task.cancel()
+    if retention_task:
+        retention_task.cancel()
+    # Group commit kuyruğunda bekleyen yazımlar kapanmadan önce commit edilir
+    stop_group_writer()
     print("Uygulama kapanıyor")
 
 
+# Yanıtlar response_model'lerle pydantic-core'da serileştirilir, gövde orjson ile yazılır
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     title="RedValid Stellar Doğrulama Servisi",
     version="1.0.0",
     description="Video içeriği hash'lerini Stellar Testnet'e kaydetmek için çekirdek servis."
@@ -61,10 +164,69 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return ORJSONResponse(
+        status_code=503,
+        content={"detail": "Sunucu yoğun, video işleme kuyruğu dolu. Lütfen daha sonra tekrar deneyin."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(HorizonBudgetExceeded)
+async def horizon_budget_exceeded_handler(request: Request, exc: HorizonBudgetExceeded):
+    # Horizon istek sınırını korumak için düşük öncelikli sorgular gönderilmeden reddedildi
+    return ORJSONResponse(
+        status_code=503,
+        content={"detail": "Stellar ağı sorgu sınırına yaklaşıldı. Lütfen daha sonra tekrar deneyin."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(StatementError)
+async def statement_error_handler(request: Request, exc: StatementError):
+    # Hash kolonuna 64 karakterlik hex olmayan değer bağlandı: sunucu hatası değil, geçersiz girdi
+    if isinstance(exc.orig, InvalidHexHash):
+        return ORJSONResponse(status_code=400, content={"detail": f"Geçersiz hash: {exc.orig}"})
+    raise exc
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return ORJSONResponse(status_code=504, content={"detail": f"İşlem süre sınırını aştı: {exc}"})
+
+
+@app.exception_handler(OperationCancelled)
+async def operation_cancelled_handler(request: Request, exc: OperationCancelled):
+    # İstemci bağlantıyı kapattı; yanıtı okuyan yok, 499 sadece loglarda görünür
+    return ORJSONResponse(status_code=499, content={"detail": f"İstek iptal edildi: {exc}"})
+
+
+# -------------------------------------------
+# Sağlık ve Hazırlık Kontrolleri
+# -------------------------------------------
+@app.get("/healthz", response_model=HealthResponse)
+async def healthz():
+    """
+    Liveness: süreç ayakta ve event loop yanıt veriyor.
+    """
+    return HealthResponse(status="ok")
+
+
+@app.get("/readyz", response_model=ReadinessResponse)
+async def readyz(response: Response):
+    """
+    Readiness: warm-up bitene kadar 503; load balancer trafiği ancak sonra yönlendirir.
+    """
+    if not warmup_state.ready:
+        response.status_code = 503
+    return ReadinessResponse(status="ready" if warmup_state.ready else "warming_up", **warmup_state.stats())
+
+
 # -------------------------------------------
 # Muhabir Kaydı
 # -------------------------------------------
-@app.post("/reporters/")
+@app.post("/reporters/", response_model=ReporterResponse)
 def create_reporter_endpoint(req: ReporterCreateRequest, session=Depends(get_session)):
     existing = get_reporter_by_wallet(session, req.wallet_address)
     if existing:
@@ -76,9 +238,9 @@ def create_reporter_endpoint(req: ReporterCreateRequest, session=Depends(get_ses
         institution=req.institution,
         kyc_verified=True  # MVP bypass
     )
-    return create_reporter_record(session, reporter)
+    return ReporterResponse.from_reporter(create_reporter_record(session, reporter))
 
-@app.get("/reporters/{wallet_address}")
+@app.get("/reporters/{wallet_address}", response_model=ReporterResponse)
 def get_reporter_endpoint(wallet_address: str, session=Depends(get_session)):
     """
     Muhabir bilgilerini cüzdan adresi ile getir
@@ -86,21 +248,68 @@ def get_reporter_endpoint(wallet_address: str, session=Depends(get_session)):
     reporter = get_reporter_by_wallet(session, wallet_address)
     if not reporter:
         raise HTTPException(404, "Muhabir bulunamadı.")
-    
-    return {
-        "id": reporter.id,
-        "full_name": reporter.full_name,
-        "wallet_address": reporter.wallet_address,
-        "institution": reporter.institution,
-        "kyc_verified": reporter.kyc_verified,
-        "created_at": reporter.created_at.isoformat()
-    }
+
+    return ReporterResponse.from_reporter(reporter)
 
 
 
-@app.post("/videos/prepare-transaction")
+@app.get("/reporters/{wallet_address}/videos", response_model=VideoPageResponse)
+def list_reporter_videos_endpoint(
+    wallet_address: str,
+    status: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    session=Depends(get_session)
+):
+    """
+    Muhabirin videolarını yeniden eskiye listeler (cursor tabanlı sayfalama).
+    """
+    reporter = get_reporter_by_wallet(session, wallet_address)
+    if not reporter:
+        raise HTTPException(404, "Muhabir bulunamadı.")
+
+    return _video_page(session, reporter_wallet=wallet_address, status=status, cursor=cursor, limit=limit)
+
+
+# -------------------------------------------
+# Video Listeleme
+# -------------------------------------------
+@app.get("/videos", response_model=VideoPageResponse)
+def list_videos_endpoint(
+    status: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    session=Depends(get_session)
+):
+    """
+    Tüm videoları yeniden eskiye listeler; örn. son doğrulamalar için status=verified.
+    """
+    return _video_page(session, reporter_wallet=None, status=status, cursor=cursor, limit=limit)
+
+
+def _video_page(session, reporter_wallet: str | None, status: str | None, cursor: str | None, limit: int) -> VideoPageResponse:
+    after = None
+    if cursor:
+        try:
+            after = decode_video_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+    # Bir fazla satır çekilir; varsa sonraki sayfa mevcuttur
+    videos = list_videos(session, reporter_wallet=reporter_wallet, status=status, after=after, limit=limit + 1)
+    has_more = len(videos) > limit
+    videos = videos[:limit]
+
+    return VideoPageResponse(
+        items=[VideoListItem.from_video(video) for video in videos],
+        next_cursor=encode_video_cursor(videos[-1]) if has_more else None
+    )
+
+
+@app.post("/videos/prepare-transaction", response_model=PrepareResponse, response_model_exclude_unset=True)
 async def prepare_video_verification(
     req: VideoPrepareRequest,
+    request: Request,
     session=Depends(get_session)
     ):
     logger.info(f"Video prepare request geldi: URL={req.video_url} - {req.reporter_wallet}")
@@ -112,18 +321,38 @@ async def prepare_video_verification(
     if not req.video_url:
         raise HTTPException(400, "Video URL sağlanmalıdır.")
 
-    # URL'den hash üret
-    data_hash = generate_hash_from_video_url(req.video_url, session)
-    return process_video_preparation(
-        session=session,
-        data_hash=data_hash,
-        video_identifier=req.video_url,
-        reporter=reporter        
-    )
+    hash_content = req.hash_content if req.hash_content is not None else URL_HASH_MODE == "content"
 
+    async def register() -> PrepareResponse:
+        # Single-flight işi bekleyen isteklerden bağımsız olarak kendi session'ını ve
+        # iptal scope'unu kullanır; bekleyenlerin hepsi ayrılınca iptal edilir
+        with Session(engine) as flight_session, cancel_scope(f"registration url:{req.video_url}"):
+            if hash_content:
+                # İçerik modu indirme + moviepy içerir; yükleme endpoint'leriyle aynı kabul kontrolüne tabi
+                async with video_jobs.slot(f"reporter:{req.reporter_wallet}"):
+                    data_hash = await run_stage("validate", generate_hash_from_video_url, req.video_url, flight_session, True)
+            else:
+                # URL'den hash üret
+                data_hash = generate_hash_from_video_url(req.video_url, flight_session)
+            return await run_stage(
+                "prepare",
+                process_video_preparation,
+                session=flight_session,
+                data_hash=data_hash,
+                video_identifier=req.video_url,
+                reporter=reporter
+            )
 
-@app.post("/videos/prepare-transaction/upload")
+    # Aynı URL'nin eşzamanlı kayıtları tek işte birleşir; işi başlatmayan istekler
+    # (ör. çift gönderim) envelope yerine mevcut kayıt yanıtını alır
+    async with request_scope(request) as scope:
+        result, shared = await scope.wait(registration_flights.do(f"url:{req.video_url}", register), "registration")
+    return as_existing_response(result) if shared else result
+
+
+@app.post("/videos/prepare-transaction/upload", response_model=PrepareResponse, response_model_exclude_unset=True)
 async def prepare_video_verification_with_upload(
+    request: Request,
     video_file: UploadFile = File(...),
     reporter_wallet: str = None,
     session=Depends(get_session)
@@ -141,75 +370,412 @@ async def prepare_video_verification_with_upload(
         raise HTTPException(400, "Video dosyası boş.")
 
     try:
-        # UploadFile'ı BytesIO'ya dönüştür
-        video_content = await video_file.read()
-        video_file_like = io.BytesIO(video_content)
-        
-        data_hash = generate_hash_from_video_file(video_file_like, session)
-        
-        # Handle the case where data_hash is a dict (video already exists)
-        if isinstance(data_hash, dict):
-            # Video already exists, return the existing record
-            return data_hash
-        
-        # data_hash is a string, proceed with normal processing
-        video_identifier = f"uploaded_video_{data_hash[:16]}"
-        return process_video_preparation(
-            session=session,
-            data_hash=data_hash,
-            video_identifier=video_identifier,
-            reporter=reporter
-        )
+        # İstemci koparsa ya da süre dolarsa moviepy/ffmpeg işi öldürülür, scratch dosyaları
+        # silinir ve Video kaydı oluşturulmaz
+        async with request_scope(request) as scope:
+            video_content = await video_file.read()
+            raw_hash = await run_stage("raw_hash", hash_raw_video, video_content)
+
+            async def register() -> PrepareResponse:
+                # Single-flight işi bekleyen isteklerden bağımsız olarak kendi session'ını ve
+                # iptal scope'unu kullanır; bekleyenlerin hepsi ayrılınca iptal edilir
+                with Session(engine) as flight_session, cancel_scope(f"registration raw:{raw_hash[:16]}"):
+                    # Ham dosya daha önce kaydedildiyse moviepy'ye hiç girmeden mevcut kaydı döndür
+                    existing = await run_stage("lookup", find_video_by_raw_hash, flight_session, raw_hash)
+                    if existing:
+                        return existing
+
+                    # Aynı anda çalışan moviepy/ffmpeg işi sayısı sınırlı; muhabir bazında adil sıra
+                    async with video_jobs.slot(f"reporter:{reporter_wallet}"):
+                        data_hash = await run_stage(
+                            "validate", generate_hash_from_video_file, io.BytesIO(video_content), flight_session, raw_hash
+                        )
+
+                    # Handle the case where data_hash is a PrepareResponse (video already exists)
+                    if isinstance(data_hash, PrepareResponse):
+                        # Video already exists, return the existing record
+                        return data_hash
+
+                    # data_hash is a string, proceed with normal processing
+                    video_identifier = f"uploaded_video_{data_hash[:16]}"
+                    result = await run_stage(
+                        "prepare",
+                        process_video_preparation,
+                        session=flight_session,
+                        data_hash=data_hash,
+                        video_identifier=video_identifier,
+                        reporter=reporter,
+                        raw_hash=raw_hash
+                    )
+                    if not result.already_registered:
+                        # Kayıt oluştu; iş bu noktada bırakılsa da segment index'i tamamlanır
+                        await asyncio.shield(_index_segments_detached(result.video_id, video_content))
+                    return result
+
+            # Aynı dosyanın eşzamanlı yüklemeleri tek validate_video + kayıt işinde birleşir;
+            # işi başlatmayan istekler mevcut kayıt yanıtını alır
+            result, shared = await scope.wait(registration_flights.do(f"raw:{raw_hash}", register), "registration")
+        return as_existing_response(result) if shared else result
         
+    except (AdmissionRejected, OperationCancelled, HorizonBudgetExceeded):
+        raise
     except Exception as e:
         logger.error(f"Video işleme hatası: {e}")
         raise HTTPException(400, f"Video işleme hatası: {e}")
 
 
+# -------------------------------------------
+# Toplu Prepare (çoklu video kaydı)
+# -------------------------------------------
+@app.post("/videos/prepare-transaction/batch", response_model=BatchPrepareResponse, response_model_exclude_unset=True)
+async def prepare_video_verification_batch(
+    req: VideoBatchPrepareRequest,
+    session=Depends(get_session)
+    ):
+    """
+    Aynı muhabirin birden fazla video URL'si için envelope'ları tek seferde hazırlar.
+    Envelope'lar ardışık sequence numarası taşır; imzalandıktan sonra verilen sırayla gönderilmelidir.
+    """
+    logger.info(f"Toplu video prepare request geldi: {len(req.video_urls)} URL - {req.reporter_wallet}")
+
+    reporter = get_reporter_by_wallet(session, req.reporter_wallet)
+    if not reporter:
+        raise HTTPException(404, "Muhabir cüzdanı bulunamadı.")
+
+    if not req.video_urls:
+        raise HTTPException(400, "En az bir video URL sağlanmalıdır.")
+    if len(req.video_urls) > BATCH_PREPARE_MAX_ITEMS:
+        raise HTTPException(400, f"Tek istekte en fazla {BATCH_PREPARE_MAX_ITEMS} video gönderilebilir.")
+
+    data_hashes = await run_stage("lookup", generate_hashes_from_video_urls, req.video_urls, session)
+    results = await run_stage(
+        "prepare",
+        process_video_batch_preparation,
+        session=session,
+        items=[(data_hash, video_url, None) for data_hash, video_url in zip(data_hashes, req.video_urls)],
+        reporter=reporter
+    )
+    return BatchPrepareResponse(reporter_wallet=reporter.wallet_address, count=len(results), results=results)
+
+
+@app.post("/videos/prepare-transaction/batch/upload", response_model=BatchPrepareResponse, response_model_exclude_unset=True)
+async def prepare_video_verification_batch_with_upload(
+    request: Request,
+    video_files: List[UploadFile] = File(...),
+    reporter_wallet: str = None,
+    session=Depends(get_session)
+    ):
+    """
+    Birden fazla dosyayı tek istekte hash'ler (paralel) ve envelope'ları tek seferde hazırlar.
+    """
+    logger.info(f"Toplu video upload request geldi: {len(video_files)} dosya - {reporter_wallet}")
+
+    reporter = get_reporter_by_wallet(session, reporter_wallet)
+    if not reporter:
+        raise HTTPException(404, "Muhabir cüzdanı bulunamadı.")
+
+    if not video_files:
+        raise HTTPException(400, "En az bir video dosyası gönderilmelidir.")
+    if len(video_files) > BATCH_PREPARE_MAX_ITEMS:
+        raise HTTPException(400, f"Tek istekte en fazla {BATCH_PREPARE_MAX_ITEMS} video gönderilebilir.")
+
+    try:
+        # İstemci koparsa ya da süre dolarsa çalışan ffmpeg işleri öldürülür, sıradaki
+        # dosyalar başlatılmaz ve hiçbir Video kaydı oluşturulmaz
+        async with request_scope(request):
+            hashed = await _hash_uploaded_files(video_files, reporter_wallet, session)
+
+            results = await run_stage(
+                "prepare",
+                process_video_batch_preparation,
+                session=session,
+                items=[
+                    (data_hash, f"uploaded_video_{data_hash[:16]}" if isinstance(data_hash, str) else None, raw_hash)
+                    for data_hash, raw_hash in hashed
+                ],
+                reporter=reporter
+            )
+
+        # Kayıtlar oluştu; segment index'i istemci bağlantısından bağımsız tamamlanır
+        for result, video_file in zip(results, video_files):
+            if not result.already_registered:
+                # Dosyalar belleğe topluca alınmaz; index için her biri sırayla okunur
+                await video_file.seek(0)
+                await _index_segments(session, result.video_id, await video_file.read())
+        return BatchPrepareResponse(reporter_wallet=reporter.wallet_address, count=len(results), results=results)
+
+    except (AdmissionRejected, OperationCancelled, HorizonBudgetExceeded, HTTPException):
+        raise
+    except Exception as e:
+        logger.error(f"Toplu video işleme hatası: {e}")
+        raise HTTPException(400, f"Video işleme hatası: {e}")
+
+
+async def _hash_uploaded_files(video_files: List[UploadFile], reporter_wallet: str, session):
+    """
+    Toplu yüklemenin hash aşaması. Dosyalar UploadFile'ın kendi (diske taşan) tamponundan
+    akış olarak okunur; ham hash'i kayıtlı olmayan her dosya validate_video'dan önce ayrı
+    bir kabul slotu alır, yani toplu istek de tekil yüklemelerle aynı limite sayılır.
+    İstek içinde aynı anda en fazla BATCH_HASH_WORKERS dosya işlenir.
+    Döner: girdi sırasıyla (data_hash ya da mevcut kayıt yanıtı, raw_hash)
+    """
+    raw_hashes = [await run_stage("raw_hash", hash_raw_video, video_file.file) for video_file in video_files]
+    existing_by_raw = await run_stage("lookup", find_videos_by_raw_hashes, session, raw_hashes)
+
+    workers = asyncio.Semaphore(BATCH_HASH_WORKERS)
+
+    async def validate(video_file: UploadFile) -> str:
+        async with workers, video_jobs.slot(f"reporter:{reporter_wallet}"):
+            return await run_stage("validate", validate_video_hash, video_file.file)
+
+    pending = [i for i, raw_hash in enumerate(raw_hashes) if raw_hash not in existing_by_raw]
+    tasks = [asyncio.ensure_future(validate(video_files[i])) for i in pending]
+    try:
+        data_hashes = dict(zip(pending, await asyncio.gather(*tasks)))
+    except BaseException:
+        # Bir dosya reddedildiyse ya da istek iptal edildiyse sıradaki işler başlatılmaz
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    return await run_stage("lookup", resolve_batch_hashes, session, raw_hashes, existing_by_raw, data_hashes)
+
+
+async def _index_segments_detached(video_id, video_content: bytes) -> None:
+    # Çağıranın session'ı kapansa da (iş iptal edildi) index kendi session'ıyla yazılır
+    with Session(engine) as session:
+        await _index_segments(session, video_id, video_content)
+
+
+async def _index_segments(session, video_id, video_content: bytes) -> None:
+    """
+    Alıntı doğrulaması için segment index'i oluşturur. Kayıt zaten tamamlandığından
+    hata durumunda sadece loglanır.
+    """
+    if not SEGMENT_INDEX_ENABLED:
+        return
+    try:
+        await asyncio.to_thread(index_video_segments, session, video_id, video_content)
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"Segment index oluşturulamadı ({video_id}): {e}")
+
+
 # -------------------------------------------
 # 2. Submit Transaction (Pong)
 # -------------------------------------------
-@app.post("/videos/submit-transaction")
+@app.post("/videos/submit-transaction", response_model=SubmitResponse)
 async def submit_verification(
     req: SubmitTransactionRequest = Body(...),
     session=Depends(get_session)
 ):
-    video = update_video_status(session, req.video_id, status="sending")
+    # Durum yazımları thread'de yapılır: group commit açıkken yazım commit'i beklerken
+    # event loop'u tutmaz ve eşzamanlı isteklerin yazımları aynı commit'e katılabilir
+    video = await asyncio.to_thread(update_video_status, session, req.video_id, status="sending")
     if not video:
         raise HTTPException(404, "Video bulunamadı.")
 
     try:
-        actual_hash = await submit_stellar_transaction(
+        tx = await submit_stellar_transaction(
             signed_xdr=req.signed_xdr,
             expected_data_hash=video.data_hash,
             expected_reporter_public_key=video.reporter.wallet_address,
             prepared_tx_hash=video.prepared_tx_hash
         )
 
-        if actual_hash:
-            update_video_status(
+        if tx:
+            actual_hash = tx.get("hash")
+            await asyncio.to_thread(
+                update_video_status,
                 session,
                 video.id,
                 status="verified",
-                tx_hash=actual_hash
+                tx_hash=actual_hash,
+                refresh=False
+            )
+            # Makbuz iş ortaklarının kaydı backend'e sormadan doğrulamasını sağlar
+            return SubmitResponse(
+                status="success",
+                stellar_tx_hash=actual_hash,
+                receipt=receipt_from_transaction(video, tx)
             )
-            return {
-                "status": "success",
-                "stellar_tx_hash": actual_hash,
-            }
 
-        update_video_status(session, video.id, status="failed")
+        await asyncio.to_thread(update_video_status, session, video.id, status="failed", refresh=False)
         raise HTTPException(500, "Stellar ağına gönderim hatası.")
 
+    except HorizonBudgetExceeded as e:
+        if not e.maybe_submitted:
+            # İşlem gönderilmedi; muhabir aynı imzalı XDR ile tekrar deneyebilir
+            await asyncio.to_thread(update_video_status, session, video.id, status="prepared", refresh=False)
+        # Aksi halde önceki bir deneme ağa ulaşmış olabilir; kayıt "prepared"a çekilmez, "sending" kalır
+        raise
+    except SubmitOutcomeUnknown as e:
+        # İşlem ağa ulaşmış olabilir: kayıt "sending" kalır, hash'i saklanır ve /verify ile sonuçlanır
+        await asyncio.to_thread(
+            update_video_status, session, video.id, status="sending", tx_hash=e.tx_hash, refresh=False
+        )
+        return ORJSONResponse(
+            status_code=202,
+            content=SubmitResponse(status="pending", stellar_tx_hash=e.tx_hash).model_dump(exclude_none=True)
+        )
     except Exception as e:
         print("Bilinmeyen Hata:", e)
         raise
 
 
+# -------------------------------------------
+# Doğrulama Makbuzları
+# -------------------------------------------
+@app.get("/receipts/service-account", response_model=ReceiptKeyResponse)
+async def receipt_service_account():
+    """
+    Makbuzları imzalayan servis hesabı. Doğrulayıcılar bunu bir kez alıp sabitlemelidir.
+    """
+    from stellar_utils import NETWORK_PASSPHRASE, get_service_public_key
+
+    return ReceiptKeyResponse(
+        service_account=get_service_public_key(),
+        network_passphrase=NETWORK_PASSPHRASE,
+        receipt_version=RECEIPT_VERSION
+    )
+
+
+@app.get("/videos/{video_id}/receipt", response_model=ReceiptResponse)
+async def video_receipt(video_id: UUID, session=Depends(get_session)):
+    """
+    Zincire yazılmış kayıt için imzalı makbuz. Ledger bilgisi önce yerel memo index'inden,
+    yoksa Horizon'dan alınır.
+    """
+    video = session.get(Video, video_id)
+    if not video:
+        raise HTTPException(404, "Video bulunamadı.")
+    if not video.tx_hash:
+        raise HTTPException(409, "Video henüz zincire yazılmadı.")
+
+    memo = get_onchain_memo(session, video.data_hash)
+    if memo is not None and memo.tx_hash == video.tx_hash:
+        # Index'te yalnızca servis hesabının başarılı HashMemo işlemleri tutulur
+        tx = {
+            "hash": memo.tx_hash,
+            "ledger": memo.ledger,
+            "created_at": memo.anchored_at,
+            "successful": True,
+            "memo_type": "hash",
+            "memo": base64.b64encode(bytes.fromhex(memo.memo_hash)).decode(),
+        }
+    else:
+        tx = await verify_transaction_on_blockchain(video.tx_hash)
+        if not tx:
+            raise HTTPException(409, "İşlem henüz zincirde görünmüyor.")
+    if not transaction_anchors(tx, video.data_hash):
+        raise HTTPException(409, "İşlem bu videonun data_hash'ini zincire yazmamış.")
+
+    receipt = receipt_from_transaction(video, tx)
+    if receipt is None:
+        raise HTTPException(503, "Makbuz üretilemedi.")
+    return ReceiptResponse(
+        video_id=video.id,
+        data_hash=video.data_hash,
+        tx_hash=tx["hash"],
+        ledger=tx["ledger"],
+        receipt=receipt
+    )
+
+
+# -------------------------------------------
+# Video Durum Akışı (Server-Sent Events)
+# -------------------------------------------
+@app.get("/videos/{video_id}/events")
+async def video_events_endpoint(
+    video_id: UUID,
+    request: Request,
+    last_event_id: str | None = Header(None)
+):
+    """
+    Videonun durum geçişlerini (prepared → sending → verified/failed) SSE olarak akıtır.
+    /verify ile polling yerine tek uzun ömürlü bağlantı; "verified" olayından ya da kayıt
+    retention ile arşive taşındığında gönderilen "archived" olayından sonra kapanır.
+    Yeniden bağlanan istemci (Last-Event-ID) yalnızca kaçırdığı olayları alır.
+    """
+    with Session(engine) as session:
+        video = session.get(Video, video_id)
+        if not video:
+            raise HTTPException(404, "Video bulunamadı.")
+        snapshot = {"video_id": str(video.id), "status": video.status, "tx_hash": video.tx_hash}
+
+    after_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return StreamingResponse(
+        _video_event_stream(request, video_id, after_id, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _load_status_events(video_id: UUID, after_id: int | None) -> list | None:
+    # Uzun ömürlü bağlantı boyunca DB bağlantısı tutulmaz; her kontrol kısa bir session açar
+    with Session(engine) as session:
+        events = [
+            {
+                "event_id": event.id,
+                "video_id": str(event.video_id),
+                "status": event.status,
+                "tx_hash": event.tx_hash,
+                "created_at": event.created_at.isoformat()
+            }
+            for event in get_status_events_after(session, video_id, after_id)
+        ]
+        # Retention kaydı olaylarıyla birlikte arşive taşıdıysa None; akış kapanır
+        if not events and session.get(Video, video_id) is None:
+            return None
+        return events
+
+
+async def _video_event_stream(request: Request, video_id: UUID, after_id: int | None, snapshot: dict):
+    yield f"retry: {EVENTS_RETRY_MS}\n\n"
+
+    # Abonelik ilk sorgudan önce açılır; arada yazılan olay kaçırılmaz
+    with video_events.subscribe(video_id) as wakeup:
+        first = True
+        idle = 0.0
+        while True:
+            wakeup.clear()
+            events = await asyncio.to_thread(_load_status_events, video_id, after_id)
+            if events is None:
+                archived = {"video_id": str(video_id), "status": "archived"}
+                yield f"event: archived\ndata: {orjson.dumps(archived).decode()}\n\n"
+                return
+
+            if first and after_id is None and not events:
+                # Olay kaydı olmayan (eski) videolar için mevcut durum
+                yield f"event: status\ndata: {orjson.dumps(snapshot).decode()}\n\n"
+                if snapshot["status"] in TERMINAL_STATUSES:
+                    return
+            first = False
+
+            for event in events:
+                after_id = event["event_id"]
+                yield f"id: {after_id}\nevent: status\ndata: {orjson.dumps(event).decode()}\n\n"
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+
+            # Aynı süreçteki yazımlar hub ile anında uyandırır; diğer worker'lar için periyodik kontrol
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=EVENTS_POLL_SECONDS)
+                idle = 0.0
+            except asyncio.TimeoutError:
+                idle += EVENTS_POLL_SECONDS
+                if await request.is_disconnected():
+                    return
+                if idle >= EVENTS_KEEPALIVE_SECONDS:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+
+
 # -------------------------------------------
 # Public Verify Endpoint
 # -------------------------------------------
-@app.post("/verify")
+@app.post("/verify", response_model=VerifyResponse, response_model_exclude_unset=True)
 async def get_verification(req: VerificationRequest, session=Depends(get_session)):
     video = get_video_by_url(session, req.video_url)
     if not video:
@@ -221,50 +787,69 @@ async def get_verification(req: VerificationRequest, session=Depends(get_session
     if video.tx_hash:
         tx = await verify_transaction_on_blockchain(video.tx_hash)
 
+        if tx and video.status == "sending":
+            # Sonucu bilinmeden bırakılan gönderim (zaman aşımı / izleme süresi doldu) burada sonuçlanır
+            await asyncio.to_thread(
+                update_video_status,
+                session,
+                video.id,
+                status="verified" if transaction_anchors(tx, video.data_hash) else "failed",
+                tx_hash=tx.get("hash"),
+                refresh=False
+            )
+
+        if tx and not transaction_anchors(tx, video.data_hash):
+            # İşlem zincirde ama başarısız ya da memo'su bu videonun data_hash'i değil
+            return VerifyResponse(
+                status="FAILED_ON_BLOCKCHAIN",
+                video_url=video.video_url,
+                memo_hex=base64.b64decode(tx["memo"]).hex() if tx.get("memo_type") == "hash" else None,
+                data_hash=video.data_hash,
+                stellar_transaction_id=video.tx_hash,
+                stellar_ledger=tx.get("ledger"),
+                blockchain_verified=False,
+                message="İşlem zincirde bulundu ancak bu videonun data_hash'ini doğrulamıyor."
+            )
+
         if tx:
-            memo_base64 = tx.get("memo")
-            memo_bytes = base64.b64decode(memo_base64)
-            memo_hex = memo_bytes.hex()
-            
-            # Transaction blockchain'de bulundu → video kesin kaydedilmiş
-            return {
-                "status": "VERIFIED_ON_STELLAR",
-                "video_url": video.video_url,
-                "memo_hex": memo_hex,
-                "data_hash": video.data_hash,
-                "reporter": {
-                    "full_name": reporter.full_name,
-                    "institution": reporter.institution,
-                    "wallet_address": reporter.wallet_address,
-                },
-                "recorded_at": video.created_at.isoformat(),
-                "stellar_transaction_id": video.tx_hash,
-                "stellar_ledger": tx.get("ledger"),
-                "stellar_created_at": tx.get("created_at"),
-                "stellar_operation_count": tx.get("operation_count"),
-                "blockchain_verified": True
-            }
+            memo_hex = base64.b64decode(tx["memo"]).hex()
+
+            # Transaction blockchain'de bulundu ve memo'su data_hash → video kesin kaydedilmiş
+            return VerifyResponse(
+                status="VERIFIED_ON_STELLAR",
+                video_url=video.video_url,
+                memo_hex=memo_hex,
+                data_hash=video.data_hash,
+                reporter=ReporterInfo.from_reporter(reporter),
+                recorded_at=video.created_at,
+                stellar_transaction_id=video.tx_hash,
+                stellar_ledger=tx.get("ledger"),
+                stellar_created_at=tx.get("created_at"),
+                stellar_operation_count=tx.get("operation_count"),
+                blockchain_verified=True,
+                receipt=receipt_from_transaction(video, tx)
+            )
         else:
             # Transaction henüz işlenmemiş olabilir
-            return {
-                "status": "PROCESSING_ON_BLOCKCHAIN",
-                "video_url": video.video_url,
-                "stellar_transaction_id": video.tx_hash,
-                "blockchain_verified": False,
-                "message": "Transaction Stellar blockchain'e gönderildi, henüz işlenmedi."
-            }
+            return VerifyResponse(
+                status="PROCESSING_ON_BLOCKCHAIN",
+                video_url=video.video_url,
+                stellar_transaction_id=video.tx_hash,
+                blockchain_verified=False,
+                message="Transaction Stellar blockchain'e gönderildi, henüz işlenmedi."
+            )
 
     # Eğer daha hiç tx_hash yoksa → kullanıcıya mevcut local status'u döndür
-    return {"status": video.status.upper()}
+    return VerifyResponse(status=video.status.upper())
 
 
 # -------------------------------------------
 # Data Hash Check Endpoint
 # -------------------------------------------
-@app.post("/verify/upload")
+@app.post("/verify/upload", response_model=DataHashCheckResponse, response_model_exclude_unset=True)
 async def check_data_hash_existence(
-    video_file: UploadFile = File(...),
-    session=Depends(get_session)
+    request: Request,
+    video_file: UploadFile = File(...)
 ):
     """
     Dosya yükleyerek data_hash oluşturup, veritabanında ve zincirde varlığını kontrol eder.
@@ -273,30 +858,58 @@ async def check_data_hash_existence(
     
     if not video_file:
         raise HTTPException(400, "Video dosyası boş.")
-    
+
+    # Anonim doğrulamalar istemci adresine göre adil sıraya girer
+    client_host = request.client.host if request.client else "unknown"
+
     try:
-        # 1. Dosyayı oku ve data_hash oluştur
-        video_content = await video_file.read()
-        video_file_like = io.BytesIO(video_content)
-        
-        # Hash oluştur
-        data_hash = generate_hash_from_video_file(video_file_like, session)
+        # 1. Dosyayı oku; aynı dosyanın eşzamanlı doğrulamaları (ör. viral bir video)
+        # tek validate_video + zincir kontrolünde birleşir ve aynı yanıtı alır
+        async with request_scope(request) as scope:
+            video_content = await video_file.read()
+            raw_hash = await run_stage("raw_hash", hash_raw_video, video_content)
+            result, _ = await scope.wait(
+                verification_flights.do(raw_hash, lambda: _check_data_hash(video_content, raw_hash, client_host)),
+                "verification"
+            )
+        return result
+
+    except (AdmissionRejected, OperationCancelled, HorizonBudgetExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"Data hash check error: {e}")
+        raise HTTPException(400, f"Data hash check error: {e}")
+
+
+async def _check_data_hash(video_content: bytes, raw_hash: str, client_host: str) -> DataHashCheckResponse:
+    # Single-flight işi bekleyen isteklerden bağımsız olarak kendi session'ını ve
+    # iptal scope'unu kullanır
+    with Session(engine) as session, cancel_scope(f"verification raw:{raw_hash[:16]}"):
+        # Byte'ı byte'ına aynı dosyanın tekrar kontrolü: raw_hash index'i ile moviepy atlanır
+        data_hash = await run_stage("lookup", find_video_by_raw_hash, session, raw_hash)
+
+        # Hash oluştur (aynı anda çalışan moviepy/ffmpeg işi sayısı sınırlı)
+        if data_hash is None:
+            async with video_jobs.slot(f"verify:{client_host}"):
+                data_hash = await run_stage(
+                    "validate", generate_hash_from_video_file, io.BytesIO(video_content), session, raw_hash
+                )
         
-        # Eğer hash zaten mevcutsa dict döndü, string döndüyse yeni hash
-        if isinstance(data_hash, dict):
+        # Eğer hash zaten mevcutsa PrepareResponse döndü, string döndüyse yeni hash
+        if isinstance(data_hash, PrepareResponse):
             existing_video = data_hash
-            logger.info(f"Video hash already exists: {data_hash['data_hash']}")
+            logger.info(f"Video hash already exists: {existing_video.data_hash}")
             
             # Get reporter information
-            video_record = get_video_by_data_hash(session, existing_video['data_hash'])
+            video_record = get_video_by_data_hash(session, existing_video.data_hash)
             reporter = None
             if video_record:
                 reporter = session.get(Reporter, video_record.reporter_id)
             
             # Blockchain durumunu kontrol et
             blockchain_status = None
-            if existing_video.get('prepared_tx_hash'):
-                tx = await verify_transaction_on_blockchain(existing_video['prepared_tx_hash'])
+            if existing_video.prepared_tx_hash:
+                tx = await verify_transaction_on_blockchain(existing_video.prepared_tx_hash)
                 if tx:
                     blockchain_status = "VERIFIED_ON_STELLAR"
                 else:
@@ -304,25 +917,19 @@ async def check_data_hash_existence(
             else:
                 blockchain_status = "NOT_ON_BLOCKCHAIN"
             
-            return {
-                "status": "ALREADY_EXISTS",
-                "data_hash": existing_video['data_hash'],
-                "database_status": existing_video['status'],
-                "blockchain_status": blockchain_status,
-                "video_info": {
-                    "video_id": existing_video['video_id'],
-                    "video_url": existing_video['video_url'],
-                    "prepared_tx_hash": existing_video['prepared_tx_hash']
-                },
-                "reporter_info": {
-                    "reporter_id": str(reporter.id),
-                    "full_name": reporter.full_name,
-                    "wallet_address": reporter.wallet_address,
-                    "institution": reporter.institution,
-                    "kyc_verified": reporter.kyc_verified
-                } if reporter else None,
-                "message": "Bu video zaten kayıtlı."
-            }
+            return DataHashCheckResponse(
+                status="ALREADY_EXISTS",
+                data_hash=existing_video.data_hash,
+                database_status=existing_video.status,
+                blockchain_status=blockchain_status,
+                video_info=VideoInfo(
+                    video_id=existing_video.video_id,
+                    video_url=existing_video.video_url,
+                    prepared_tx_hash=existing_video.prepared_tx_hash
+                ),
+                reporter_info=ReporterInfo.from_reporter(reporter) if reporter else None,
+                message="Bu video zaten kayıtlı."
+            )
         
         # 2. Yeni hash, veritabanında ara
         data_hash_str = data_hash  # string olarak hash al
@@ -348,39 +955,122 @@ async def check_data_hash_existence(
             else:
                 blockchain_status = "NOT_ON_BLOCKCHAIN"
             
-            return {
-                "status": "EXISTS_IN_DATABASE",
-                "data_hash": data_hash_str,
-                "database_status": existing_video.status,
-                "blockchain_status": blockchain_status,
-                "video_info": {
-                    "video_id": str(existing_video.id),
-                    "video_url": existing_video.video_url,
-                    "prepared_tx_hash": existing_video.prepared_tx_hash,
-                    "tx_hash": existing_video.tx_hash
-                },
-                "reporter_info": {
-                    "reporter_id": str(reporter.id),
-                    "full_name": reporter.full_name,
-                    "wallet_address": reporter.wallet_address,
-                    "institution": reporter.institution,
-                    "kyc_verified": reporter.kyc_verified
-                } if reporter else None,
-                "message": "Bu video veritabanında mevcut."
-            }
-        
-        # 3. Veritabanında yok, blockchain'de ara (opsiyonel - hash ile arama mümkünse)
-        # Not: Stellar blockchain'de doğrudan hash ile arama yapmak mümkün değil
-        # Bu nedenle bu adımı atlayıp "NOT_FOUND" dönebiliriz
-        
-        return {
-            "status": "NOT_FOUND",
-            "data_hash": data_hash_str,
-            "database_status": "NOT_EXISTS",
-            "blockchain_status": "UNKNOWN",
-            "message": "Bu video hiçbir yerde bulunamadı. Yeni kayıt oluşturulabilir."
-        }
+            return DataHashCheckResponse(
+                status="EXISTS_IN_DATABASE",
+                data_hash=data_hash_str,
+                database_status=existing_video.status,
+                blockchain_status=blockchain_status,
+                video_info=VideoInfo.from_video(existing_video),
+                reporter_info=ReporterInfo.from_reporter(reporter) if reporter else None,
+                message="Bu video veritabanında mevcut."
+            )
         
-    except Exception as e:
-        logger.error(f"Data hash check error: {e}")
-        raise HTTPException(400, f"Data hash check error: {e}")
+        # 3. Veritabanında yok, zincir üstü memo index'inde ara.
+        # Horizon'da memo ile arama yapılamadığı için servis hesabının geçmişi
+        # memo_indexer tarafından yerel tabloya aktarılır (DB kaydı kaybolmuş olsa da bulunur).
+        onchain_memo = get_onchain_memo(session, data_hash_str)
+        if onchain_memo:
+            logger.info(f"Data hash found in on-chain memo index: {data_hash_str}")
+            return DataHashCheckResponse(
+                status="ANCHORED_ON_CHAIN",
+                data_hash=data_hash_str,
+                database_status="NOT_EXISTS",
+                blockchain_status="VERIFIED_ON_STELLAR",
+                onchain_info=OnChainInfo(
+                    tx_hash=onchain_memo.tx_hash,
+                    ledger=onchain_memo.ledger,
+                    reporter_wallet=onchain_memo.reporter_wallet,
+                    anchored_at=onchain_memo.anchored_at
+                ),
+                message="Bu video veritabanında yok ancak Stellar ağında kayıtlı."
+            )
+
+        return DataHashCheckResponse(
+            status="NOT_FOUND",
+            data_hash=data_hash_str,
+            database_status="NOT_EXISTS",
+            blockchain_status="UNKNOWN",
+            message="Bu video hiçbir yerde bulunamadı. Yeni kayıt oluşturulabilir."
+        )
+
+
+# -------------------------------------------
+# Toplu Dışa Aktarma (denetim dökümü)
+# -------------------------------------------
+def require_admin_token(x_admin_token: str | None = Header(None)) -> None:
+    if not EXPORT_ADMIN_TOKEN:
+        raise HTTPException(404, "Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), EXPORT_ADMIN_TOKEN.encode()):
+        raise HTTPException(403, "Geçersiz yönetici anahtarı.")
+
+
+@app.get("/export", dependencies=[Depends(require_admin_token)])
+def export_records_endpoint(compress: bool = False):
+    """
+    Reporter + Video kayıtlarını (zincir üstü tx hash'leriyle) NDJSON olarak akıtır.
+    Tablolar sunucu tarafı cursor ile gezilir; bellek kullanımı tablo boyutundan bağımsızdır.
+    Muhabir kişisel bilgilerini içerdiği için X-Admin-Token (EXPORT_ADMIN_TOKEN) gerektirir.
+    """
+    def stream():
+        # Yanıt akarken istek bağımlılığı kapanmış olur; akış kendi session'ını kullanır
+        with Session(engine) as session:
+            yield from iter_export_lines(session, compress=compress)
+
+    if compress:
+        return StreamingResponse(
+            stream(),
+            media_type="application/gzip",
+            headers={"Content-Disposition": 'attachment; filename="redvalid-export.ndjson.gz"'}
+        )
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# -------------------------------------------
+# Alıntı (Excerpt) Doğrulama
+# -------------------------------------------
+@app.post("/verify/excerpt", response_model=ExcerptResponse, response_model_exclude_unset=True)
+async def verify_excerpt(
+    request: Request,
+    video_file: UploadFile = File(...),
+    session=Depends(get_session)
+):
+    """
+    Kayıtlı bir videodan kesilmiş alıntıyı segment hash'leri üzerinden kaynağına eşler.
+    """
+    logger.info(f"Excerpt check request geldi: File={video_file.filename}")
+
+    client_host = request.client.host if request.client else "unknown"
+
+    # İstemci koparsa ya da süre dolarsa segmentleme ffmpeg'i öldürülür
+    async with request_scope(request):
+        video_content = await video_file.read()
+        try:
+            async with video_jobs.slot(f"verify:{client_host}"):
+                excerpt_segments = await run_stage("validate", compute_segment_hashes, video_content)
+        except (AdmissionRejected, OperationCancelled):
+            raise
+        except Exception as e:
+            logger.error(f"Excerpt segment error: {e}")
+            raise HTTPException(400, f"Video segmentlere ayrılamadı: {e}")
+
+        match = await run_stage("lookup", find_excerpt_source, session, excerpt_segments)
+    if not match:
+        return ExcerptResponse(
+            status="NOT_FOUND",
+            excerpt_segments=len(excerpt_segments),
+            message="Alıntının kaynağı olan kayıtlı bir video bulunamadı."
+        )
+
+    video = session.get(Video, match["video_id"])
+    return ExcerptResponse(
+        status="MATCH_FOUND",
+        video_id=video.id,
+        video_url=video.video_url,
+        data_hash=video.data_hash,
+        database_status=video.status,
+        tx_hash=video.tx_hash,
+        offset_seconds=match["offset_seconds"],
+        matched_segments=match["matched_segments"],
+        excerpt_segments=match["excerpt_segments"],
+        message="Alıntı kayıtlı bir videoyla eşleşti."
+    )
@@ -0,0 +1,104 @@
+import os
+import time
+import argparse
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlmodel import Session, SQLModel, create_engine
+
+import db
+import group_commit
+from models import Reporter, Video
+
+# Eşzamanlı update_video_status çağrıları: her yazım kendi commit'i (group commit kapalı)
+# ile writer thread'inde toplu commit (açık) karşılaştırması. Her çalıştırma ayrı bir
+# SQLite dosyasında yapılır; commit başına fsync maliyeti dosya sisteminin gerçek maliyetidir.
+# Toplama penceresi GROUP_COMMIT_WINDOW_MS ile ayarlanır.
+
+
+def build(path: str, videos: int, concurrency: int):
+    if os.path.exists(path):
+        os.remove(path)
+    # Her worker thread'in kendi bağlantısı olur; havuz beklemesi ölçüme karışmaz
+    engine = create_engine(
+        f"sqlite:///{path}", pool_size=concurrency, connect_args={"check_same_thread": False, "timeout": 60}
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        reporter = Reporter(full_name="Bench Reporter", wallet_address="G" + "B" * 55)
+        session.add(reporter)
+        rows = [
+            Video(
+                video_url=f"https://bench.local/{i}",
+                platform="unknown",
+                data_hash=f"{i:064x}",
+                reporter_wallet=reporter.wallet_address,
+                reporter_id=reporter.id,
+                status="prepared",
+            )
+            for i in range(videos)
+        ]
+        session.add_all(rows)
+        session.commit()
+        ids = [video.id for video in rows]
+    return engine, ids
+
+
+def run(engine, ids, enabled: bool, concurrency: int) -> dict:
+    db.engine = engine
+    db.GROUP_COMMIT_ENABLED = enabled
+    group_commit.stop_group_writer()
+    local = threading.local()
+
+    def session() -> Session:
+        if not hasattr(local, "session"):
+            local.session = Session(engine)
+        return local.session
+
+    def write(video_id):
+        start = time.perf_counter()
+        db.update_video_status(session(), video_id, status="sending", refresh=False)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(write, ids))
+    elapsed = time.perf_counter() - start
+
+    stats = {"commits": len(ids), "writes": len(ids)}
+    if enabled:
+        writer = group_commit.get_group_writer(engine)
+        stats = writer.stats()
+        group_commit.stop_group_writer()
+    return {
+        "writes_per_s": len(ids) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "commits": stats["commits"],
+        "writes": stats["writes"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Group commit: eşzamanlı durum yazımlarında commit birleştirmenin etkisi.")
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--dir", default=".", help="Geçici SQLite dosyalarının konumu")
+    args = parser.parse_args()
+
+    results = {}
+    for name, enabled in (("kapalı", False), ("açık", True)):
+        path = os.path.join(args.dir, f"bench_group_commit_{int(enabled)}.db")
+        engine, ids = build(path, args.writes, args.concurrency)
+        results[name] = run(engine, ids, enabled, args.concurrency)
+        engine.dispose()
+        os.remove(path)
+
+    print(f"{'group commit':14} {'yazım/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'commit':>8} {'yazım':>7}")
+    for name, stats in results.items():
+        print(f"{name:14} {stats['writes_per_s']:10.0f} {stats['p50_ms']:8.2f} {stats['p99_ms']:8.2f} "
+              f"{stats['commits']:8d} {stats['writes']:7d}")
+    off, on = results["kapalı"], results["açık"]
+    print(f"\nhızlanma: {on['writes_per_s'] / off['writes_per_s']:.1f}x, "
+          f"commit başına yazım: {on['writes'] / max(on['commits'], 1):.1f}")
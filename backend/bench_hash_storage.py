@@ -0,0 +1,114 @@
+import os
+import time
+import random
+import sqlite3
+import hashlib
+import argparse
+import statistics
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Hex metin (eski şema) ile 32 byte binary (models.HexBinary) hash saklamanın karşılaştırması.
+# video tablosunun hash kolonlarını taklit eden iki SQLite dosyası kurulur; data_hash index'inin
+# boyutu ve get_video_by_data_hash'e denk birebir index aramasının gecikmesi ölçülür.
+# Binary tarafta API sınırındaki hex → bytes dönüşümü de ölçüme dahildir.
+
+LAYOUTS: Dict[str, Tuple[str, Callable[[str], object]]] = {
+    "text (hex)": ("TEXT", lambda value: value),
+    "blob (32 byte)": ("BLOB", bytes.fromhex),
+}
+
+
+def key(i: int) -> str:
+    return hashlib.sha256(i.to_bytes(8, "big")).hexdigest()
+
+
+def rows(count: int, encode: Callable[[str], object], chunk: int = 100_000) -> Iterator[List[tuple]]:
+    for start in range(0, count, chunk):
+        yield [(encode(key(i)), encode(key(i + count))) for i in range(start, min(start + chunk, count))]
+
+
+def build(path: str, column_type: str, encode: Callable[[str], object], count: int) -> Dict[str, float]:
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    # Yalnızca kurulumu hızlandırır; ölçüm bağlantısı varsayılan ayarlarla açılır
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(f"CREATE TABLE video (id INTEGER PRIMARY KEY, data_hash {column_type} NOT NULL, tx_hash {column_type})")
+
+    start = time.perf_counter()
+    for batch in rows(count, encode):
+        conn.executemany("INSERT INTO video (data_hash, tx_hash) VALUES (?, ?)", batch)
+        conn.commit()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    table_pages = conn.execute("PRAGMA page_count").fetchone()[0]
+
+    conn.execute("CREATE INDEX ix_video_data_hash ON video (data_hash)")
+    conn.commit()
+    index_pages = conn.execute("PRAGMA page_count").fetchone()[0] - table_pages
+    conn.execute("ANALYZE")
+    conn.close()
+    return {
+        "build_s": time.perf_counter() - start,
+        "table_mb": table_pages * page_size / 1e6,
+        "index_mb": index_pages * page_size / 1e6,
+    }
+
+
+def measure_lookups(path: str, encode: Callable[[str], object], keys: List[str]) -> Dict[str, float]:
+    conn = sqlite3.connect(path)
+    query = "SELECT id, data_hash, tx_hash FROM video WHERE data_hash = ?"
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", (encode(keys[0]),)).fetchall()
+    assert "ix_video_data_hash" in plan[0][-1], plan
+
+    samples = []
+    for value in keys:
+        start = time.perf_counter_ns()
+        conn.execute(query, (encode(value),)).fetchone()
+        samples.append(time.perf_counter_ns() - start)
+    conn.close()
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p50_us": samples[len(samples) // 2] / 1000,
+        "p99_us": samples[int(len(samples) * 0.99)] / 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hash kolonları: hex metin vs 32 byte binary (index boyutu, arama gecikmesi).")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=50_000)
+    parser.add_argument("--dir", default=".", help="Geçici SQLite dosyalarının konumu")
+    parser.add_argument("--keep", action="store_true", help="Dosyaları silme")
+    args = parser.parse_args()
+
+    rng = random.Random(48)
+    hits = [key(rng.randrange(args.rows)) for _ in range(args.lookups)]
+    misses = [key(args.rows * 2 + rng.randrange(args.rows)) for _ in range(args.lookups)]
+
+    results = {}
+    for name, (column_type, encode) in LAYOUTS.items():
+        path = os.path.join(args.dir, f"bench_hash_{column_type.lower()}.db")
+        print(f"{name}: {args.rows:,} satır yazılıyor...", flush=True)
+        stats = build(path, column_type, encode, args.rows)
+        # Isınma turu: her iki düzen de aynı (sıcak) önbellek koşulunda ölçülür
+        measure_lookups(path, encode, hits[: args.lookups // 10])
+        stats["hit"] = measure_lookups(path, encode, hits)
+        stats["miss"] = measure_lookups(path, encode, misses)
+        stats["file_mb"] = os.path.getsize(path) / 1e6
+        results[name] = stats
+        if not args.keep:
+            os.remove(path)
+
+    print()
+    print(f"{'düzen':16} {'tablo MB':>9} {'index MB':>9} {'dosya MB':>9} {'bulunan ort/p99 µs':>20} {'bulunmayan ort/p99 µs':>22}")
+    for name, stats in results.items():
+        hit, miss = stats["hit"], stats["miss"]
+        print(
+            f"{name:16} {stats['table_mb']:9.1f} {stats['index_mb']:9.1f} {stats['file_mb']:9.1f} "
+            f"{hit['mean_us']:11.2f} / {hit['p99_us']:6.2f} {miss['mean_us']:13.2f} / {miss['p99_us']:6.2f}"
+        )
+    text, blob = results["text (hex)"], results["blob (32 byte)"]
+    print(f"\nindex küçülmesi: {1 - blob['index_mb'] / text['index_mb']:.0%}, "
+          f"arama hızlanması (bulunan): {text['hit']['mean_us'] / blob['hit']['mean_us']:.2f}x")
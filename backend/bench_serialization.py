@@ -0,0 +1,199 @@
+import json
+import time
+import argparse
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app import app
+from models import (
+    Reporter,
+    Video,
+    ReporterInfo,
+    VideoInfo,
+    VideoListItem,
+    VideoPageResponse,
+    PrepareResponse,
+    DataHashCheckResponse,
+)
+
+
+def make_records(count: int):
+    reporter = Reporter(
+        full_name="Ayşe Yılmaz",
+        wallet_address="GBX5BZ4YNU2JTXBZ5N6RMVDA7D7F3C2M6VX2YXK2XKL7HZDQ4NZXPQZ",
+        institution="Serbest Muhabir",
+        kyc_verified=True,
+    )
+    videos = [
+        Video(
+            id=uuid4(),
+            created_at=datetime.utcnow(),
+            video_url=f"https://www.youtube.com/watch?v=bench{i:06d}",
+            platform="unknown",
+            data_hash=f"{i:064x}",
+            prepared_tx_hash=f"{i + 1:064x}",
+            tx_hash=f"{i + 2:064x}" if i % 2 else None,
+            reporter_wallet=reporter.wallet_address,
+            status="verified" if i % 2 else "prepared",
+            verified=bool(i % 2),
+            reporter_id=reporter.id,
+        )
+        for i in range(count)
+    ]
+    return reporter, videos
+
+
+# Önceki (elle kurulan dict) yanıtlar
+def legacy_video_page(videos) -> dict:
+    return {
+        "items": [
+            {
+                "video_id": str(video.id),
+                "video_url": video.video_url,
+                "platform": video.platform,
+                "data_hash": video.data_hash,
+                "status": video.status,
+                "verified": video.verified,
+                "prepared_tx_hash": video.prepared_tx_hash,
+                "tx_hash": video.tx_hash,
+                "reporter_wallet": video.reporter_wallet,
+                "created_at": video.created_at.isoformat()
+            }
+            for video in videos
+        ],
+        "next_cursor": "bench-cursor"
+    }
+
+
+def legacy_data_hash_check(video, reporter) -> dict:
+    return {
+        "status": "EXISTS_IN_DATABASE",
+        "data_hash": video.data_hash,
+        "database_status": video.status,
+        "blockchain_status": "VERIFIED_ON_STELLAR",
+        "video_info": {
+            "video_id": str(video.id),
+            "video_url": video.video_url,
+            "prepared_tx_hash": video.prepared_tx_hash,
+            "tx_hash": video.tx_hash
+        },
+        "reporter_info": {
+            "reporter_id": str(reporter.id),
+            "full_name": reporter.full_name,
+            "wallet_address": reporter.wallet_address,
+            "institution": reporter.institution,
+            "kyc_verified": reporter.kyc_verified
+        },
+        "message": "Bu video veritabanında mevcut."
+    }
+
+
+def legacy_prepare(video) -> dict:
+    return {
+        "message": "İşlem imzaya hazır.",
+        "video_id": video.id,
+        "video_url": video.video_url,
+        "data_hash": video.data_hash,
+        "xdr_for_signing": "A" * 400,
+        "prepared_tx_hash": video.prepared_tx_hash,
+        "already_registered": False
+    }
+
+
+def find_route(path: str) -> APIRoute:
+    return next(route for route in app.routes if isinstance(route, APIRoute) and route.path == path)
+
+
+def render_legacy(build) -> bytes:
+    # Önceki yol: response_model yok → jsonable_encoder → json.dumps (JSONResponse)
+    return JSONResponse(jsonable_encoder(build())).body
+
+
+def render_typed(route: APIRoute, build) -> bytes:
+    # Yeni yol: route'un response_model serileştirmesi (pydantic-core) → orjson
+    return ORJSONResponse(_serialize(route, build())).body
+
+
+def _serialize(route: APIRoute, value):
+    coroutine = serialize_response(
+        field=route.response_field,
+        response_content=value,
+        exclude_unset=route.response_model_exclude_unset,
+    )
+    # serialize_response içinde askıya alan bir await yok; event loop olmadan tamamlanır
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("serialize_response beklenmedik şekilde askıya alındı")
+
+
+def measure(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yanıt serileştirme maliyeti: dict + jsonable_encoder vs response_model + orjson.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    reporter, videos = make_records(args.page_size)
+    video = videos[1]
+
+    cases = [
+        (
+            f"GET /videos ({args.page_size} kayıt)",
+            "/videos",
+            lambda: legacy_video_page(videos),
+            lambda: VideoPageResponse(items=[VideoListItem.from_video(v) for v in videos], next_cursor="bench-cursor"),
+        ),
+        (
+            "POST /verify/upload",
+            "/verify/upload",
+            lambda: legacy_data_hash_check(video, reporter),
+            lambda: DataHashCheckResponse(
+                status="EXISTS_IN_DATABASE",
+                data_hash=video.data_hash,
+                database_status=video.status,
+                blockchain_status="VERIFIED_ON_STELLAR",
+                video_info=VideoInfo.from_video(video),
+                reporter_info=ReporterInfo.from_reporter(reporter),
+                message="Bu video veritabanında mevcut."
+            ),
+        ),
+        (
+            "POST /videos/prepare-transaction",
+            "/videos/prepare-transaction",
+            lambda: legacy_prepare(video),
+            lambda: PrepareResponse(
+                message="İşlem imzaya hazır.",
+                video_id=video.id,
+                video_url=video.video_url,
+                data_hash=video.data_hash,
+                xdr_for_signing="A" * 400,
+                prepared_tx_hash=video.prepared_tx_hash,
+                already_registered=False
+            ),
+        ),
+    ]
+
+    print(f"{'yanıt':36} {'önce µs':>9} {'sonra µs':>9} {'hızlanma':>9}")
+    for name, path, legacy, typed in cases:
+        route = find_route(path)
+        before_body = render_legacy(legacy)
+        after_body = render_typed(route, typed)
+        # Aynı JSON içeriği üretilmeli (anahtar sırası ve boşluklar hariç)
+        assert json.loads(before_body) == json.loads(after_body), name
+
+        before = measure(lambda: render_legacy(legacy), args.iterations)
+        after = measure(lambda: render_typed(route, typed), args.iterations)
+        print(f"{name:36} {before:9.1f} {after:9.1f} {before / after:8.1f}x")
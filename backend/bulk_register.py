@@ -0,0 +1,415 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlmodel import Session
+from dotenv import load_dotenv
+
+from db import (
+    engine,
+    create_db_and_tables,
+    create_video_segments,
+    get_reporter_by_wallet,
+    get_videos_by_raw_hashes,
+    get_videos_by_data_hashes,
+)
+from hashing import hash_raw_video, existing_video_response, process_video_batch_preparation
+from segment_index import SEGMENT_INDEX_ENABLED
+from stellar_utils import _load_service_account
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# validate_video (moviepy/ffmpeg) çalıştıran süreç sayısı
+BULK_REGISTER_WORKERS = int(os.getenv("BULK_REGISTER_WORKERS", str(os.cpu_count() or 2)))
+# Tek load_account + tek commit ile kaydedilen video sayısı (batch prepare endpoint'iyle aynı sınır)
+BULK_REGISTER_BATCH_SIZE = int(os.getenv("BULK_REGISTER_BATCH_SIZE", "100"))
+# raw_hash / data_hash index'inde tek IN sorgusuyla aranan hash sayısı
+BULK_LOOKUP_CHUNK = 500
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".mkv", ".webm", ".avi")
+
+
+class Checkpoint:
+    """
+    Satır başına bir dosya sonucu yazılan NDJSON dosyası; her dosya için son satır geçerlidir.
+    Dosya (boyut, mtime) değişmişse kayıt yok sayılır ve dosya yeniden işlenir. Her satır
+    yazıldığı anda diske bırakılır; kesilen çalışma en fazla o an işlenen dosyaları kaybeder.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Kesintide yarım kalan son satır
+                        continue
+                    self.entries[entry["path"]] = entry
+        self._file = open(path, "a", encoding="utf-8")
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(path)
+        if entry and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+            return entry
+        return None
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        self.entries[entry["path"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class BulkStats:
+    """
+    Aşama başına duvar süresi, worker süreçlerinde harcanan toplam süre ve dosya sayısı;
+    sonuç durumlarının sayımı.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.outcomes: Dict[str, int] = {}
+        self._nested: List[float] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        # İç içe aşamanın süresi (ör. doğrulama sırasında yapılan kayıt) dıştakinden düşülür
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stage(name)["wall_s"] += elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def _stage(self, name: str) -> Dict[str, float]:
+        return self.stages.setdefault(name, {"wall_s": 0.0, "worker_s": 0.0, "files": 0})
+
+    def add(self, name: str, files: int = 0, worker_s: float = 0.0) -> None:
+        stage = self._stage(name)
+        stage["files"] += files
+        stage["worker_s"] += worker_s
+
+    def outcome(self, status: str, count: int = 1) -> None:
+        self.outcomes[status] = self.outcomes.get(status, 0) + count
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        # Checkpoint'ten atlananlar hariç bu çalıştırmada ele alınan dosyalar
+        processed = self.stages.get("scan", {}).get("files", 0) - self.outcomes.get("resumed", 0)
+        lines = [f"{'aşama':10} {'dosya':>7} {'süre s':>9} {'worker s':>9} {'dosya/s':>9}"]
+        for name, stage in self.stages.items():
+            rate = stage["files"] / stage["wall_s"] if stage["wall_s"] else 0.0
+            lines.append(f"{name:10} {stage['files']:7.0f} {stage['wall_s']:9.2f} {stage['worker_s']:9.2f} {rate:9.1f}")
+        lines.append(f"toplam: {processed:.0f} dosya {elapsed:.1f} s içinde ({processed / elapsed if elapsed else 0:.1f} dosya/s)")
+        lines.append("sonuçlar: " + ", ".join(f"{status}={count}" for status, count in sorted(self.outcomes.items())))
+        return "\n".join(lines)
+
+
+def scan_files(root: str, extensions=VIDEO_EXTENSIONS) -> Iterator[Tuple[str, int, int]]:
+    """
+    Dizin ağacındaki video dosyaları (sıralı, gizli dizinler hariç).
+    Döner: (mutlak yol, boyut, mtime_ns)
+    """
+    for dirpath, dirnames, filenames in os.walk(os.path.abspath(root)):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+        for name in sorted(filenames):
+            if name.lower().endswith(extensions):
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                yield path, stat.st_size, stat.st_mtime_ns
+
+
+# ----------------------------
+# Worker süreçleri
+# ----------------------------
+def _init_worker() -> None:
+    # validate_video her adımı INFO ile loglar; binlerce dosyada çıktıyı boğmasın
+    logging.getLogger("add_video").setLevel(logging.WARNING)
+    logging.getLogger("segment_index").setLevel(logging.WARNING)
+
+
+def _raw_hash_worker(path: str) -> Tuple[str, float]:
+    start = time.perf_counter()
+    return hash_raw_video(path), time.perf_counter() - start
+
+
+def _validate_worker(path: str, with_segments: bool) -> Dict[str, Any]:
+    """
+    validate_video + (isteğe bağlı) segment hash'leri. Hatalar sonuç olarak döner;
+    tek bir bozuk dosya havuzu durdurmaz.
+    """
+    from add_video import validate_video
+    from segment_index import compute_segment_hashes
+
+    start = time.perf_counter()
+    try:
+        is_valid, result = validate_video(path)
+        if not is_valid:
+            return {"error": result["error"], "elapsed": time.perf_counter() - start}
+        output = {
+            "data_hash": result["hash"],
+            "original_duration": result["original_duration"],
+            "was_cropped": result["was_cropped"],
+        }
+        if with_segments:
+            try:
+                output["segments"] = compute_segment_hashes(path)
+            except Exception as e:
+                # Kayıt yine yapılır; yalnızca alıntı doğrulaması bu video için çalışmaz
+                output["segment_error"] = str(e)
+    except Exception as e:
+        output = {"error": f"Video işlenemedi: {e}"}
+    output["elapsed"] = time.perf_counter() - start
+    return output
+
+
+# ----------------------------
+# Kayıt
+# ----------------------------
+def _video_identifier(data_hash: str) -> str:
+    # Upload endpoint'leriyle aynı adlandırma: aynı dosya sonradan yüklenirse aynı kayda düşer
+    return f"uploaded_video_{data_hash[:16]}"
+
+
+def register_entries(
+    session: Session,
+    reporter,
+    entries: List[Dict[str, Any]],
+    checkpoint: Checkpoint,
+    stats: BulkStats,
+    service_account=None,
+) -> bool:
+    """
+    "hashed" durumundaki dosyaları batch prepare yoluyla (ardışık sequence'lı envelope'lar,
+    tek commit) kaydeder. service_account çalıştırma boyunca aynı nesnedir; her batch
+    sequence'ı bir öncekinin bıraktığı yerden sürdürür. İmzalanacak XDR'lar checkpoint'e
+    yazılır; envelope'lar checkpoint sırasıyla gönderilmelidir. Hata durumunda kayıtlar
+    "hashed" kalır ve sonraki çalıştırmada tekrar denenir. Döner: başarılı mı.
+    """
+    existing = {
+        video.data_hash: video
+        for video in get_videos_by_data_hashes(session, list({entry["data_hash"] for entry in entries}))
+    }
+    items = [
+        (
+            existing_video_response(existing[entry["data_hash"]]) if entry["data_hash"] in existing else entry["data_hash"],
+            _video_identifier(entry["data_hash"]),
+            entry["raw_hash"],
+        )
+        for entry in entries
+    ]
+    try:
+        results = process_video_batch_preparation(
+            session=session, items=items, reporter=reporter, service_account=service_account
+        )
+    except HTTPException as e:
+        logger.error(f"{len(entries)} dosyalık kayıt batch'i başarısız: {e.detail}")
+        stats.outcome("register_failed", len(entries))
+        return False
+
+    for entry, result in zip(entries, results):
+        segments = entry.pop("segments", None)
+        if not result.already_registered:
+            status = "registered"
+            if segments:
+                try:
+                    create_video_segments(session, result.video_id, segments)
+                except Exception as e:
+                    session.rollback()
+                    logger.warning(f"Segment index oluşturulamadı ({result.video_id}): {e}")
+        else:
+            # video_id yoksa aynı batch'te tekrar eden içerik
+            status = "known" if result.video_id else "duplicate"
+        checkpoint.record({
+            **entry,
+            "status": status,
+            "video_id": str(result.video_id) if result.video_id else None,
+            "prepared_tx_hash": result.prepared_tx_hash,
+            "xdr_for_signing": result.xdr_for_signing,
+        })
+        stats.outcome(status)
+    return True
+
+
+def run_bulk_registration(
+    root: str,
+    reporter_wallet: Optional[str],
+    checkpoint_path: str,
+    workers: int = BULK_REGISTER_WORKERS,
+    batch_size: int = BULK_REGISTER_BATCH_SIZE,
+    hash_only: bool = False,
+    retry_invalid: bool = False,
+) -> BulkStats:
+    """
+    Aşamalar: tarama → ham hash (süreç havuzu) → raw_hash index'inde arama →
+    validate_video + segment hash'leri (süreç havuzu) → batch prepare ile kayıt.
+    Kayıt, doğrulanan dosyalar batch_size'a ulaştıkça doğrulamayla birlikte ilerler.
+    hash_only: yalnızca hash'ler checkpoint'e yazılır; kayıt aynı checkpoint'le sonraki
+    çalıştırmada yapılır.
+    """
+    stats = BulkStats()
+    checkpoint = Checkpoint(checkpoint_path)
+    session = Session(engine)
+
+    reporter = None
+    if not hash_only:
+        reporter = get_reporter_by_wallet(session, reporter_wallet)
+        if reporter is None:
+            raise SystemExit(f"Muhabir cüzdanı bulunamadı: {reporter_wallet}")
+
+    with stats.stage("scan"):
+        files = list(scan_files(root))
+    stats.add("scan", len(files))
+
+    todo: List[Dict[str, Any]] = []
+    to_register: List[Dict[str, Any]] = []
+    for path, size, mtime_ns in files:
+        entry = checkpoint.get(path, size, mtime_ns)
+        if entry is None or (retry_invalid and entry["status"] == "invalid"):
+            todo.append({"path": path, "size": size, "mtime_ns": mtime_ns})
+        elif entry["status"] == "hashed":
+            to_register.append(entry)
+        else:
+            stats.outcome("resumed")
+    logger.info(f"{len(files)} dosya bulundu; {len(todo)} işlenecek, {len(to_register)} kayıt bekliyor")
+
+    registering = not hash_only
+    service_account = None
+
+    def flush(force: bool = False) -> None:
+        nonlocal registering, to_register, service_account
+        while registering and to_register and (force or len(to_register) >= batch_size):
+            chunk, to_register = to_register[:batch_size], to_register[batch_size:]
+            with stats.stage("register"):
+                if service_account is None:
+                    # Servis hesabı bir kez yüklenir; her batch'te yeniden yüklemek
+                    # henüz gönderilmemiş envelope'ların sequence'larını tekrar verir
+                    try:
+                        service_account = _load_service_account()
+                    except Exception as e:
+                        logger.error(f"Servis hesabı yüklenemedi: {e}")
+                        stats.outcome("register_failed", len(chunk))
+                        registering = False
+                        break
+                registering = register_entries(session, reporter, chunk, checkpoint, stats, service_account)
+            stats.add("register", len(chunk))
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        with pool:
+            # Ham hash: aynı dosya daha önce kaydedildiyse moviepy hiç çalışmaz
+            with stats.stage("raw_hash"):
+                for entry, (raw_hash, elapsed) in zip(todo, pool.map(_raw_hash_worker, [e["path"] for e in todo], chunksize=8)):
+                    entry["raw_hash"] = raw_hash
+                    stats.add("raw_hash", 1, elapsed)
+
+            with stats.stage("lookup"):
+                pending = _skip_known(session, todo, to_register, checkpoint, stats)
+            stats.add("lookup", len(todo))
+
+            flush()
+            with stats.stage("validate"):
+                futures = {
+                    pool.submit(_validate_worker, entry["path"], SEGMENT_INDEX_ENABLED and not hash_only): entry
+                    for entry in pending
+                }
+                for future in as_completed(futures):
+                    entry, result = futures[future], future.result()
+                    stats.add("validate", 1, result.pop("elapsed"))
+                    if "error" in result:
+                        checkpoint.record({**entry, "status": "invalid", "error": result["error"]})
+                        stats.outcome("invalid")
+                        continue
+                    entry = {**entry, **result, "status": "hashed"}
+                    # Segmentler checkpoint'e yazılmaz; kesintiden sonra kayıt segment'siz yapılır
+                    checkpoint.record({key: value for key, value in entry.items() if key != "segments"})
+                    stats.outcome("hashed")
+                    to_register.append(entry)
+                    flush()
+        flush(force=True)
+    except KeyboardInterrupt:
+        # Kuyruktaki dosyalar başlatılmaz; çalışanlar da aynı sinyali alıp çıkar
+        pool.shutdown(cancel_futures=True)
+        logger.warning("Kesildi; checkpoint ile kaldığı yerden devam edilebilir")
+    finally:
+        session.close()
+        checkpoint.close()
+    return stats
+
+
+def _skip_known(session: Session, todo, to_register, checkpoint: Checkpoint, stats: BulkStats) -> List[Dict[str, Any]]:
+    """
+    Ham hash'i index'te bulunan ya da bu arşivde daha önce görülen dosyaları işaretler.
+    Döner: validate_video'ya girecek kayıtlar.
+    """
+    known = {}
+    raw_hashes = list({entry["raw_hash"] for entry in todo})
+    for i in range(0, len(raw_hashes), BULK_LOOKUP_CHUNK):
+        for video in get_videos_by_raw_hashes(session, raw_hashes[i:i + BULK_LOOKUP_CHUNK]):
+            known[video.raw_hash] = video
+
+    seen = {entry["raw_hash"]: entry["path"] for entry in to_register}
+    pending = []
+    for entry in todo:
+        if entry["raw_hash"] in known:
+            video = known[entry["raw_hash"]]
+            checkpoint.record({**entry, "status": "known", "video_id": str(video.id), "data_hash": video.data_hash})
+            stats.outcome("known")
+        elif entry["raw_hash"] in seen:
+            checkpoint.record({**entry, "status": "duplicate", "duplicate_of": seen[entry["raw_hash"]]})
+            stats.outcome("duplicate")
+        else:
+            seen[entry["raw_hash"]] = entry["path"]
+            pending.append(entry)
+    return pending
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Yerel video arşivini paralel doğrula ve toplu kaydet.")
+    parser.add_argument("root", help="Video dosyalarını içeren dizin (alt dizinler dahil)")
+    parser.add_argument("--reporter-wallet", help="Videoların kaydedileceği muhabir cüzdanı (KYC doğrulanmış)")
+    parser.add_argument("--checkpoint", default="bulk_register.checkpoint.ndjson", help="Sonuçların yazıldığı/devam edilen dosya")
+    parser.add_argument("--workers", type=int, default=BULK_REGISTER_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=BULK_REGISTER_BATCH_SIZE)
+    parser.add_argument("--hash-only", action="store_true", help="Sadece hash'le; kaydı sonraki çalıştırmaya bırak")
+    parser.add_argument("--retry-invalid", action="store_true", help="Daha önce geçersiz işaretlenen dosyaları tekrar dene")
+    args = parser.parse_args()
+
+    if not args.hash_only and not args.reporter_wallet:
+        parser.error("--reporter-wallet gerekli (ya da --hash-only)")
+
+    engine.echo = False
+    create_db_and_tables()
+    stats = run_bulk_registration(
+        args.root,
+        args.reporter_wallet,
+        args.checkpoint,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        hash_only=args.hash_only,
+        retry_invalid=args.retry_invalid,
+    )
+    print(stats.report())
+    sys.exit(1 if stats.outcomes.get("register_failed") else 0)
@@ -0,0 +1,235 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import subprocess
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, Type
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# Bir isteğin video işleme için tutabileceği toplam süre (kuyruk beklemesi dahil)
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "180"))
+# Aşama bazında süre sınırları; aşılırsa iş iptal edilir ve istek 504 alır
+STAGE_DEADLINES = {
+    "raw_hash": float(os.getenv("STAGE_RAW_HASH_SECONDS", "15")),
+    "lookup": float(os.getenv("STAGE_LOOKUP_SECONDS", "15")),
+    "validate": float(os.getenv("STAGE_VALIDATE_SECONDS", "120")),
+    "prepare": float(os.getenv("STAGE_PREPARE_SECONDS", "45")),
+}
+# İstemci bağlantısının kontrol aralığı
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+# İptalden sonra thread'in (ffmpeg öldürüldükten sonra) temizlik yapıp çıkması için beklenen süre
+CANCEL_GRACE_SECONDS = float(os.getenv("CANCEL_GRACE_SECONDS", "5"))
+
+
+class OperationCancelled(Exception):
+    """
+    İş yarıda bırakıldı; scope'un başlattığı ffmpeg süreçleri öldürülmüştür.
+    """
+
+
+class ClientDisconnected(OperationCancelled):
+    """
+    İstemci yanıtı beklemeden bağlantıyı kapattı.
+    """
+
+
+class DeadlineExceeded(OperationCancelled):
+    """
+    İstek ya da aşama süre sınırı aşıldı. Endpoint'ler bunu 504'e çevirir.
+    """
+
+
+class CancelScope:
+    """
+    Bir isteğin (ya da single-flight işinin) iptal durumu.
+
+    - Event loop tarafında cancel() ile tetiklenir: istemci koptu, süre doldu ya da işi
+      bekleyen kalmadı. Scope içinde başlatılan alt süreçler (moviepy/ffmpeg) öldürülür.
+    - Worker thread'lerde check_cancelled() ile kontrol edilir; asyncio.to_thread context'i
+      kopyaladığı için scope thread'lerde de görünür.
+    """
+
+    def __init__(self, name: str, deadline_seconds: Optional[float] = None):
+        self.name = name
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self._error: Optional[Type[OperationCancelled]] = None
+        self._reason = ""
+        self._processes: "weakref.WeakSet[subprocess.Popen]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._loop = asyncio.get_running_loop()
+        self._cancelled = self._loop.create_future()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._error is not None
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def cancel(self, error: Type[OperationCancelled], reason: str) -> None:
+        with self._lock:
+            if self._error is not None:
+                return
+            self._error = error
+            self._reason = reason
+            processes = list(self._processes)
+        logger.info(f"{self.name} iptal edildi: {reason} ({len(processes)} alt süreç)")
+        for process in processes:
+            _kill(process)
+        self._loop.call_soon_threadsafe(self._set_cancelled)
+
+    def _set_cancelled(self) -> None:
+        if not self._cancelled.done():
+            self._cancelled.set_result(None)
+
+    def exception(self) -> OperationCancelled:
+        return self._error(f"{self.name}: {self._reason}")
+
+    def check(self) -> None:
+        if self._error is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DeadlineExceeded, "istek süre sınırı aşıldı")
+        if self._error is not None:
+            raise self.exception()
+
+    def track(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            if self._error is None:
+                self._processes.add(process)
+                return
+        # Scope iptal edildikten sonra başlatılan süreç
+        _kill(process)
+
+    async def wait(self, awaitable, stage: str, timeout: Optional[float] = None) -> Any:
+        """
+        awaitable'ı scope iptal edilene ya da aşama/istek süresi dolana kadar bekler.
+        Süre dolarsa scope DeadlineExceeded ile iptal edilir. Bekleyen görev iptal edilirse
+        (ör. single-flight işinin bekleyeni kalmadı) scope da iptal edilir.
+        """
+        future = asyncio.ensure_future(awaitable)
+        budgets = [value for value in (timeout, self.remaining()) if value is not None]
+        try:
+            done, _ = await asyncio.wait(
+                {future, self._cancelled},
+                timeout=min(budgets) if budgets else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except asyncio.CancelledError:
+            self.cancel(OperationCancelled, f"{stage} aşamasında iş bırakıldı")
+            future.cancel()
+            raise
+
+        if future in done:
+            return future.result()
+        if not done:
+            self.cancel(DeadlineExceeded, f"{stage} aşaması süre sınırını aştı")
+        future.cancel()
+        raise self.exception()
+
+
+current_scope: ContextVar[Optional[CancelScope]] = ContextVar("current_scope", default=None)
+
+
+def _kill(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+
+def check_cancelled() -> None:
+    """
+    Worker thread'lerde aşama aralarında çağrılır: geri dönüşü olmayan adımlardan
+    (ör. Video kaydı) önce iptal edilmiş işin devam etmesini engeller.
+    """
+    scope = current_scope.get()
+    if scope is not None:
+        scope.check()
+
+
+class _TrackedPopen(subprocess.Popen):
+    """
+    Aktif scope içinde başlatılan alt süreçleri scope'a kaydeder. moviepy ffmpeg'i
+    subprocess.Popen ile başlatır; subprocess.run da aynı sınıfı kullanır.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        scope = current_scope.get()
+        if scope is not None:
+            scope.track(self)
+
+
+def install_process_tracking() -> None:
+    if subprocess.Popen is not _TrackedPopen:
+        subprocess.Popen = _TrackedPopen
+
+
+async def run_stage(stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    fn'i worker thread'de aktif scope'un ve STAGE_DEADLINES[stage]'in sınırları içinde çalıştırır.
+    İptal ya da süre aşımında alt süreçler öldürülür ve thread'in scratch dosyalarını silip
+    çıkması CANCEL_GRACE_SECONDS kadar beklenir.
+    """
+    scope = current_scope.get()
+    if scope is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    scope.check()
+    future = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+    # İptal sonrası thread'in hatası "never retrieved" uyarısı vermesin
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    try:
+        return await scope.wait(asyncio.shield(future), stage, STAGE_DEADLINES.get(stage))
+    except (OperationCancelled, asyncio.CancelledError):
+        await asyncio.wait({future}, timeout=CANCEL_GRACE_SECONDS)
+        raise
+
+
+@contextmanager
+def cancel_scope(name: str, deadline_seconds: Optional[float] = None):
+    """
+    Çağıranın context'inde yeni bir scope açar (ör. single-flight işi, isteklerden bağımsız).
+    """
+    scope = CancelScope(name, deadline_seconds)
+    token = current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        current_scope.reset(token)
+
+
+async def _watch_disconnect(request, scope: CancelScope) -> None:
+    while not scope.cancelled:
+        if await request.is_disconnected():
+            scope.cancel(ClientDisconnected, "istemci bağlantısı koptu")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+@asynccontextmanager
+async def request_scope(request, deadline_seconds: float = REQUEST_DEADLINE_SECONDS):
+    """
+    Endpoint gövdesi için scope: istemci bağlantısı DISCONNECT_POLL_SECONDS aralıkla
+    kontrol edilir ve istek süresi deadline_seconds ile sınırlanır.
+    """
+    with cancel_scope(f"{request.method} {request.url.path}", deadline_seconds) as scope:
+        watcher = asyncio.create_task(_watch_disconnect(request, scope))
+        try:
+            yield scope
+        finally:
+            watcher.cancel()
@@ -1,15 +1,29 @@
 # db.py
 from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy import inspect, tuple_, LargeBinary
 from uuid import UUID
-from models import Reporter, Video
+from datetime import datetime
+from typing import List, Optional, Tuple
+from models import Reporter, Video, VideoSegment, VideoStatusEvent, OnChainMemo, HexBinary
+from events import video_events
+from group_commit import GROUP_COMMIT_ENABLED, get_group_writer
 import os
+import base64
+import logging
+import argparse
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
 # Database configuration from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
+# Hex → binary hash dönüşümünde (bkz. _migrate_hash_columns) transaction başına satır sayısı
+HASH_MIGRATION_BATCH_SIZE = int(os.getenv("HASH_MIGRATION_BATCH_SIZE", "5000"))
+# SQLite PRAGMA user_version: bu sürüme gelmiş veritabanında hash kolonları binary'dir
+HASH_SCHEMA_VERSION = 1
 
 engine = create_engine(
     DATABASE_URL,
@@ -20,6 +34,139 @@ engine = create_engine(
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    _migrate_schema()
+
+
+def _migrate_schema(hash_batch_size: int = HASH_MIGRATION_BATCH_SIZE):
+    """
+    create_all mevcut tablolara sonradan eklenen kolon ve index'leri eklemez.
+    Eksik (nullable) kolonları ALTER TABLE ile, eksik index'leri checkfirst ile oluşturur.
+    """
+    inspector = inspect(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+    _migrate_hash_columns(hash_batch_size)
+
+
+def _hex_columns(table) -> List[str]:
+    return [column.name for column in table.columns if isinstance(column.type, HexBinary)]
+
+
+def _migrate_hash_columns(batch_size: int = HASH_MIGRATION_BATCH_SIZE) -> dict:
+    """
+    Hex metin olarak yazılmış hash kolonlarını (models.HexBinary) 32 byte'lık binary'ye çevirir.
+
+    - Postgres: kolon tipi ALTER COLUMN ... TYPE bytea USING decode(..., 'hex') ile değişir.
+    - SQLite: kolon tipi değiştirilemez ama her kolon BLOB saklayabilir; değerler rowid sırasıyla
+      batch batch (her biri ayrı transaction) yerinde çevrilir, ardından tablonun index'leri
+      sıkıştırılmak için REINDEX edilir. Yarıda kesilirse bir sonraki açılışta kalan metin satırlar
+      çevrilir; tamamlanınca PRAGMA user_version işaretlenir ve kontrol tekrarlanmaz.
+      Hex olmayan (bozuk) değerler metin olarak bırakılır ve sayısı loglanır.
+    Döner: tablo → çevrilen satır sayısı.
+    """
+    if engine.dialect.name == "postgresql":
+        return _migrate_hash_columns_postgres()
+
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() >= HASH_SCHEMA_VERSION:
+            return {}
+
+    inspector = inspect(engine)
+    stats = {}
+    for table in SQLModel.metadata.sorted_tables:
+        columns = _hex_columns(table)
+        if columns and inspector.has_table(table.name):
+            stats[table.name] = _convert_sqlite_table(table.name, columns, batch_size)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version = {HASH_SCHEMA_VERSION}")
+    if any(stats.values()):
+        logger.info(f"Hash kolonları binary'ye çevrildi: {stats}")
+    return stats
+
+
+def _convert_sqlite_table(table_name: str, columns: List[str], batch_size: int) -> int:
+    column_list = ", ".join(columns)
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    last_rowid, converted, invalid = -1, 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.exec_driver_sql(
+                f"SELECT rowid, {column_list} FROM {table_name} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+
+            updates = []
+            for rowid, *values in rows:
+                if not any(isinstance(value, str) for value in values):
+                    continue
+                new_values = []
+                for value in values:
+                    if isinstance(value, str):
+                        try:
+                            value = bytes.fromhex(value)
+                        except ValueError:
+                            invalid += 1
+                    new_values.append(value)
+                updates.append((*new_values, rowid))
+            if updates:
+                conn.exec_driver_sql(f"UPDATE {table_name} SET {assignments} WHERE rowid = ?", updates)
+                converted += len(updates)
+
+    if converted:
+        # Yerinde güncelleme index sayfalarını yarı dolu bırakır; yeniden kurulan index küçülür
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"REINDEX {table_name}")
+    if invalid:
+        logger.warning(f"{table_name}: hex olmayan {invalid} hash değeri metin olarak bırakıldı")
+    return converted
+
+
+def _migrate_hash_columns_postgres() -> dict:
+    inspector = inspect(engine)
+    stats = {}
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_types = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        for column in _hex_columns(table):
+            if isinstance(existing_types.get(column), LargeBinary):
+                continue
+            with engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ALTER COLUMN {column} TYPE bytea USING decode({column}, 'hex')"
+                )
+            stats.setdefault(table.name, []).append(column)
+    if stats:
+        logger.info(f"Hash kolonları bytea'ya çevrildi: {stats}")
+    return stats
+
+
+def insert_ignore_conflicts(table):
+    """
+    Çakışan satırları (PK, unique kısıtlar) atlayan INSERT.
+    """
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table).on_conflict_do_nothing()
 
 
 def get_session():
@@ -57,61 +204,125 @@ def set_reporter_kyc_verified(session: Session, reporter_id: UUID, value: bool =
 # ----------------------------
 # CRUD: Video
 # ----------------------------
-def create_video_record(session, reporter_id, video_url, platform, data_hash, prepared_tx_hash=None, tx_hash=None, reporter_wallet=None):
-    video = Video(
-        reporter_id=reporter_id,
-        video_url=video_url,
-        platform=platform,
-        data_hash=data_hash,
-        prepared_tx_hash=prepared_tx_hash,
-        tx_hash=tx_hash,
-        reporter_wallet=reporter_wallet,
-        status="prepared",
-        verified=False
-    )
-    session.add(video)
+def _commit_write(session: Session, write, refresh: bool = True):
+    """
+    write(session) ile yapılan değişikliği commit eder ve yazılan nesneyi döner.
+
+    GROUP_COMMIT_ENABLED ise yazım, eşzamanlı diğer yazımlarla birlikte tek commit'te
+    (group_commit writer thread'i) kalıcı hale gelir ve nesne çağıranın session'ına
+    ek SELECT yapılmadan eklenir. refresh=False ise commit sonrası refresh atlanır;
+    alanlar yalnızca erişildiklerinde yeniden yüklenir. Tüm varsayılanlar Python
+    tarafında üretildiği için çoğu çağıranın refresh'e ihtiyacı yoktur.
+    """
+    if GROUP_COMMIT_ENABLED:
+        obj = get_group_writer(engine).submit(write)
+        if isinstance(obj, list):
+            return [session.merge(item, load=False) for item in obj]
+        return session.merge(obj, load=False) if obj is not None else None
+
+    obj = write(session)
+    if obj is None:
+        return None
     session.commit()
-    session.refresh(video)
+    if refresh and not isinstance(obj, list):
+        session.refresh(obj)
+    return obj
+
+
+def create_video_record(session, reporter_id, video_url, platform, data_hash, prepared_tx_hash=None, tx_hash=None, reporter_wallet=None, raw_hash=None, refresh=True):
+    def write(write_session):
+        video = Video(
+            reporter_id=reporter_id,
+            video_url=video_url,
+            platform=platform,
+            data_hash=data_hash,
+            raw_hash=raw_hash,
+            prepared_tx_hash=prepared_tx_hash,
+            tx_hash=tx_hash,
+            reporter_wallet=reporter_wallet,
+            status="prepared",
+            verified=False
+        )
+        write_session.add(video)
+        _add_status_event(write_session, video)
+        return video
+
+    video = _commit_write(session, write, refresh)
+    video_events.notify(video.id)
     return video
 
 
 
+def create_video_records(session: Session, rows: List[dict]) -> List[Video]:
+    """
+    Birden fazla Video satırını tek bir transaction/commit ile ekler (group commit açıksa
+    writer thread'inde, diğer yazımlarla aynı commit'te). Tüm alanlar Python tarafında
+    üretildiği için commit sonrası refresh gerekmez.
+    """
+    def write(write_session):
+        videos = [
+            Video(**row, status="prepared", verified=False)
+            for row in rows
+        ]
+        write_session.add_all(videos)
+        for video in videos:
+            _add_status_event(write_session, video)
+        return videos
+
+    videos = _commit_write(session, write, refresh=False)
+    for video in videos:
+        video_events.notify(video.id)
+    return videos
+
+
 def update_video_status(
     session: Session,
     video_id: UUID,
     status: str,
-    tx_hash: str | None = None
+    tx_hash: str | None = None,
+    refresh: bool = True
 ) -> Video | None:
 
-    video = session.get(Video, video_id)
-    if not video:
-        return None
+    def write(write_session):
+        video = write_session.get(Video, video_id)
+        if not video:
+            return None
 
-    video.status = status
-    if tx_hash:
-        video.tx_hash = tx_hash
+        video.status = status
+        if tx_hash:
+            video.tx_hash = tx_hash
 
-    session.commit()
-    session.refresh(video)
+        _add_status_event(write_session, video)
+        return video
+
+    video = _commit_write(session, write, refresh)
+    if video:
+        video_events.notify(video.id)
     return video
 
 
 def mark_video_verified(
     session: Session,
     video_id: UUID,
-    verification_tx_hash: str
+    verification_tx_hash: str,
+    refresh: bool = True
 ) -> Video | None:
 
-    video = session.get(Video, video_id)
-    if not video:
-        return None
+    def write(write_session):
+        video = write_session.get(Video, video_id)
+        if not video:
+            return None
 
-    video.verified = True
-    video.verification_tx_hash = verification_tx_hash
-    video.status = "verified"
+        video.verified = True
+        video.verification_tx_hash = verification_tx_hash
+        video.status = "verified"
 
-    session.commit()
-    session.refresh(video)
+        _add_status_event(write_session, video, tx_hash=verification_tx_hash)
+        return video
+
+    video = _commit_write(session, write, refresh)
+    if video:
+        video_events.notify(video.id)
     return video
 
 
@@ -124,3 +335,162 @@ def get_video_by_data_hash(session: Session, data_hash: str) -> Video | None:
     return session.exec(
         select(Video).where(Video.data_hash == data_hash)
     ).first()
+
+
+def get_videos_by_urls(session: Session, urls: List[str]) -> List[Video]:
+    if not urls:
+        return []
+    return list(session.exec(
+        select(Video).where(Video.video_url.in_(urls))
+    ).all())
+
+
+def get_videos_by_data_hashes(session: Session, data_hashes: List[str]) -> List[Video]:
+    if not data_hashes:
+        return []
+    return list(session.exec(
+        select(Video).where(Video.data_hash.in_(data_hashes))
+    ).all())
+
+
+def get_videos_by_raw_hashes(session: Session, raw_hashes: List[str]) -> List[Video]:
+    if not raw_hashes:
+        return []
+    return list(session.exec(
+        select(Video).where(Video.raw_hash.in_(raw_hashes))
+    ).all())
+
+
+def get_video_by_raw_hash(session: Session, raw_hash: str) -> Video | None:
+    return session.exec(
+        select(Video).where(Video.raw_hash == raw_hash)
+    ).first()
+
+
+# ----------------------------
+# Video Durum Olayları (SSE)
+# ----------------------------
+def _add_status_event(session: Session, video: Video, tx_hash: str | None = None) -> None:
+    # Durum değişikliğiyle aynı commit'te yazılır; olay ancak değişiklik kalıcıysa görünür
+    session.add(VideoStatusEvent(
+        video_id=video.id,
+        status=video.status,
+        tx_hash=tx_hash or video.tx_hash
+    ))
+
+
+def get_status_events_after(
+    session: Session,
+    video_id: UUID,
+    after_id: Optional[int] = None
+) -> List[VideoStatusEvent]:
+    query = select(VideoStatusEvent).where(VideoStatusEvent.video_id == video_id)
+    if after_id is not None:
+        query = query.where(VideoStatusEvent.id > after_id)
+    return list(session.exec(query.order_by(VideoStatusEvent.id)).all())
+
+
+# ----------------------------
+# Zincir Üstü Memo Index'i
+# ----------------------------
+def get_onchain_memo(session: Session, memo_hash: str, account: str | None = None) -> OnChainMemo | None:
+    """
+    Servis hesabının gönderdiği memo kaydı. account verilmezse indexer'ın taradığı hesap
+    kullanılır; servis hesabı yapılandırılmamışsa index güvenilir değildir ve None döner.
+    """
+    if account is None:
+        from memo_indexer import index_account
+        try:
+            account = index_account()
+        except RuntimeError:
+            return None
+
+    # Aynı hash birden fazla kez gönderilmişse ilk (en eski) işlem döner
+    return session.exec(
+        select(OnChainMemo)
+        .where(OnChainMemo.memo_hash == memo_hash, OnChainMemo.source_account == account)
+        .order_by(OnChainMemo.ledger)
+    ).first()
+
+
+# ----------------------------
+# CRUD: Video Segment Index
+# ----------------------------
+def create_video_segments(session: Session, video_id: UUID, segments: List[dict]) -> None:
+    session.add_all([
+        VideoSegment(
+            video_id=video_id,
+            seq=segment["seq"],
+            segment_hash=segment["segment_hash"],
+            start_time=segment["start_time"],
+            end_time=segment["end_time"]
+        )
+        for segment in segments
+    ])
+    session.commit()
+
+
+def get_segments_by_hashes(session: Session, segment_hashes: List[str]) -> List[VideoSegment]:
+    if not segment_hashes:
+        return []
+    return list(session.exec(
+        select(VideoSegment).where(VideoSegment.segment_hash.in_(segment_hashes))
+    ).all())
+
+
+# ----------------------------
+# Listeleme (keyset pagination)
+# ----------------------------
+def encode_video_cursor(video: Video) -> str:
+    raw = f"{video.created_at.isoformat()}|{video.id.hex}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_video_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Geçersiz cursor için ValueError fırlatır.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        created_at, video_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), UUID(video_id)
+    except Exception as e:
+        raise ValueError(f"Geçersiz cursor: {cursor}") from e
+
+
+def list_videos(
+    session: Session,
+    reporter_wallet: Optional[str] = None,
+    status: Optional[str] = None,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    limit: int = 50
+) -> List[Video]:
+    """
+    Videoları (created_at, id) azalan sırada listeler. OFFSET yerine son görülen
+    (created_at, id) çiftinden devam eder; böylece derin sayfalar da bileşik index
+    üzerinde tek bir aralık taramasıyla ilk sayfa kadar hızlı döner.
+    """
+    query = select(Video)
+    if reporter_wallet:
+        query = query.where(Video.reporter_wallet == reporter_wallet)
+    if status:
+        query = query.where(Video.status == status)
+    if after:
+        query = query.where(tuple_(Video.created_at, Video.id) < tuple(after))
+
+    query = query.order_by(Video.created_at.desc(), Video.id.desc()).limit(limit)
+    return list(session.exec(query).all())
+
+
+if __name__ == "__main__":
+    # Büyük veritabanlarında hash dönüşümünü deploy öncesinde ayrıca çalıştırmak için
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Şemayı güncelle ve hex hash kolonlarını binary'ye çevir.")
+    parser.add_argument("--batch-size", type=int, default=HASH_MIGRATION_BATCH_SIZE, help="Transaction başına satır")
+    args = parser.parse_args()
+
+    engine.echo = False
+    SQLModel.metadata.create_all(engine)
+    _migrate_schema(args.batch_size)
+    print("Şema güncel. Dönüşümden kalan boş sayfalar için: python retention.py --vacuum")
@@ -0,0 +1,78 @@
+import os
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# Bildirim gelmese de DB'nin kontrol edildiği aralık (başka worker'ların yazdığı olaylar için)
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "2"))
+# Bağlantıyı proxy'lerde açık tutan SSE yorum satırı aralığı
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# İstemcinin bağlantı koparsa yeniden denemeden önce bekleyeceği süre (SSE retry, ms)
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+
+# Bu durumlara geçildiğinde akış kapanır
+TERMINAL_STATUSES = {"verified"}
+
+
+class VideoEventHub:
+    """
+    Süreç içi pub/sub. Olayların kendisi video_status_event tablosundadır; hub yalnızca
+    aynı süreçteki dinleyicileri "bu videoda yeni olay var" diye uyandırır.
+
+    Yazma tarafı (db.update_video_status vb.) threadpool'dan da çağrılabildiği için
+    bildirimler dinleyicinin event loop'una call_soon_threadsafe ile iletilir.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[UUID, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(self, video_id: UUID) -> Iterator[asyncio.Event]:
+        """
+        Video için bir uyanma sinyali (asyncio.Event) verir; blok bitince abonelik kalkar.
+        """
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._subscribers.setdefault(video_id, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(video_id)
+                if subscribers is not None:
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        del self._subscribers[video_id]
+
+    def notify(self, video_id: UUID) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(video_id, ()))
+        for loop, wakeup in subscribers:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # Loop kapanmış; abonelik bağlam yöneticisinden çıkınca temizlenir
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "watched_videos": len(self._subscribers),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+            }
+
+
+video_events = VideoEventHub()
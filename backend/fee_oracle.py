@@ -0,0 +1,112 @@
+import os
+import time
+import logging
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from horizon_pool import get_horizon_pool
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# Horizon fee_stats.fee_charged dağılımından seçilecek yüzdelik (p10, p20, ... p90, p95, p99)
+FEE_PERCENTILE = os.getenv("FEE_PERCENTILE", "p70")
+# Operation başına ücret sınırları (stroop). Minimum ağın taban ücretidir.
+FEE_MIN_STROOPS = int(os.getenv("FEE_MIN_STROOPS", "100"))
+FEE_MAX_STROOPS = int(os.getenv("FEE_MAX_STROOPS", "100000"))
+FEE_STATS_CACHE_SECONDS = float(os.getenv("FEE_STATS_CACHE_SECONDS", "15"))
+# Fee-bump'ta yeni ücret: max(önceki ücret * çarpan, güncel p99).
+# stellar-core kuyruktaki işlemi ancak en az 10 kat ücretli bir fee-bump ile değiştirir.
+FEE_BUMP_MULTIPLIER = float(os.getenv("FEE_BUMP_MULTIPLIER", "10"))
+# Gönderilen işlem bu kadar ledger içinde dahil edilmezse fee-bump yapılır
+FEE_BUMP_AFTER_LEDGERS = int(os.getenv("FEE_BUMP_AFTER_LEDGERS", "3"))
+FEE_MAX_BUMPS = int(os.getenv("FEE_MAX_BUMPS", "1"))
+# Ortalama ledger kapanma süresi; ledger sayısı süreye çevrilirken kullanılır
+LEDGER_CLOSE_SECONDS = float(os.getenv("LEDGER_CLOSE_SECONDS", "5"))
+INCLUSION_POLL_SECONDS = float(os.getenv("INCLUSION_POLL_SECONDS", "1"))
+
+
+class FeeOracle:
+    """
+    Horizon fee_stats sonucunu FEE_STATS_CACHE_SECONDS boyunca önbellekte tutar ve
+    yapılandırılan yüzdelikten operation başına taban ücret seçer.
+    Horizon'a ulaşılamazsa son bilinen değer, o da yoksa FEE_MIN_STROOPS kullanılır.
+    """
+
+    def __init__(
+        self,
+        percentile: str = FEE_PERCENTILE,
+        min_fee: int = FEE_MIN_STROOPS,
+        max_fee: int = FEE_MAX_STROOPS,
+        cache_seconds: float = FEE_STATS_CACHE_SECONDS,
+    ):
+        self.percentile = percentile
+        self.min_fee = min_fee
+        self.max_fee = max_fee
+        self.cache_seconds = cache_seconds
+        self._stats: Optional[dict] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _clamp(self, fee: int) -> int:
+        return max(self.min_fee, min(self.max_fee, fee))
+
+    def fee_stats(self) -> Optional[dict]:
+        with self._lock:
+            if self._stats is not None and time.monotonic() - self._fetched_at < self.cache_seconds:
+                return self._stats
+            try:
+                # Ücret, işlem hazırlığının parçası: hesap yükleme ile aynı öncelikte
+                self._stats = get_horizon_pool().read(lambda server: server.fee_stats().call(), priority="account")
+                self._fetched_at = time.monotonic()
+            except Exception as e:
+                # Bayat değer de olsa kullanılır; tekrar denemeyi bir sonraki cache süresine bırak
+                logger.warning(f"fee_stats alınamadı: {e}")
+                self._fetched_at = time.monotonic()
+            return self._stats
+
+    def _charged(self, percentile: str) -> Optional[int]:
+        stats = self.fee_stats()
+        if not stats:
+            return None
+        value = stats.get("fee_charged", {}).get(percentile)
+        return int(value) if value is not None else None
+
+    def base_fee(self) -> int:
+        """
+        Yeni işlemler için operation başına ücret (stroop).
+        """
+        charged = self._charged(self.percentile)
+        return self._clamp(charged if charged is not None else self.min_fee)
+
+    def bump_fee(self, previous_fee: int) -> int:
+        """
+        Ağa dahil edilmeyen işlemin fee-bump'ı için operation başına ücret.
+        Her zaman öncekinden büyüktür (FEE_MAX_STROOPS'a ulaşılmadıysa).
+        """
+        candidate = int(previous_fee * FEE_BUMP_MULTIPLIER)
+        surge = self._charged("p99")
+        if surge is not None:
+            candidate = max(candidate, surge)
+        return self._clamp(max(candidate, previous_fee + 1))
+
+
+@lru_cache(maxsize=None)
+def get_fee_oracle() -> FeeOracle:
+    return FeeOracle()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    oracle = get_fee_oracle()
+    stats = oracle.fee_stats() or {}
+    print("last_ledger:", stats.get("last_ledger"), "capacity:", stats.get("ledger_capacity_usage"))
+    print("fee_charged:", stats.get("fee_charged"))
+    print(f"base_fee ({oracle.percentile}):", oracle.base_fee())
@@ -0,0 +1,154 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlmodel import Session
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# Etkinse video durum yazımları tek bir writer thread'inde toplu commit edilir
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "0") == "1"
+# İlk yazım geldikten sonra aynı commit'e katılacak yazımlar için beklenen süre
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "2"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "256"))
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """
+    Tek yazıcı (single writer): eşzamanlı isteklerden gelen yazımları kısa bir pencere
+    boyunca toplar ve tek commit ile (SQLite'ta tek fsync) kalıcı hale getirir.
+
+    - submit(fn) çağıranı, fn(session)'ın yazdığı değişiklik commit edilene kadar bekletir.
+      Event loop'tan doğrudan çağrılmamalıdır (asyncio.to_thread ile çağrılır); aksi halde
+      loop beklerken diğer isteklerin yazımları aynı batch'e katılamaz.
+    - Dönen ORM nesneleri writer session'ından ayrılmış (detached) ve yüklü haldedir;
+      çağıran kendi session'ına `merge(obj, load=False)` ile ekleyebilir (ek SELECT yok).
+    - Batch içindeki bir yazım hata verirse batch geri alınır ve yazımlar tek tek
+      commit edilir; böylece hata sadece ilgili çağırana döner.
+    """
+
+    def __init__(self, engine, window_ms: float = GROUP_COMMIT_WINDOW_MS, max_batch: int = GROUP_COMMIT_MAX_BATCH):
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+        self.commits = 0
+        self.writes = 0
+
+    def submit(self, fn: Callable[[Session], Any]) -> Any:
+        """
+        fn(session) writer thread'inde çalışır; commit tamamlanınca sonucu döner
+        (ya da fn/commit hatasını fırlatır).
+        """
+        future: Future = Future()
+        self._queue.put((fn, future))
+        return future.result()
+
+    def stop(self) -> None:
+        """
+        Kuyruktaki yazımları commit edip thread'i durdurur.
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first) -> Tuple[List[Tuple[Callable, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch, stopping = [item], False
+            try:
+                batch, stopping = self._collect(item)
+                self._commit_batch(batch)
+            except Exception as e:
+                # Writer thread ölmez; bu batch'in yanıt almamış çağıranlarına hata döner
+                logger.exception(f"Group commit writer hatası ({len(batch)} yazım)")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stopping:
+                return
+
+    def _commit_batch(self, batch: List[Tuple[Callable, Future]]) -> None:
+        # expire_on_commit=False: commit sonrası nesneler yüklü kalır, refresh gerekmez
+        with Session(self.engine, expire_on_commit=False) as session:
+            try:
+                # Yazımlar arasında autoflush kapalı: tüm batch commit'te tek flush ile
+                # (UPDATE/INSERT'ler executemany olarak) yazılır
+                with session.no_autoflush:
+                    results = [fn(session) for fn, _ in batch]
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    return
+                logger.warning(f"Group commit başarısız ({len(batch)} yazım), tek tek deneniyor: {e}")
+                for item in batch:
+                    self._commit_batch([item])
+                return
+
+            session.expunge_all()
+
+        self.commits += 1
+        self.writes += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "commits": self.commits,
+            "writes": self.writes,
+            "queued": self._queue.qsize(),
+        }
+
+
+_writer: Optional[GroupCommitWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_group_writer(engine) -> GroupCommitWriter:
+    """
+    Writer thread ilk yazımda başlatılır.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = GroupCommitWriter(engine)
+        return _writer
+
+
+def stop_group_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.stop()
+            _writer = None
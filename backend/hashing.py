@@ -1,36 +1,66 @@
 import logging
+import os
 from fastapi import HTTPException
 import hashlib
 from sqlalchemy.orm import Session
-from stellar_utils import prepare_stellar_transaction
+from sqlalchemy.exc import IntegrityError
+from stellar_utils import prepare_stellar_transaction, prepare_stellar_transactions_batch
 from db import create_video_record
 import hashlib
-from typing import Union, BinaryIO
+from typing import Union, BinaryIO, Optional, Tuple, List, Dict
 from db import (
     create_video_record,
+    create_video_records,
     get_video_by_url,
-    get_video_by_data_hash
+    get_video_by_data_hash,
+    get_video_by_raw_hash,
+    get_videos_by_urls,
+    get_videos_by_data_hashes,
+    get_videos_by_raw_hashes
 )
 from add_video import validate_video
+from models import PrepareResponse
+from media_fetcher import get_media_fetcher, FetchError
+from cancellation import check_cancelled
+from horizon_budget import HorizonBudgetExceeded
 
 
 logger = logging.getLogger(__name__)
 
+# Toplu yüklemede bir istek içinde aynı anda çalışan validate_video sayısı; her biri
+# ayrıca video_jobs kabul slotu alır
+BATCH_HASH_WORKERS = int(os.getenv("BATCH_HASH_WORKERS", "2"))
 
-def generate_hash_from_video_url(video_url: str, session: any):
+
+def existing_video_response(existing_video, message: str = "Bu video URL'si zaten kayıtlı.") -> PrepareResponse:
+    return PrepareResponse(
+        message=message,
+        video_id=existing_video.id,
+        video_url=existing_video.video_url,
+        status=existing_video.status,
+        data_hash=existing_video.data_hash,
+        prepared_tx_hash=existing_video.prepared_tx_hash,
+        already_registered=True
+    )
+
+
+def generate_hash_from_video_url(video_url: str, session: any, hash_content: bool = False):
     # Check if video URL already exists (app-level check as requested)
     existing_video = get_video_by_url(session, video_url)
     if existing_video:
         logger.info(f"Video URL already exists: {video_url}")
-        return {
-            "message": "Bu video URL'si zaten kayıtlı.",
-            "video_id": existing_video.id,
-            "video_url": existing_video.video_url,
-            "status": existing_video.status,
-            "data_hash": existing_video.data_hash,
-            "prepared_tx_hash": existing_video.prepared_tx_hash,
-            "already_registered": True
-        }
+        return existing_video_response(existing_video)
+
+    # İçerik modu: uzak video akış halinde indirilip dosya yüklemeyle aynı
+    # validate_video hattından geçer; memo URL metnini değil videonun kendisini kanıtlar.
+    if hash_content:
+        try:
+            with get_media_fetcher().fetch_to_file(video_url) as video_path:
+                return generate_hash_from_video_file(video_path, session)
+        except FetchError as e:
+            logger.error(f"Uzak video alınamadı: {e}")
+            raise HTTPException(e.status_code, str(e))
+
     try:
         data_hash = hashlib.sha256(video_url.encode("utf-8")).hexdigest()
         logger.info(f"Data hash üretildi: {data_hash}")
@@ -41,11 +71,93 @@ def generate_hash_from_video_url(video_url: str, session: any):
         raise HTTPException(500, f"Hash oluşturulamadı: {e}")
 
 
-def generate_hash_from_video_file(video_file_data: Union[str, BinaryIO], session: any):
+def generate_hashes_from_video_urls(video_urls: List[str], session: any) -> List[Union[str, PrepareResponse]]:
+    """
+    generate_hash_from_video_url'in toplu hali: kayıtlı URL'ler tek bir IN sorgusuyla bulunur.
+    Döner: video_urls sırasıyla data_hash (str) ya da mevcut kayıt yanıtı (PrepareResponse)
+    """
+    existing_by_url = {video.video_url: video for video in get_videos_by_urls(session, video_urls)}
+    return [
+        existing_video_response(existing_by_url[video_url])
+        if video_url in existing_by_url
+        else hashlib.sha256(video_url.encode("utf-8")).hexdigest()
+        for video_url in video_urls
+    ]
+
+
+def hash_raw_video(video_file_data: Union[str, bytes, BinaryIO]) -> str:
+    """
+    Yüklenen dosyanın işlenmemiş byte'larının SHA-256'sı. Stream verilirse başa sarılır.
+    """
+    if isinstance(video_file_data, bytes):
+        return hashlib.sha256(video_file_data).hexdigest()
+
+    sha256_hash = hashlib.sha256()
+    if isinstance(video_file_data, str):
+        with open(video_file_data, "rb") as f:
+            for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256_hash.update(byte_block)
+    else:
+        video_file_data.seek(0)
+        for byte_block in iter(lambda: video_file_data.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+        video_file_data.seek(0)
+    return sha256_hash.hexdigest()
+
+
+def lookup_video_by_raw_hash(
+    video_file_data: Union[str, bytes, BinaryIO],
+    session: any
+) -> Tuple[str, Optional[PrepareResponse]]:
+    """
+    Ham dosya hash'ini üretir ve raw_hash index'inde arar. moviepy açılmaz.
+    Döner: (raw_hash, kayıt varsa mevcut kayıt yanıtı / yoksa None)
+    """
+    raw_hash = hash_raw_video(video_file_data)
+    return raw_hash, find_video_by_raw_hash(session, raw_hash)
+
+
+def find_video_by_raw_hash(session: any, raw_hash: str) -> Optional[PrepareResponse]:
+    existing_video = get_video_by_raw_hash(session, raw_hash)
+    if existing_video:
+        logger.info(f"Video raw hash already exists: {raw_hash}")
+        return existing_video_response(existing_video)
+    return None
+
+
+def as_existing_response(result: PrepareResponse) -> PrepareResponse:
+    """
+    Single-flight'ta başka bir isteğin oluşturduğu kaydı, o isteğin imza envelope'u
+    olmadan mevcut kayıt yanıtına çevirir.
+    """
+    if result.already_registered:
+        return result
+    return PrepareResponse(
+        message="Bu video URL'si zaten kayıtlı.",
+        video_id=result.video_id,
+        video_url=result.video_url,
+        status="prepared",
+        data_hash=result.data_hash,
+        prepared_tx_hash=result.prepared_tx_hash,
+        already_registered=True
+    )
+
+
+def generate_hash_from_video_file(video_file_data: Union[str, BinaryIO], session: any, raw_hash: Optional[str] = None):
+    # Önce ham byte'ların hash'i ile index'e bak; aynı dosya daha önce kaydedildiyse
+    # validate_video (moviepy kırpma + yeniden encode) hiç çalıştırılmaz.
+    # raw_hash verilmişse çağıran bu kontrolü zaten yapmıştır.
+    if raw_hash is None:
+        raw_hash, existing = lookup_video_by_raw_hash(video_file_data, session)
+        if existing:
+            return existing
+
     # add_video içerisindeki validate_video metodunu kullanarak hash dönüşümü yap
     
     # Video dosyasını validate_video'ya ver ve hash dönüşümü yap
     validation_result = validate_video(video_file_data)
+    # İstek iptal edildiyse ffmpeg öldürülmüştür; kırpma hatası yerine iptal raporlanır
+    check_cancelled()
     
     if not validation_result[0]:
         logger.error(f"Video validation failed: {validation_result[1].get('error', 'Unknown error')}")
@@ -59,28 +171,71 @@ def generate_hash_from_video_file(video_file_data: Union[str, BinaryIO], session
     existing_video = get_video_by_data_hash(session, data_hash)
     if existing_video:
         logger.info(f"Video Hash already exists: {data_hash}")
-        return {
-            "message": "Bu video URL'si zaten kayıtlı.",
-            "video_id": existing_video.id,
-            "video_url": existing_video.video_url,
-            "status": existing_video.status,
-            "data_hash": existing_video.data_hash,
-            "prepared_tx_hash": existing_video.prepared_tx_hash,
-            "already_registered": True
-        }
+        return existing_video_response(existing_video)
     
     return data_hash
 
+
+def validate_video_hash(video_file_data: BinaryIO) -> str:
+    """
+    Toplu yüklemede tek dosya için validate_video; data_hash döner. Mevcut kayıt kontrolü
+    çağıranda tek IN sorgusuyla yapılır (resolve_batch_hashes).
+    """
+    is_valid, result = validate_video(video_file_data)
+    # İstek iptal edildiyse ffmpeg öldürülmüştür; kırpma hatası yerine iptal raporlanır
+    check_cancelled()
+    if not is_valid:
+        raise HTTPException(400, f"Video validation failed: {result.get('error', 'Unknown error')}")
+    return result["hash"]
+
+
+def find_videos_by_raw_hashes(session: any, raw_hashes: List[str]) -> Dict[str, PrepareResponse]:
+    """
+    Toplu yükleme: ham hash'leri tek IN sorgusuyla raw_hash index'inde arar.
+    Eşleşenler moviepy'ye hiç girmez. Döner: raw_hash → mevcut kayıt yanıtı
+    """
+    return {
+        video.raw_hash: existing_video_response(video)
+        for video in get_videos_by_raw_hashes(session, raw_hashes)
+    }
+
+
+def resolve_batch_hashes(
+    session: any,
+    raw_hashes: List[str],
+    existing_by_raw: Dict[str, PrepareResponse],
+    data_hashes: Dict[int, str]
+) -> List[Tuple[Union[str, PrepareResponse], str]]:
+    """
+    Toplu yüklemede üretilen data_hash'leri tek IN sorgusuyla kontrol eder.
+    data_hashes: raw_hash index'inde bulunamayan dosyaların sırası → data_hash
+    Döner: girdi sırasıyla (data_hash ya da mevcut kayıt yanıtı, raw_hash)
+    """
+    existing_by_data = {
+        video.data_hash: video
+        for video in get_videos_by_data_hashes(session, list(set(data_hashes.values())))
+    }
+
+    results: List[Tuple[Union[str, PrepareResponse], str]] = []
+    for i, raw_hash in enumerate(raw_hashes):
+        if raw_hash in existing_by_raw:
+            results.append((existing_by_raw[raw_hash], raw_hash))
+        elif data_hashes[i] in existing_by_data:
+            results.append((existing_video_response(existing_by_data[data_hashes[i]]), raw_hash))
+        else:
+            results.append((data_hashes[i], raw_hash))
+    return results
+
     
-def process_video_preparation(session: Session, data_hash: Union[str, dict], video_identifier: str, reporter):
+def process_video_preparation(session: Session, data_hash: Union[str, PrepareResponse], video_identifier: str, reporter, raw_hash: Optional[str] = None):
     logger.info(f"process_video_preparation - session type: {type(session)}")
     logger.info(f"process_video_preparation - reporter type: {type(reporter)}")
     logger.info(f"process_video_preparation - video_identifier type: {type(video_identifier)}")
     logger.info(f"process_video_preparation - data_hash type: {type(data_hash)}")
 
     # Check if this is a duplicate video registration response
-    if isinstance(data_hash, dict):
-        logger.info(f"Video already registered: {data_hash.get('message', 'Duplicate detected')}")
+    if isinstance(data_hash, PrepareResponse):
+        logger.info(f"Video already registered: {data_hash.message}")
         return data_hash
 
     # data_hash is a string - proceed with transaction preparation
@@ -93,34 +248,135 @@ def process_video_preparation(session: Session, data_hash: Union[str, dict], vid
             )
             logger.info(f"Stellar işlem hazır: {prepared_tx_hash}")
             
+        except HorizonBudgetExceeded:
+            # 500 değil 503 + Retry-After (app.py handler'ı)
+            raise
         except Exception as e:
             logger.error(f"Stellar işlem hazırlığı başarısız: {e}", exc_info=True)
             raise HTTPException(500, f"Stellar işlem hazırlığı başarısız: {e}")
         
         
-        # Save to database
-        video = create_video_record(
-            session,
-            reporter_id=reporter.id,
-            video_url=video_identifier,
-            platform="unknown",
-            data_hash=data_hash,
-            prepared_tx_hash=prepared_tx_hash,
-            tx_hash=None,
-            reporter_wallet=reporter.wallet_address
-        )
+        # Save to database; iptal edilen istek için kayıt oluşturulmaz (envelope gönderilmeden kalır)
+        check_cancelled()
+        try:
+            video = create_video_record(
+                session,
+                reporter_id=reporter.id,
+                video_url=video_identifier,
+                platform="unknown",
+                data_hash=data_hash,
+                prepared_tx_hash=prepared_tx_hash,
+                tx_hash=None,
+                reporter_wallet=reporter.wallet_address,
+                raw_hash=raw_hash,
+                refresh=False
+            )
+        except IntegrityError:
+            # Aynı video_url başka bir süreçte/istekte araya girip kaydedildi; hazırlanan
+            # envelope gönderilmeden bırakılır ve mevcut kayıt döndürülür
+            session.rollback()
+            existing_video = get_video_by_url(session, video_identifier)
+            if existing_video is None:
+                raise
+            logger.info(f"Eşzamanlı kayıt, mevcut kayıt döndürülüyor: {video_identifier}")
+            return existing_video_response(existing_video)
         logger.info(f"Video kaydedildi: {video.id}")
 
-        return {
-            "message": "İşlem imzaya hazır.",
-            "video_id": video.id,
-            "video_url": video.video_url,
-            "data_hash": video.data_hash,
-            "xdr_for_signing": xdr_base64,
-            "prepared_tx_hash": prepared_tx_hash,
-            "already_registered": False
-        }
+        return PrepareResponse(
+            message="İşlem imzaya hazır.",
+            video_id=video.id,
+            video_url=video.video_url,
+            data_hash=video.data_hash,
+            xdr_for_signing=xdr_base64,
+            prepared_tx_hash=prepared_tx_hash,
+            already_registered=False
+        )
         
     except Exception as e:
         logger.error(f"Video işleme hatası: {e}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
+
+
+def process_video_batch_preparation(
+    session: Session,
+    items: List[Tuple[Union[str, PrepareResponse], str, Optional[str]]],
+    reporter,
+    service_account=None
+) -> List[PrepareResponse]:
+    """
+    Aynı muhabirin birden fazla videosu için process_video_preparation'ın toplu hali.
+    items: (data_hash ya da mevcut kayıt yanıtı, video_identifier, raw_hash)
+
+    Tek load_account ile ardışık sequence numaralı envelope'lar hazırlanır ve tüm Video
+    satırları tek commit ile yazılır. Aynı istek içinde tekrar eden hash/identifier'lar
+    ilk örneğe bağlanır. service_account verilirse yeniden yüklenmez, sequence'ı sürdürülür.
+    Döner: items sırasıyla yanıt listesi.
+    """
+    results: List[Optional[PrepareResponse]] = [None] * len(items)
+    pending: List[int] = []
+    seen_hashes = set()
+    seen_identifiers = set()
+
+    for i, (data_hash, video_identifier, _) in enumerate(items):
+        if isinstance(data_hash, PrepareResponse):
+            results[i] = data_hash
+        elif data_hash in seen_hashes or video_identifier in seen_identifiers:
+            results[i] = PrepareResponse(
+                message="Bu video aynı istekte birden fazla kez gönderildi.",
+                video_url=video_identifier,
+                data_hash=data_hash,
+                already_registered=True
+            )
+        else:
+            seen_hashes.add(data_hash)
+            seen_identifiers.add(video_identifier)
+            pending.append(i)
+
+    if not pending:
+        return results
+
+    try:
+        prepared = prepare_stellar_transactions_batch(
+            reporter_public_key=reporter.wallet_address,
+            data_hashes=[items[i][0] for i in pending],
+            account=service_account
+        )
+        logger.info(f"Stellar toplu işlem hazır: {len(prepared)} envelope")
+    except HorizonBudgetExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Stellar toplu işlem hazırlığı başarısız: {e}", exc_info=True)
+        raise HTTPException(500, f"Stellar işlem hazırlığı başarısız: {e}")
+
+    try:
+        videos = create_video_records(session, [
+            {
+                "reporter_id": reporter.id,
+                "video_url": items[i][1],
+                "platform": "unknown",
+                "data_hash": items[i][0],
+                "raw_hash": items[i][2],
+                "prepared_tx_hash": prepared_tx_hash,
+                "tx_hash": None,
+                "reporter_wallet": reporter.wallet_address
+            }
+            for i, (_, prepared_tx_hash) in zip(pending, prepared)
+        ])
+    except IntegrityError:
+        # Envelope'lar ardışık sequence taşır; tek bir çakışmada tüm batch yeniden
+        # hazırlanmalıdır. Tekrar denendiğinde çakışan video mevcut kayıt olarak döner.
+        session.rollback()
+        raise HTTPException(409, "Videolardan biri eşzamanlı olarak kaydedildi, isteği tekrarlayın.")
+    logger.info(f"{len(videos)} video tek commit ile kaydedildi")
+
+    for i, video, (xdr_base64, prepared_tx_hash) in zip(pending, videos, prepared):
+        results[i] = PrepareResponse(
+            message="İşlem imzaya hazır.",
+            video_id=video.id,
+            video_url=video.video_url,
+            data_hash=video.data_hash,
+            xdr_for_signing=xdr_base64,
+            prepared_tx_hash=prepared_tx_hash,
+            already_registered=False
+        )
+    return results
@@ -0,0 +1,188 @@
+import os
+import math
+import time
+import logging
+import threading
+from typing import Dict, Mapping, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+HORIZON_BUDGET_ENABLED = os.getenv("HORIZON_BUDGET_ENABLED", "1") == "1"
+# Horizon'ın IP başına istek sınırı (varsayılan: saatte 3600). Yanıtlardaki X-Ratelimit-*
+# başlıkları geldikçe kova bunlara göre güncellenir; bu değerler yalnızca başlangıç içindir.
+HORIZON_RATE_LIMIT = int(os.getenv("HORIZON_RATE_LIMIT", "3600"))
+HORIZON_RATE_WINDOW_SECONDS = float(os.getenv("HORIZON_RATE_WINDOW_SECONDS", "3600"))
+
+# Öncelik sınıfları, yüksekten düşüğe. Her sınıf kovada kapasitenin en az bu oranı
+# kalacaksa istek gönderebilir; bütçe azaldıkça önce background, sonra lookup kesilir.
+# submit tüm bütçeyi kullanabilir.
+PRIORITIES = ("submit", "account", "lookup", "background")
+PRIORITY_RESERVES = {
+    "submit": 0.0,
+    "account": float(os.getenv("HORIZON_RESERVE_ACCOUNT", "0.05")),
+    "lookup": float(os.getenv("HORIZON_RESERVE_LOOKUP", "0.2")),
+    "background": float(os.getenv("HORIZON_RESERVE_BACKGROUND", "0.5")),
+}
+# Sınıfın token beklemeye razı olduğu en uzun süre; bu sürede token açılmayacaksa istek
+# hiç beklemeden reddedilir (HorizonBudgetExceeded). Bekleme çağıran thread'i tutar.
+PRIORITY_MAX_WAIT_SECONDS = {
+    "submit": float(os.getenv("HORIZON_SUBMIT_MAX_WAIT_SECONDS", "20")),
+    "account": float(os.getenv("HORIZON_ACCOUNT_MAX_WAIT_SECONDS", "5")),
+    "lookup": float(os.getenv("HORIZON_LOOKUP_MAX_WAIT_SECONDS", "0.5")),
+    "background": 0.0,
+}
+
+
+class HorizonBudgetExceeded(Exception):
+    """
+    İstek, öncelik sınıfı için ayrılan Horizon bütçesi dışında kaldı ve gönderilmedi.
+    Endpoint'ler bunu 503 + Retry-After'a çevirir.
+    maybe_submitted: submit failover'ında daha önceki bir deneme gönderilmiş ve sonucu
+    bilinmiyor (zaman aşımı); işlem ağa ulaşmış olabilir.
+    """
+    def __init__(self, priority: str, retry_after: int, maybe_submitted: bool = False):
+        super().__init__(f"Horizon istek bütçesi tükendi ({priority})")
+        self.priority = priority
+        self.retry_after = retry_after
+        self.maybe_submitted = maybe_submitted
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class HorizonBudget:
+    """
+    Tek bir Horizon endpoint'i için token bucket. Her gönderilen istek bir token harcar;
+    kova HORIZON_RATE_LIMIT / HORIZON_RATE_WINDOW_SECONDS hızıyla dolar.
+
+    - Horizon yanıtlarındaki X-Ratelimit-Limit / -Remaining / -Reset başlıkları kovayı
+      sunucunun sayacına eşitler (aynı IP'yi paylaşan diğer worker'ların harcaması da
+      böylece görünür). 429 yanıtında Retry-After (ya da Reset) süresince istek gönderilmez.
+    - Daha yüksek öncelikli bir istek token beklerken düşük öncelikli istekler token alamaz.
+    - acquire() thread-safe'tir; worker thread'lerinden çağrılır.
+    """
+
+    def __init__(self, name: str, limit: int = HORIZON_RATE_LIMIT, window: float = HORIZON_RATE_WINDOW_SECONDS):
+        self.name = name
+        self.window = window
+        self.capacity = float(limit)
+        self.rate = limit / window
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._waiting = [0] * len(PRIORITIES)
+        self._cond = threading.Condition()
+        self.granted: Dict[str, int] = dict.fromkeys(PRIORITIES, 0)
+        self.shed: Dict[str, int] = dict.fromkeys(PRIORITIES, 0)
+        self.rate_limited = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, rank: int) -> float:
+        return PRIORITY_RESERVES[PRIORITIES[rank]] * self.capacity
+
+    def _wait_seconds(self, rank: int, now: float) -> float:
+        # Bu sınıf için bir token açılana kadar geçecek tahmini süre
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        deficit = self._reserve(rank) + 1 - self.tokens
+        return max(deficit / self.rate, 0.0) if self.rate > 0 else math.inf
+
+    def _can_take(self, rank: int, now: float) -> bool:
+        if now < self.blocked_until or any(self._waiting[:rank]):
+            return False
+        return self.tokens - 1 >= self._reserve(rank)
+
+    def acquire(self, priority: str, max_wait: Optional[float] = None) -> None:
+        """
+        Sınıfın bütçesinden bir token alır; gerekirse max_wait'e kadar bekler.
+        Token bu sürede açılmayacaksa beklemeden HorizonBudgetExceeded fırlatır.
+        """
+        if not HORIZON_BUDGET_ENABLED:
+            return
+        rank = PRIORITIES.index(priority)
+        max_wait = PRIORITY_MAX_WAIT_SECONDS[priority] if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        waiting = False
+        with self._cond:
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._can_take(rank, now):
+                        self.tokens -= 1
+                        self.granted[priority] += 1
+                        return
+
+                    wait = self._wait_seconds(rank, now)
+                    if now + wait > deadline and not (waiting and now < deadline):
+                        self.shed[priority] += 1
+                        logger.info(f"Horizon bütçesi ({self.name}): {priority} isteği reddedildi, {self.tokens:.0f} token kaldı")
+                        raise HorizonBudgetExceeded(priority, max(1, math.ceil(wait)) if wait != math.inf else 60)
+                    if not waiting:
+                        self._waiting[rank] += 1
+                        waiting = True
+                    # Üst sınıf bekleyenler token aldığında notify ile uyanılır
+                    self._cond.wait(max(min(wait, deadline - now), 0.01))
+            finally:
+                if waiting:
+                    self._waiting[rank] -= 1
+                    self._cond.notify_all()
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """
+        Horizon yanıtının rate limit başlıklarını kovaya uygular.
+        """
+        limit = _header(headers, "X-Ratelimit-Limit")
+        remaining = _header(headers, "X-Ratelimit-Remaining")
+        reset = _header(headers, "X-Ratelimit-Reset")
+        if limit is None and remaining is None and status_code != 429:
+            return
+
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if limit:
+                self.capacity = limit
+            if limit or remaining is not None:
+                self.rate = self.capacity / self.window
+            if remaining is not None:
+                self.tokens = min(remaining, self.capacity)
+                # Sayaç reset anında tamamen dolar; boşalan kısım o süre içinde geri gelir
+                if reset and remaining < self.capacity:
+                    self.rate = max(self.capacity / self.window, (self.capacity - remaining) / reset)
+            if status_code == 429:
+                self.rate_limited += 1
+                self.tokens = 0.0
+                retry_after = _header(headers, "Retry-After") or reset or 1.0
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+                logger.warning(f"Horizon rate limit aşıldı ({self.name}); {retry_after:.0f} sn istek gönderilmeyecek")
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "tokens": round(self.tokens, 1),
+                "capacity": self.capacity,
+                "rate_per_second": round(self.rate, 3),
+                "blocked_seconds": round(max(self.blocked_until - time.monotonic(), 0.0), 1),
+                "waiting": dict(zip(PRIORITIES, self._waiting)),
+                "granted": dict(self.granted),
+                "shed": dict(self.shed),
+                "rate_limited": self.rate_limited,
+            }
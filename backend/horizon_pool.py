@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, TYPE_CHECKING
+
+from dotenv import load_dotenv
+
+from horizon_budget import HorizonBudget, HorizonBudgetExceeded
+
+if TYPE_CHECKING:
+    from stellar_sdk import Server, TransactionEnvelope
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+DEFAULT_HORIZON_URL = "https://horizon-testnet.stellar.org"
+# Virgülle ayrılmış Horizon listesi; sıralama ilk tercih sırasıdır
+HORIZON_URLS = [
+    url.strip()
+    for url in os.getenv("HORIZON_URLS", os.getenv("HORIZON_URL", DEFAULT_HORIZON_URL)).split(",")
+    if url.strip()
+]
+# Okumalarda ikinci endpoint'e hedge isteği gönderilmeden önce beklenen süre
+HORIZON_HEDGE_DELAY_SECONDS = float(os.getenv("HORIZON_HEDGE_DELAY_SECONDS", "0.5"))
+HORIZON_REQUEST_TIMEOUT_SECONDS = int(os.getenv("HORIZON_REQUEST_TIMEOUT_SECONDS", "11"))
+HORIZON_SUBMIT_TIMEOUT_SECONDS = float(os.getenv("HORIZON_SUBMIT_TIMEOUT_SECONDS", "33"))
+# Art arda bu kadar hata alan endpoint devreden çıkarılır (circuit open)
+HORIZON_BREAKER_THRESHOLD = int(os.getenv("HORIZON_BREAKER_THRESHOLD", "3"))
+# Açık devre bu süre sonra tek bir deneme isteğine izin verir (half-open)
+HORIZON_BREAKER_COOLDOWN_SECONDS = float(os.getenv("HORIZON_BREAKER_COOLDOWN_SECONDS", "30"))
+# Gecikme ortalamasının (EWMA) yeni ölçüme verdiği ağırlık
+HORIZON_LATENCY_ALPHA = 0.3
+
+
+class SubmitOutcomeUnknown(Exception):
+    """
+    Gönderim zaman aşımına uğradı (bağlantı koptu / 504) ve işlemin ağa ulaşıp ulaşmadığı
+    doğrulanamadı. İşlem sonradan ledger'a dahil olabilir; çağıran kaydı başarısız saymamalıdır.
+    """
+    def __init__(self, tx_hash: str):
+        super().__init__(f"İşlemin sonucu bilinmiyor: {tx_hash}")
+        self.tx_hash = tx_hash
+
+
+def _is_endpoint_failure(error: Exception) -> bool:
+    """
+    Endpoint'in sağlığına yazılan hatalar: bağlantı/timeout, 5xx ve rate limit (429).
+    404 ve diğer 4xx yanıtlar geçerli cevaptır; başka endpoint'te tekrar denenmez.
+    """
+    from stellar_sdk.exceptions import ConnectionError, BadResponseError, BadRequestError, UnknownRequestError
+
+    if isinstance(error, (ConnectionError, BadResponseError, UnknownRequestError)):
+        return True
+    if isinstance(error, BadRequestError):
+        return error.status == 429
+    return False
+
+
+def _rate_limit_error(error: Exception, priority: str) -> Exception:
+    """
+    Tüm endpoint'ler 429 döndüyse çağırana Horizon hatası yerine HorizonBudgetExceeded
+    (Retry-After ile) iletilir; diğer hatalar olduğu gibi döner.
+    """
+    from stellar_sdk.exceptions import BadRequestError
+
+    if not isinstance(error, BadRequestError) or error.status != 429:
+        return error
+    try:
+        retry_after = int(float(error.args[0].headers.get("Retry-After", 1)))
+    except (AttributeError, IndexError, TypeError, ValueError):
+        retry_after = 1
+    budget_error = HorizonBudgetExceeded(priority, max(retry_after, 1))
+    budget_error.__cause__ = error
+    return budget_error
+
+
+def _is_timeout(error: Exception) -> bool:
+    """
+    Submit sırasında sonucu bilinmeyen hatalar (bağlantı koptu / Horizon 504):
+    işlem ağa ulaşmış olabilir, tekrar göndermeden önce hash sorgulanmalıdır.
+    """
+    from stellar_sdk.exceptions import ConnectionError, BadResponseError
+
+    if isinstance(error, ConnectionError):
+        return True
+    return isinstance(error, BadResponseError) and error.status == 504
+
+
+def _budgeted_client(budget: HorizonBudget, **kwargs):
+    """
+    Her yanıtın rate limit başlıklarını (429 dahil) endpoint'in bütçesine ileten istemci.
+    """
+    from stellar_sdk.client.requests_client import RequestsClient
+
+    class BudgetedRequestsClient(RequestsClient):
+        def get(self, url, params=None):
+            response = super().get(url, params)
+            budget.observe(response.status_code, response.headers)
+            return response
+
+        def post(self, url, data=None):
+            response = super().post(url, data)
+            budget.observe(response.status_code, response.headers)
+            return response
+
+    return BudgetedRequestsClient(**kwargs)
+
+
+class HorizonEndpoint:
+    """
+    Tek bir Horizon adresi: istemci, gecikme ortalaması, circuit breaker durumu ve
+    istek bütçesi (horizon_budget).
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.budget = HorizonBudget(url)
+        self.latency = 0.0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self._server: Optional[Server] = None
+
+    @property
+    def server(self) -> Server:
+        if self._server is None:
+            from stellar_sdk import Server
+
+            # Tekrar denemeyi havuz yapar (başka endpoint'e geçerek); istemci kendi içinde denemez
+            client = _budgeted_client(
+                self.budget,
+                num_retries=0,
+                request_timeout=HORIZON_REQUEST_TIMEOUT_SECONDS,
+                post_timeout=HORIZON_SUBMIT_TIMEOUT_SECONDS,
+            )
+            self._server = Server(self.url, client=client)
+        return self._server
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= HORIZON_BREAKER_COOLDOWN_SECONDS:
+            return "half_open"
+        return "open"
+
+    def try_acquire(self) -> bool:
+        """
+        İstek gönderilebilir mi? Half-open durumda aynı anda yalnızca bir deneme isteği geçer.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        # Deneme hakkı alındı ama istek gönderilmedi (ör. bütçe yetmedi)
+        with self._lock:
+            self._probing = False
+
+    def score(self) -> float:
+        # Düşük skor daha iyi: gecikme ortalaması + son hatalar için ceza
+        return self.latency + self.consecutive_failures * HORIZON_REQUEST_TIMEOUT_SECONDS
+
+    def record_success(self, elapsed: float) -> None:
+        with self._lock:
+            self.latency = elapsed if self.latency == 0.0 else (
+                HORIZON_LATENCY_ALPHA * elapsed + (1 - HORIZON_LATENCY_ALPHA) * self.latency
+            )
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self, elapsed: float) -> None:
+        with self._lock:
+            self.latency = HORIZON_LATENCY_ALPHA * elapsed + (1 - HORIZON_LATENCY_ALPHA) * self.latency
+            self.consecutive_failures += 1
+            self._probing = False
+            if self.consecutive_failures >= HORIZON_BREAKER_THRESHOLD or self.opened_at is not None:
+                if self.opened_at is None:
+                    logger.warning(f"Horizon devre dışı bırakıldı: {self.url}")
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "latency_ms": round(self.latency * 1000, 1),
+            "consecutive_failures": self.consecutive_failures,
+            "budget": self.budget.stats(),
+        }
+
+
+class HorizonPool:
+    """
+    Birden fazla Horizon endpoint'i arasında sağlık skoruna göre seçim yapar.
+
+    - read(): idempotent okumalar. En iyi endpoint'e gönderilir; `hedge_delay` içinde cevap
+      gelmezse sıradaki endpoint'e ikinci bir istek gider ve ilk gelen başarılı cevap kazanır.
+    - submit(): işlem gönderimi hedge edilmez. Sonucu belirsiz hatalarda (bağlantı kopması,
+      504) bir sonraki endpoint'e geçmeden önce tx hash'i sorgulanır; işlem ağa ulaşmışsa
+      tekrar gönderilmez.
+
+    Her istek, gönderildiği endpoint'in bütçesinden çağıranın öncelik sınıfıyla (submit >
+    account > lookup > background) token alır. Bütçesi yetmeyen endpoint atlanır; hedge
+    isteği ancak bütçe varsa gönderilir. Hiçbir endpoint'te bütçe yoksa HorizonBudgetExceeded.
+    """
+
+    def __init__(self, urls: List[str], hedge_delay: float = HORIZON_HEDGE_DELAY_SECONDS):
+        if not urls:
+            raise ValueError("En az bir Horizon URL'si gerekli")
+        self.endpoints = [HorizonEndpoint(url) for url in urls]
+        self.hedge_delay = hedge_delay
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(urls)), thread_name_prefix="horizon")
+
+    def _candidates(self) -> List[HorizonEndpoint]:
+        # Sıralama kararlıdır: eşit skorda yapılandırma sırası korunur
+        ranked = sorted(self.endpoints, key=lambda endpoint: endpoint.score())
+        available = [endpoint for endpoint in ranked if endpoint.state != "open"]
+        # Hepsi açık devredeyse en iyi skorlu endpoint yine de denenir
+        return available or ranked[:1]
+
+    @staticmethod
+    def _next(candidates: List[HorizonEndpoint], priority: str) -> HorizonEndpoint:
+        """
+        Sıradaki endpoint'i seçip bütçesinden token alır; bütçesi olmayan endpoint atlanır.
+        Half-open endpoint'ler için deneme hakkı ancak istek gerçekten gönderilirken alınır.
+        """
+        last_error: Optional[HorizonBudgetExceeded] = None
+        while candidates:
+            endpoint = candidates.pop(0)
+            probing = endpoint.try_acquire()
+            if not probing and candidates:
+                continue
+            try:
+                endpoint.budget.acquire(priority)
+                return endpoint
+            except HorizonBudgetExceeded as e:
+                if probing:
+                    endpoint.release_probe()
+                last_error = e
+        raise last_error
+
+    def best(self) -> HorizonEndpoint:
+        return min(self.endpoints, key=lambda endpoint: endpoint.score())
+
+    def _call(self, endpoint: HorizonEndpoint, fn: Callable[[Server], Any], priority: Optional[str] = None) -> Any:
+        """
+        priority verilirse önce endpoint'in bütçesinden token alınır; verilmezse çağıran almıştır.
+        """
+        if priority is not None:
+            endpoint.budget.acquire(priority)
+        start = time.monotonic()
+        try:
+            result = fn(endpoint.server)
+        except Exception as e:
+            if _is_endpoint_failure(e):
+                endpoint.record_failure(time.monotonic() - start)
+            else:
+                endpoint.record_success(time.monotonic() - start)
+            raise
+        endpoint.record_success(time.monotonic() - start)
+        return result
+
+    def read(self, fn: Callable[[Server], Any], priority: str = "lookup") -> Any:
+        """
+        fn(server) çağrısını hedge ederek çalıştırır. Endpoint hatası olmayan istisnalar
+        (örn. NotFoundError) geçerli cevap sayılır ve çağırana iletilir.
+        Token'lar çağıran thread'de alınır; bütçe beklemesi executor thread'lerini tutmaz.
+        """
+        candidates = self._candidates()
+        pending = {}
+        last_error: Optional[Exception] = None
+
+        def launch() -> bool:
+            nonlocal last_error
+            try:
+                endpoint = self._next(candidates, priority)
+            except HorizonBudgetExceeded as e:
+                last_error = e
+                return False
+            pending[self._executor.submit(self._call, endpoint, fn)] = endpoint
+            return True
+
+        if not launch():
+            raise last_error
+        while pending:
+            # Sırada endpoint varsa hedge süresi kadar, yoksa ilk cevaba kadar beklenir
+            timeout = self.hedge_delay if candidates else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                logger.info(f"Horizon hedge isteği: {pending[next(iter(pending))].url} yavaş")
+                launch()
+                continue
+
+            for future in done:
+                pending.pop(future)
+                error = future.exception()
+                if error is None or not _is_endpoint_failure(error):
+                    # Kaybeden istek arka planda tamamlanır; sonucu sadece sağlık skoruna yazılır
+                    return future.result()
+                last_error = error
+
+            if candidates:
+                launch()
+
+        raise _rate_limit_error(last_error, priority)
+
+    def submit(self, envelope: TransactionEnvelope, asynchronous: bool = False, priority: str = "submit") -> dict:
+        """
+        İmzalı envelope'ı sırayla endpoint'lere gönderir (failover). Her yeni denemeden
+        önce tx hash'i sorgulanır; önceki deneme ağa ulaşmışsa onun kaydı döner.
+        asynchronous=True ise /transactions_async kullanılır: Horizon ledger'a dahil olmayı
+        beklemeden tx_status (PENDING, DUPLICATE...) döner.
+        """
+        from stellar_sdk.exceptions import NotFoundError
+
+        tx_hash = envelope.hash_hex()
+        candidates = self._candidates()
+        last_error: Optional[Exception] = None
+        outcome_unknown = False
+
+        def send(server):
+            if asynchronous:
+                return server.submit_transaction_async(envelope)
+            return server.submit_transaction(envelope)
+
+        try:
+            while candidates:
+                endpoint = self._next(candidates, priority)
+                if outcome_unknown:
+                    try:
+                        # Hash sorgusu _next'in aldığı token'ı kullanır
+                        existing = self._call(endpoint, lambda server: server.transactions().transaction(tx_hash).call())
+                        logger.info(f"İşlem önceki denemede ağa ulaşmış, tekrar gönderilmedi: {tx_hash}")
+                        return existing
+                    except NotFoundError:
+                        pass
+                    except Exception as e:
+                        if not _is_endpoint_failure(e):
+                            raise
+                        last_error = e
+                        continue
+
+                try:
+                    # Hash sorgusundan sonraki gönderim ayrı bir istektir ve kendi token'ını alır
+                    return self._call(endpoint, send, priority if outcome_unknown else None)
+                except Exception as e:
+                    if not _is_endpoint_failure(e):
+                        raise
+                    last_error = e
+                    outcome_unknown = outcome_unknown or _is_timeout(e)
+                    logger.warning(f"Horizon submit başarısız ({endpoint.url}): {e}; sonraki endpoint deneniyor")
+
+            error = _rate_limit_error(last_error, priority)
+            if outcome_unknown and not isinstance(error, HorizonBudgetExceeded):
+                # Tek endpoint'te (ya da hepsinde) zaman aşımı: ham bağlantı hatası "gönderilmedi"
+                # gibi okunmasın diye sonucu bilinmiyor olarak bildirilir
+                raise SubmitOutcomeUnknown(tx_hash) from error
+            raise error
+        except HorizonBudgetExceeded as e:
+            # Önceki bir denemenin sonucu bilinmiyorsa çağıran işlemi gönderilmemiş saymamalı
+            e.maybe_submitted = outcome_unknown
+            raise
+
+    def stats(self) -> List[dict]:
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+
+@lru_cache(maxsize=None)
+def get_horizon_pool() -> HorizonPool:
+    return HorizonPool(HORIZON_URLS)
+
+
+if __name__ == "__main__":
+    # Yapılandırılmış endpoint'leri yoklar ve sağlık durumlarını yazdırır
+    logging.basicConfig(level=logging.INFO)
+    pool = get_horizon_pool()
+    for endpoint in pool.endpoints:
+        try:
+            pool._call(endpoint, lambda server: server.root().call())
+        except Exception as e:
+            print(f"{endpoint.url}: {e}")
+    for row in pool.stats():
+        print(row)
@@ -0,0 +1,314 @@
+import json
+import time
+import random
+import base64
+import logging
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+NETWORK_PASSPHRASE = "Test SDF Network ; September 2015"
+
+
+class HorizonState:
+    """
+    Yerel Horizon benzeri (stand-in) için ağ durumu: hesap sequence'ları, ledger sayacı ve
+    uygulanan işlemler. Yalnızca backend'in kullandığı uçlar taklit edilir; imzalar
+    kontrol edilmez, sequence kuralı (tx_bad_seq) ve memo kayıtları gerçekçidir.
+    """
+
+    def __init__(
+        self,
+        ledger_seconds: float = 1.0,
+        base_fee: int = 100,
+        rate_limit: int = 0,
+        rate_window: float = 3600.0,
+        tx_fail_rate: float = 0.0,
+    ):
+        self.ledger_seconds = ledger_seconds
+        self.base_fee = base_fee
+        # Ledger'a dahil edilip uygulanırken başarısız olan (successful: false) işlemlerin oranı
+        self.tx_fail_rate = tx_fail_rate
+        # Horizon'ın IP başına istek sınırı (0: sınırsız); sabit pencere, X-Ratelimit-* başlıklarıyla
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.window_started = time.monotonic()
+        self.window_requests = 0
+        self.started_at = time.monotonic()
+        self.sequences: Dict[str, int] = {}
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        # Fee-bump işlemleri iç hash ile de sorgulanabilir
+        self.aliases: Dict[str, str] = {}
+        self.account_history: Dict[str, List[str]] = {}
+        self.results: Counter = Counter()
+        self.paging = 0
+        self.lock = threading.Lock()
+
+    def take_request(self) -> Tuple[bool, Dict[str, str]]:
+        """
+        Pencereden bir istek düşer. Döner: (izin var mı, rate limit başlıkları).
+        """
+        if not self.rate_limit:
+            return True, {}
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_started >= self.rate_window:
+                self.window_started = now
+                self.window_requests = 0
+            allowed = self.window_requests < self.rate_limit
+            if allowed:
+                self.window_requests += 1
+            else:
+                self.results["rate_limited"] += 1
+            reset = max(1, int(self.window_started + self.rate_window - now + 0.999))
+        headers = {
+            "X-Ratelimit-Limit": str(self.rate_limit),
+            "X-Ratelimit-Remaining": str(self.rate_limit - self.window_requests),
+            "X-Ratelimit-Reset": str(reset),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(reset)
+        return allowed, headers
+
+    def ledger(self) -> int:
+        return 1000 + int((time.monotonic() - self.started_at) / self.ledger_seconds)
+
+    def account(self, account_id: str) -> Dict[str, Any]:
+        with self.lock:
+            # Bilinmeyen hesaplar ilk sorguda oluşturulur (friendbot gerekmez)
+            sequence = self.sequences.setdefault(account_id, self.ledger() << 32)
+        return {
+            "id": account_id,
+            "account_id": account_id,
+            "sequence": str(sequence),
+            "subentry_count": 0,
+            "thresholds": {"low_threshold": 0, "med_threshold": 0, "high_threshold": 0},
+            "flags": {"auth_required": False, "auth_revocable": False},
+            "balances": [{"balance": "10000.0000000", "asset_type": "native"}],
+            "signers": [{"weight": 1, "key": account_id, "type": "ed25519_public_key"}],
+            "data": {},
+            "paging_token": account_id,
+        }
+
+    def submit(self, xdr: str) -> Tuple[int, Dict[str, Any]]:
+        from stellar_sdk import FeeBumpTransactionEnvelope, TransactionBuilder
+        from stellar_sdk.memo import HashMemo
+
+        envelope = TransactionBuilder.from_xdr(xdr, NETWORK_PASSPHRASE)
+        tx_hash = envelope.hash_hex()
+        inner = envelope.transaction.inner_transaction_envelope if isinstance(envelope, FeeBumpTransactionEnvelope) else envelope
+        inner_hash = inner.hash_hex()
+        transaction = inner.transaction
+        source = transaction.source.account_id
+
+        with self.lock:
+            if tx_hash in self.transactions or inner_hash in self.aliases:
+                self.results["tx_duplicate"] += 1
+                return 409, {"hash": tx_hash, "tx_status": "DUPLICATE"}
+
+            current = self.sequences.setdefault(source, self.ledger() << 32)
+            if transaction.sequence != current + 1:
+                self.results["tx_bad_seq"] += 1
+                return 400, {
+                    "type": "https://stellar.org/horizon-errors/transaction_failed",
+                    "title": "Transaction Failed",
+                    "status": 400,
+                    "hash": tx_hash,
+                    "tx_status": "ERROR",
+                    "extras": {"result_codes": {"transaction": "tx_bad_seq"}},
+                }
+
+            # Başarısız işlem de ledger'a girer: sequence ve ücret tüketilir, memo geçmişte görünür
+            successful = not (self.tx_fail_rate and random.random() < self.tx_fail_rate)
+            self.sequences[source] = transaction.sequence
+            self.paging += 1
+            memo = transaction.memo
+            record = {
+                "id": tx_hash,
+                "hash": tx_hash,
+                "paging_token": str(self.paging),
+                "successful": successful,
+                # İşlem bir sonraki ledger kapanınca görünür
+                "ledger": self.ledger() + 1,
+                "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "source_account": source,
+                "fee_charged": str(self.base_fee * (len(transaction.operations) + (inner is not envelope))),
+                "operation_count": len(transaction.operations),
+                "envelope_xdr": xdr,
+                "memo_type": "hash" if isinstance(memo, HashMemo) else "none",
+                "memo": base64.b64encode(memo.memo_hash).decode() if isinstance(memo, HashMemo) else None,
+            }
+            self.transactions[tx_hash] = record
+            if inner is not envelope:
+                self.aliases[inner_hash] = tx_hash
+            self.account_history.setdefault(source, []).append(tx_hash)
+            self.results["tx_success" if successful else "tx_failed"] += 1
+        return 200, record
+
+    def transaction(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            record = self.transactions.get(self.aliases.get(tx_hash, tx_hash))
+        if record is None or record["ledger"] > self.ledger():
+            return None
+        return record
+
+    def history(self, account_id: str, cursor: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            hashes = list(self.account_history.get(account_id, []))
+        after = int(cursor or 0)
+        records = [self.transactions[h] for h in hashes if int(self.transactions[h]["paging_token"]) > after]
+        return [record for record in records if record["ledger"] <= self.ledger()][:limit]
+
+    def fee_stats(self) -> Dict[str, Any]:
+        fee = str(self.base_fee)
+        percentiles = {key: fee for key in ("p10", "p20", "p30", "p40", "p50", "p60", "p70", "p80", "p90", "p95", "p99")}
+        return {
+            "last_ledger": str(self.ledger()),
+            "last_ledger_base_fee": fee,
+            "ledger_capacity_usage": "0.10",
+            "fee_charged": {"max": fee, "min": fee, "mode": fee, **percentiles},
+            "max_fee": {"max": fee, "min": fee, "mode": fee, **percentiles},
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"ledger": self.ledger(), "transactions": len(self.transactions), "results": dict(self.results)}
+
+
+def make_handler(state: HorizonState, latency_ms: float = 0.0, jitter_ms: float = 0.0, fail_rate: float = 0.0):
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        rate_headers: Dict[str, str] = {}
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/hal+json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in self.rate_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _inject(self) -> bool:
+            allowed, self.rate_headers = state.take_request()
+            if not allowed:
+                self._send(429, {"status": 429, "title": "Rate Limit Exceeded"})
+                return False
+            delay = latency_ms + random.uniform(0, jitter_ms)
+            if delay:
+                time.sleep(delay / 1000)
+            if fail_rate and random.random() < fail_rate:
+                self._send(503, {"status": 503, "title": "Service Unavailable (injected)"})
+                return False
+            return True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            parts = [part for part in url.path.split("/") if part]
+
+            if parts == ["_standin", "stats"]:
+                return self._send(200, state.stats())
+            if not self._inject():
+                return
+
+            if not parts:
+                return self._send(200, {"horizon_version": "standin", "network_passphrase": NETWORK_PASSPHRASE})
+            if parts == ["fee_stats"]:
+                return self._send(200, state.fee_stats())
+            if len(parts) == 2 and parts[0] == "accounts":
+                return self._send(200, state.account(parts[1]))
+            if len(parts) == 3 and parts[0] == "accounts" and parts[2] == "transactions":
+                records = state.history(parts[1], query.get("cursor"), int(query.get("limit", 10)))
+                return self._send(200, {"_embedded": {"records": records}})
+            if len(parts) == 2 and parts[0] == "transactions":
+                record = state.transaction(parts[1])
+                if record is None:
+                    return self._send(404, {"status": 404, "title": "Resource Missing"})
+                return self._send(200, record)
+            self._send(404, {"status": 404, "title": "Resource Missing"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            form = parse_qs(self.rfile.read(length).decode("utf-8"))
+            if not self._inject():
+                return
+
+            path = urlparse(self.path).path.rstrip("/")
+            if path not in ("/transactions", "/transactions_async") or "tx" not in form:
+                return self._send(404, {"status": 404, "title": "Resource Missing"})
+
+            status, body = state.submit(form["tx"][0])
+            if path == "/transactions_async" and status == 200:
+                return self._send(201, {"hash": body["hash"], "tx_status": "PENDING"})
+            if status == 200 and not body["successful"]:
+                # Senkron gönderimde Horizon başarısız işlemi 400 tx_failed ile bildirir
+                return self._send(400, {
+                    "type": "https://stellar.org/horizon-errors/transaction_failed",
+                    "title": "Transaction Failed",
+                    "status": 400,
+                    "hash": body["hash"],
+                    "extras": {"result_codes": {"transaction": "tx_failed", "operations": ["op_underfunded"]}},
+                })
+            self._send(status, body)
+
+    return StandinHandler
+
+
+def start_standin(
+    port: int = 0,
+    ledger_seconds: float = 1.0,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    fail_rate: float = 0.0,
+    rate_limit: int = 0,
+    rate_window: float = 3600.0,
+    tx_fail_rate: float = 0.0,
+) -> Tuple[ThreadingHTTPServer, HorizonState]:
+    """
+    Stand-in'i arka plan thread'inde başlatır. Döner: (server, state); adres server.server_port.
+    """
+    state = HorizonState(
+        ledger_seconds=ledger_seconds, rate_limit=rate_limit, rate_window=rate_window, tx_fail_rate=tx_fail_rate
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state, latency_ms, jitter_ms, fail_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Çevrimdışı yük testi için yerel Horizon stand-in'i.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--ledger-seconds", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Her isteğe eklenen gecikme")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Gecikmeye eklenen rastgele üst sınır")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="503 dönen isteklerin oranı (0-1)")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Pencere başına istek sınırı; aşılınca 429 (0: sınırsız)")
+    parser.add_argument("--rate-window", type=float, default=3600.0, help="Rate limit penceresi (sn)")
+    parser.add_argument("--tx-fail-rate", type=float, default=0.0,
+                        help="Ledger'a girip başarısız olan (successful: false) işlemlerin oranı (0-1)")
+    args = parser.parse_args()
+
+    server, _ = start_standin(
+        args.port, args.ledger_seconds, args.latency_ms, args.jitter_ms, args.fail_rate, args.rate_limit,
+        args.rate_window, args.tx_fail_rate
+    )
+    print(f"Horizon stand-in: http://127.0.0.1:{server.server_port}  (backend: HORIZON_URLS=http://127.0.0.1:{server.server_port})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,249 @@
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+# -------------------------
+# AYARLAR
+# -------------------------
+NETWORK_PASSPHRASE = "Test SDF Network ; September 2015"
+DEFAULT_MIX = "flow=70,verify=20,list=10"
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """
+    Endpoint bazında gecikme/durum kodlarını ve doğruluk ihlallerini toplar.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.flags: Dict[str, int] = defaultdict(int)
+        self.examples: Dict[str, str] = {}
+        self.registrations: Dict[str, List[str]] = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def request(self, session: requests.Session, name: str, method: str, url: str, **kwargs) -> Optional[requests.Response]:
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=60, **kwargs)
+        except requests.RequestException as e:
+            self.flag("connection_error", f"{name}: {e}")
+            return None
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.latencies[name].append(elapsed)
+            self.statuses[name][response.status_code] += 1
+
+        if response.status_code >= 500:
+            body = response.text
+            if "IntegrityError" in body or "UNIQUE constraint" in body or "duplicate key" in body:
+                self.flag("duplicate_key_race", f"{name}: {body[:200]}")
+            else:
+                self.flag(f"{name}_5xx", body[:200])
+        return response
+
+    def flag(self, kind: str, example: str, count: int = 1) -> None:
+        with self.lock:
+            self.flags[kind] += count
+            self.examples.setdefault(kind, example)
+
+    def register(self, video_url: str, video_id: str) -> None:
+        with self.lock:
+            self.registrations[video_url].append(video_id)
+
+
+class LoadTest:
+    """
+    Her simüle muhabir kendi keypair'i ile prepare → sign → submit → verify akışını çalıştırır.
+    Akışlar açık döngü (open loop) olarak `rate` akış/saniye Poisson gelişleriyle başlatılır;
+    backend yavaşladığında yük azalmaz, kuyruklanma gecikmelere yansır.
+    """
+
+    def __init__(self, backend: str, reporters: int, mix: Dict[str, int], duplicate_ratio: float):
+        from stellar_sdk import Keypair
+
+        self.backend = backend.rstrip("/")
+        self.keypairs = [Keypair.random() for _ in range(reporters)]
+        self.mix = mix
+        self.duplicate_ratio = duplicate_ratio
+        self.recorder = Recorder()
+        self.verified_urls: List[str] = []
+        self.counter = 0
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.run_id = f"{int(time.time())}-{random.randrange(1 << 16):04x}"
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def setup(self) -> None:
+        for kp in self.keypairs:
+            self.recorder.request(self.session, "POST /reporters/", "POST", f"{self.backend}/reporters/", json={
+                "full_name": f"Load Reporter {kp.public_key[:6]}",
+                "wallet_address": kp.public_key,
+                "institution": "loadtest",
+            })
+
+    def _next_url(self) -> str:
+        with self.lock:
+            # Aynı URL'nin eşzamanlı kaydı: tam olarak bir kayıt oluşmalı
+            if self.counter and random.random() < self.duplicate_ratio:
+                return f"https://loadtest.local/{self.run_id}/{self.counter}"
+            self.counter += 1
+            return f"https://loadtest.local/{self.run_id}/{self.counter}"
+
+    def flow(self) -> None:
+        from stellar_sdk import TransactionEnvelope
+
+        kp = random.choice(self.keypairs)
+        video_url = self._next_url()
+        record = self.recorder
+
+        response = record.request(self.session, "POST /videos/prepare-transaction", "POST",
+                                  f"{self.backend}/videos/prepare-transaction",
+                                  json={"reporter_wallet": kp.public_key, "video_url": video_url})
+        if response is None or response.status_code != 200:
+            return
+        prepared = response.json()
+        if prepared.get("already_registered"):
+            return
+        record.register(video_url, str(prepared["video_id"]))
+
+        envelope = TransactionEnvelope.from_xdr(prepared["xdr_for_signing"], NETWORK_PASSPHRASE)
+        envelope.sign(kp)
+
+        response = record.request(self.session, "POST /videos/submit-transaction", "POST",
+                                  f"{self.backend}/videos/submit-transaction",
+                                  json={"video_id": str(prepared["video_id"]), "signed_xdr": envelope.to_xdr()})
+        if response is None or response.status_code != 200:
+            return
+
+        response = record.request(self.session, "POST /verify", "POST", f"{self.backend}/verify",
+                                  json={"video_url": video_url})
+        if response is not None and response.status_code == 200:
+            status = response.json().get("status")
+            if status == "VERIFIED_ON_STELLAR":
+                with self.lock:
+                    self.verified_urls.append(video_url)
+            elif status != "PROCESSING_ON_BLOCKCHAIN":
+                record.flag("verify_unexpected_status", f"{video_url}: {status}")
+
+    def verify_only(self) -> None:
+        with self.lock:
+            video_url = random.choice(self.verified_urls) if self.verified_urls else None
+        if video_url is None:
+            return self.list_videos()
+        self.recorder.request(self.session, "POST /verify", "POST", f"{self.backend}/verify",
+                              json={"video_url": video_url})
+
+    def list_videos(self) -> None:
+        self.recorder.request(self.session, "GET /videos", "GET", f"{self.backend}/videos", params={"limit": 20})
+
+    def pick(self):
+        actions = {"flow": self.flow, "verify": self.verify_only, "list": self.list_videos}
+        names = list(self.mix)
+        return actions[random.choices(names, weights=[self.mix[n] for n in names])[0]]
+
+    def run(self, rate: float, duration: float, concurrency: int) -> float:
+        """
+        Döner: gerçek çalışma süresi (saniye).
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            next_at = start
+            while next_at - start < duration:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.pick()).add_done_callback(self._check_task)
+                next_at += random.expovariate(rate)
+        return time.perf_counter() - start
+
+    def _check_task(self, future) -> None:
+        # İstemci tarafında fırlayan hatalar (ör. beklenmeyen yanıt gövdesi) sessizce kaybolmaz
+        error = future.exception()
+        if error is not None:
+            self.recorder.flag("client_exception", f"{type(error).__name__}: {error}")
+
+    def check_registrations(self) -> None:
+        for video_url, video_ids in self.recorder.registrations.items():
+            if len(video_ids) > 1:
+                self.recorder.flag("duplicate_registration", f"{video_url}: {len(video_ids)} kayıt")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        if name not in ("flow", "verify", "list"):
+            raise argparse.ArgumentTypeError(f"Bilinmeyen istek tipi: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def report(test: LoadTest, elapsed: float, horizon: Optional[str]) -> None:
+    recorder = test.recorder
+    print(f"\nSüre: {elapsed:.1f} s")
+    print(f"{'endpoint':38} {'n':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  durum kodları")
+    for name, values in sorted(recorder.latencies.items()):
+        codes = " ".join(f"{code}:{count}" for code, count in sorted(recorder.statuses[name].items()))
+        print(f"{name:38} {len(values):6d} {len(values) / elapsed:7.1f} "
+              f"{percentile(values, 50) * 1000:8.1f} {percentile(values, 95) * 1000:8.1f} "
+              f"{percentile(values, 99) * 1000:8.1f}  {codes}")
+
+    if horizon:
+        try:
+            stats = requests.get(f"{horizon.rstrip('/')}/_standin/stats", timeout=5).json()
+            print(f"\nHorizon stand-in: {stats}")
+            bad_seq = stats.get("results", {}).get("tx_bad_seq", 0)
+            if bad_seq:
+                recorder.flag("tx_bad_seq", "aynı sequence ile hazırlanmış işlemler Horizon'da reddedildi", bad_seq)
+        except requests.RequestException as e:
+            print(f"\nStand-in istatistikleri alınamadı: {e}")
+
+    test.check_registrations()
+    if recorder.flags:
+        print("\nDOĞRULUK İHLALLERİ:")
+        for kind, count in sorted(recorder.flags.items()):
+            print(f"  {kind}: {count}  (örn. {recorder.examples[kind]})")
+    else:
+        print("\nDoğruluk ihlali yok.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RedValid prepare/sign/submit/verify akışı için eşzamanlı yük testi.")
+    parser.add_argument("--backend", default="http://127.0.0.1:8000")
+    parser.add_argument("--horizon", default=None,
+                        help="horizon_standin.py adresi; verilirse tx_bad_seq sayıları raporlanır")
+    parser.add_argument("--reporters", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=5.0, help="Saniyedeki yeni istek/akış sayısı")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05,
+                        help="Aynı video URL'sinin eşzamanlı tekrar kaydedilme oranı")
+    args = parser.parse_args()
+
+    test = LoadTest(args.backend, args.reporters, args.mix, args.duplicate_ratio)
+    test.setup()
+    elapsed = test.run(args.rate, args.duration, args.concurrency)
+    report(test, elapsed, args.horizon)
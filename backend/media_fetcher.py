@@ -0,0 +1,294 @@
+import os
+import time
+import socket
+import logging
+import tempfile
+import ipaddress
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+from urllib.parse import urljoin, urlparse
+
+from dotenv import load_dotenv
+
+from add_video import MAX_FILE_SIZE
+from cancellation import check_cancelled
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# "url": URL metninin hash'i (varsayılan), "content": uzak videonun içeriğinin hash'i
+URL_HASH_MODE = os.getenv("URL_HASH_MODE", "url")
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(MAX_FILE_SIZE)))
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "30"))
+FETCH_CONNECT_TIMEOUT_SECONDS = float(os.getenv("FETCH_CONNECT_TIMEOUT_SECONDS", "5"))
+FETCH_MAX_PER_HOST = int(os.getenv("FETCH_MAX_PER_HOST", "2"))
+FETCH_POOL_SIZE = int(os.getenv("FETCH_POOL_SIZE", "10"))
+FETCH_MAX_REDIRECTS = int(os.getenv("FETCH_MAX_REDIRECTS", "5"))
+# Virgülle ayrılmış host listesi (alt alan adları dahil); boşsa herhangi bir public host
+FETCH_ALLOWED_HOSTS = [host.strip().lower() for host in os.getenv("FETCH_ALLOWED_HOSTS", "").split(",") if host.strip()]
+# Yalnızca yerel testler için: loopback/özel ağ adreslerine indirmeye izin verir
+FETCH_ALLOW_PRIVATE = os.getenv("FETCH_ALLOW_PRIVATE", "0") == "1"
+FETCH_CHUNK_SIZE = 256 * 1024
+
+
+class FetchError(Exception):
+    """
+    Uzak video indirilemediğinde ya da limitler aşıldığında fırlatılır.
+    status_code endpoint'in döneceği HTTP kodudur.
+    """
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class BlockedAddress(OSError):
+    """
+    Bağlanılan adres public değil (loopback, özel ağ, link-local/metadata...).
+    """
+
+
+def _is_public_address(address: str) -> bool:
+    return ipaddress.ip_address(address.split("%", 1)[0]).is_global
+
+
+def _guarded_connection_classes():
+    """
+    Soket açıldıktan sonra karşı adresi kontrol eden urllib3 bağlantı havuzları. İstek
+    öncesi DNS kontrolü ile bağlantı arasında adres değişse (DNS rebinding) bile istek
+    public olmayan bir adrese gönderilmez.
+    """
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def new_conn(base):
+        def _new_conn(self):
+            sock = base._new_conn(self)
+            address = sock.getpeername()[0]
+            if not _is_public_address(address):
+                sock.close()
+                raise BlockedAddress(f"Public olmayan adrese bağlantı engellendi: {address}")
+            return sock
+        return _new_conn
+
+    class GuardedHTTPConnection(HTTPConnection):
+        _new_conn = new_conn(HTTPConnection)
+
+    class GuardedHTTPSConnection(HTTPSConnection):
+        _new_conn = new_conn(HTTPSConnection)
+
+    class GuardedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = GuardedHTTPConnection
+
+    class GuardedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = GuardedHTTPSConnection
+
+    return {"http": GuardedHTTPConnectionPool, "https": GuardedHTTPSConnectionPool}
+
+
+def _blocked_cause(error: BaseException) -> Optional[BlockedAddress]:
+    # requests/urllib3 engelleme hatasını birkaç katman sarar
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, BlockedAddress):
+            return error
+        for arg in getattr(error, "args", ()):
+            if isinstance(arg, BaseException):
+                found = _blocked_cause(arg)
+                if found:
+                    return found
+        error = getattr(error, "reason", None) or error.__cause__ or error.__context__
+    return None
+
+
+class MediaFetcher:
+    """
+    Uzak videoları bağlantı havuzlu tek bir requests.Session üzerinden akış halinde indirir.
+
+    - Host başına eşzamanlı indirme sayısı `max_per_host` ile sınırlıdır.
+    - `Range: bytes=0-max_bytes` ile istenir; Range destekleyen sunucular limitten fazlasını
+      göndermez, toplam boyut Content-Range/Content-Length'ten okunarak erken reddedilir.
+    - İçerik bellekte tutulmaz; parça parça diskteki geçici dosyaya yazılır ve indirme
+      tamamlanınca validate_video'ya dosya yolu olarak verilir. MP4'ün moov atomu dosya
+      sonunda olabildiği için moviepy/ffmpeg aranabilir (seekable) bir dosya ister; akışı
+      doğrudan ffmpeg'e borulamak bu yüzden genel olarak mümkün değildir.
+    - Toplam süre `timeout` saniyeyi aşarsa indirme kesilir.
+    - SSRF koruması: yalnızca public adreslere (isteğe bağlı olarak FETCH_ALLOWED_HOSTS'a)
+      bağlanılır. Yönlendirmeler elle izlenir ve her adımda aynı kontrol yapılır; soket
+      açıldıktan sonra karşı adres tekrar kontrol edilir.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = FETCH_MAX_BYTES,
+        timeout: float = FETCH_TIMEOUT_SECONDS,
+        connect_timeout: float = FETCH_CONNECT_TIMEOUT_SECONDS,
+        max_per_host: int = FETCH_MAX_PER_HOST,
+        pool_size: int = FETCH_POOL_SIZE,
+        allowed_hosts: Optional[list] = None,
+        allow_private: bool = FETCH_ALLOW_PRIVATE,
+        max_redirects: int = FETCH_MAX_REDIRECTS,
+    ):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_per_host = max_per_host
+        self.allowed_hosts = FETCH_ALLOWED_HOSTS if allowed_hosts is None else allowed_hosts
+        self.allow_private = allow_private
+        self.max_redirects = max_redirects
+
+        # requests ilk fetcher oluşturulurken yüklenir (soğuk başlangıç)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._session = requests.Session()
+        # Ortamdaki proxy ayarı kullanılmaz; karşı adres kontrolü proxy'nin adresini görürdü
+        self._session.trust_env = False
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        if not allow_private:
+            adapter.poolmanager.pool_classes_by_scheme = _guarded_connection_classes()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def check_url(self, url: str) -> None:
+        """
+        URL'nin şemasını, host'unu ve host'un çözüldüğü tüm adresleri kontrol eder.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise FetchError(f"Desteklenmeyen URL: {url}", status_code=400)
+
+        host = parsed.hostname.lower()
+        if self.allowed_hosts and not any(host == allowed or host.endswith("." + allowed) for allowed in self.allowed_hosts):
+            raise FetchError(f"İzin verilmeyen host: {host}", status_code=400)
+        if self.allow_private:
+            return
+
+        try:
+            addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or 443, type=socket.SOCK_STREAM)}
+        except (socket.gaierror, UnicodeError) as e:
+            raise FetchError(f"Host çözülemedi: {host} ({e})", status_code=400) from e
+        blocked = sorted(address for address in addresses if not _is_public_address(address))
+        if blocked:
+            raise FetchError(f"Public olmayan adrese indirme engellendi: {host} -> {', '.join(blocked)}", status_code=400)
+
+    @contextmanager
+    def fetch_to_file(self, url: str) -> Iterator[str]:
+        """
+        URL'yi geçici bir dosyaya indirir ve dosya yolunu verir; blok bitince dosya silinir.
+        """
+        self.check_url(url)
+        parsed = urlparse(url)
+
+        deadline = time.monotonic() + self.timeout
+        slot = self._host_slot(parsed.netloc)
+        if not slot.acquire(timeout=self.timeout):
+            raise FetchError(f"Host için indirme sırası zaman aşımına uğradı: {parsed.netloc}", status_code=503)
+
+        temp_fd, temp_path = tempfile.mkstemp(suffix=".mp4")
+        try:
+            try:
+                with os.fdopen(temp_fd, "wb") as f:
+                    self._download(url, f, deadline)
+            finally:
+                slot.release()
+            yield temp_path
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _open(self, url: str, deadline: float):
+        """
+        GET isteğini yönlendirmeleri tek tek kontrol ederek izler; son yanıtı döner.
+        """
+        for _ in range(self.max_redirects + 1):
+            read_timeout = max(deadline - time.monotonic(), 0.1)
+            response = self._session.get(
+                url,
+                stream=True,
+                allow_redirects=False,
+                headers={"Range": f"bytes=0-{self.max_bytes}"},
+                timeout=(self.connect_timeout, read_timeout),
+            )
+            if not response.is_redirect:
+                return response
+            location = response.headers.get("Location", "")
+            response.close()
+            url = urljoin(url, location)
+            self.check_url(url)
+        raise FetchError("Uzak sunucu çok fazla yönlendirme yaptı", status_code=400)
+
+    def _download(self, url: str, f, deadline: float) -> None:
+        import requests
+
+        try:
+            with self._open(url, deadline) as response:
+                if response.status_code not in (200, 206):
+                    raise FetchError(f"Uzak sunucu {response.status_code} döndü: {url}")
+
+                total = self._declared_size(response)
+                if total is not None and total > self.max_bytes:
+                    raise FetchError(f"Uzak video çok büyük ({total} byte)", status_code=400)
+
+                received = 0
+                for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise FetchError("Uzak video boyut sınırını aştı", status_code=400)
+                    if time.monotonic() > deadline:
+                        raise FetchError("Uzak video indirme süresi aşıldı", status_code=504)
+                    # İstemci koptuysa indirme yarıda bırakılır
+                    check_cancelled()
+                    f.write(chunk)
+
+                logger.info(f"Uzak video indirildi: {url} ({received} byte)")
+        except requests.RequestException as e:
+            blocked = _blocked_cause(e)
+            if blocked:
+                raise FetchError(str(blocked), status_code=400) from e
+            raise FetchError(f"Uzak video indirilemedi: {e}") from e
+
+    @staticmethod
+    def _declared_size(response) -> Optional[int]:
+        content_range = response.headers.get("Content-Range")
+        if response.status_code == 206 and content_range and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            return int(total) if total.isdigit() else None
+
+        content_length = response.headers.get("Content-Length")
+        if response.status_code == 200 and content_length and content_length.isdigit():
+            return int(content_length)
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_media_fetcher() -> MediaFetcher:
+    return MediaFetcher()
+
+
+if __name__ == "__main__":
+    # Yerel deneme: `python -m http.server` ile örnek videoları sunup URL'yi verin
+    # (loopback adresi için FETCH_ALLOW_PRIVATE=1)
+    import sys
+    from add_video import validate_video
+
+    logging.basicConfig(level=logging.INFO)
+    with get_media_fetcher().fetch_to_file(sys.argv[1]) as path:
+        is_valid, result = validate_video(path)
+    print("SHA256 Hash:" if is_valid else "Hata:", result.get("hash") or result.get("error"))
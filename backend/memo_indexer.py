@@ -0,0 +1,186 @@
+import os
+import base64
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, func, delete
+from sqlmodel import Session
+from dotenv import load_dotenv
+
+from db import engine, create_db_and_tables, insert_ignore_conflicts
+from models import OnChainMemo, IndexerCursor
+from horizon_pool import get_horizon_pool
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+MEMO_INDEX_ENABLED = os.getenv("MEMO_INDEX_ENABLED", "1") == "1"
+# Uygulama içinde yeni işlemlerin kontrol edildiği aralık
+MEMO_INDEX_INTERVAL_SECONDS = float(os.getenv("MEMO_INDEX_INTERVAL_SECONDS", "30"))
+# Horizon'un izin verdiği en büyük sayfa boyutu
+MEMO_INDEX_PAGE_SIZE = int(os.getenv("MEMO_INDEX_PAGE_SIZE", "200"))
+# Boşsa STELLAR_SECRET'tan türetilen servis hesabı taranır
+MEMO_INDEX_ACCOUNT = os.getenv("MEMO_INDEX_ACCOUNT")
+
+CURSOR_NAME = "service_memos"
+
+
+def index_account() -> str:
+    if MEMO_INDEX_ACCOUNT:
+        return MEMO_INDEX_ACCOUNT
+    from stellar_utils import get_service_public_key
+    return get_service_public_key()
+
+
+def _reporter_from_envelope(envelope_xdr: str) -> Optional[str]:
+    """
+    İlk operation'ın kaynağı (muhabir). Fee-bump işlemlerde iç işleme bakılır.
+    """
+    from stellar_sdk import FeeBumpTransactionEnvelope, TransactionBuilder
+    from stellar_utils import NETWORK_PASSPHRASE
+
+    try:
+        envelope = TransactionBuilder.from_xdr(envelope_xdr, NETWORK_PASSPHRASE)
+    except Exception:
+        return None
+    if isinstance(envelope, FeeBumpTransactionEnvelope):
+        envelope = envelope.transaction.inner_transaction_envelope
+
+    operations = envelope.transaction.operations
+    source = operations[0].source if operations else None
+    return source.account_id if source is not None else None
+
+
+def decode_memo_record(record: Dict[str, Any], account: str) -> Optional[Dict[str, Any]]:
+    """
+    Horizon işlem kaydından onchain_memo satırı üretir; HashMemo taşımayan işlemler için None.
+    Hesaba dokunan her işlem (ör. servis hesabına ödeme yapan üçüncü kişi) geçmişte görünür;
+    sadece servis hesabının kaynak (ya da fee-bump'ta ücret ödeyen) olduğu başarılı işlemler alınır.
+    """
+    if record.get("memo_type") != "hash" or not record.get("memo"):
+        return None
+    if record.get("successful") is not True:
+        return None
+    if account not in (record.get("source_account"), record.get("fee_account")):
+        return None
+
+    anchored_at = record.get("created_at")
+    return {
+        "tx_hash": record["hash"],
+        "memo_hash": base64.b64decode(record["memo"]).hex(),
+        "ledger": int(record["ledger"]),
+        "source_account": account,
+        "reporter_wallet": _reporter_from_envelope(record.get("envelope_xdr", "")),
+        "anchored_at": datetime.fromisoformat(anchored_at.replace("Z", "+00:00")).replace(tzinfo=None) if anchored_at else None,
+    }
+
+
+def _load_cursor(session: Session) -> Optional[str]:
+    cursor = session.get(IndexerCursor, CURSOR_NAME)
+    return cursor.paging_token if cursor else None
+
+
+def _save_cursor(session: Session, paging_token: str) -> None:
+    cursor = session.get(IndexerCursor, CURSOR_NAME)
+    if cursor is None:
+        cursor = IndexerCursor(name=CURSOR_NAME, paging_token=paging_token)
+    else:
+        cursor.paging_token = paging_token
+        cursor.updated_at = datetime.utcnow()
+    session.add(cursor)
+
+
+def _fetch_page(account: str, paging_token: Optional[str]) -> List[Dict[str, Any]]:
+    def call(server):
+        builder = server.transactions().for_account(account).order(desc=False).limit(MEMO_INDEX_PAGE_SIZE)
+        if paging_token:
+            builder = builder.cursor(paging_token)
+        return builder.call()
+
+    # Arka plan taraması: Horizon bütçesi azaldığında ilk kesilen iş; kalan sayfalar sonraki turda
+    return get_horizon_pool().read(call, priority="background")["_embedded"]["records"]
+
+
+def run_indexer_once(session: Session, max_pages: Optional[int] = None) -> Dict[str, int]:
+    """
+    Servis hesabının işlemlerini son paging_token'dan itibaren eskiden yeniye gezer.
+    Her sayfanın memo satırları ve yeni cursor aynı commit'te yazılır; kesilen bir tarama
+    bir sonraki çalıştırmada kaldığı sayfadan devam eder.
+    """
+    account = index_account()
+    stats = {"pages": 0, "transactions": 0, "memos": 0}
+    table = OnChainMemo.__table__
+    paging_token = _load_cursor(session)
+
+    while max_pages is None or stats["pages"] < max_pages:
+        records = _fetch_page(account, paging_token)
+        if not records:
+            break
+
+        rows = [row for row in (decode_memo_record(record, account) for record in records) if row]
+        if rows:
+            result = session.execute(insert_ignore_conflicts(table), rows)
+            stats["memos"] += max(result.rowcount, 0)
+
+        paging_token = records[-1]["paging_token"]
+        _save_cursor(session, paging_token)
+        session.commit()
+
+        stats["pages"] += 1
+        stats["transactions"] += len(records)
+        if len(records) < MEMO_INDEX_PAGE_SIZE:
+            break
+
+    return stats
+
+
+async def memo_indexer_loop() -> None:
+    """
+    Uygulama yaşadığı sürece index'i MEMO_INDEX_INTERVAL_SECONDS aralıkla günceller.
+    """
+    while True:
+        try:
+            stats = await asyncio.to_thread(_run_in_session)
+            if stats["memos"]:
+                logger.info(f"Memo index güncellendi: {stats}")
+        except RuntimeError as e:
+            # Servis hesabı yapılandırılmamış (STELLAR_SECRET yok); tekrar denemenin anlamı yok
+            logger.warning(f"Memo indexer durduruldu: {e}")
+            return
+        except Exception as e:
+            logger.warning(f"Memo index güncellenemedi: {e}")
+        await asyncio.sleep(MEMO_INDEX_INTERVAL_SECONDS)
+
+
+def _run_in_session() -> Dict[str, int]:
+    with Session(engine) as session:
+        return run_indexer_once(session)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Servis hesabının HashMemo geçmişini yerel index'e aktar.")
+    parser.add_argument("--reset", action="store_true", help="Index'i ve cursor'ı silip geçmişi baştan tara")
+    parser.add_argument("--max-pages", type=int, default=None)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    engine.echo = False
+    with Session(engine) as session:
+        if args.reset:
+            session.execute(delete(OnChainMemo.__table__))
+            cursor = session.get(IndexerCursor, CURSOR_NAME)
+            if cursor:
+                session.delete(cursor)
+            session.commit()
+        print(run_indexer_once(session, max_pages=args.max_pages))
+        total = session.execute(select(func.count()).select_from(OnChainMemo.__table__)).scalar()
+        print("Index'teki memo sayısı:", total)
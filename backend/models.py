@@ -1,7 +1,9 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from uuid import UUID, uuid4
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Index, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from pydantic import BaseModel
 
 
@@ -25,6 +27,8 @@ class VideoPrepareRequest(BaseModel):
     reporter_wallet: str
     video_url: Optional[str] = None
     video_file: Optional[str] = None  # Base64 encoded video file
+    # True: uzak videonun içeriği indirilip hash'lenir; None: sunucu varsayılanı (URL_HASH_MODE)
+    hash_content: Optional[bool] = None
 
     class Config:
         json_schema_extra = {
@@ -36,6 +40,22 @@ class VideoPrepareRequest(BaseModel):
 
 
 
+class VideoBatchPrepareRequest(BaseModel):
+    reporter_wallet: str
+    video_urls: List[str]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "reporter_wallet": "GAVMYU2ZXTQ7IAK77NAICSKZZNH6T2FPVQ6XIAUWWHIZ6P7Y2CS736A6",
+                "video_urls": [
+                    "https://www.youtube.com/watch?v=PxAr1r-1EUA",
+                    "https://www.youtube.com/watch?v=hkERj1yxN6c"
+                ]
+            }
+        }
+
+
 class SubmitTransactionRequest(BaseModel):
     video_id: UUID
     signed_xdr: str
@@ -71,6 +91,248 @@ class DataHashCheckRequest(BaseModel):
         }
 
 
+# --- Response Models ---
+# Endpoint yanıtları bu modellerle tiplenir; FastAPI bunları pydantic-core ile tek geçişte
+# serileştirir (jsonable_encoder'ın Python yürüyüşü yok), JSON'a çevirme orjson ile yapılır.
+# Birden fazla yanıt biçimi olan endpoint'ler response_model_exclude_unset kullanır:
+# sadece açıkça atanan alanlar (None dahil) yanıta girer.
+class ReporterInfo(BaseModel):
+    reporter_id: UUID
+    full_name: str
+    wallet_address: str
+    institution: Optional[str] = None
+    kyc_verified: bool
+
+    @classmethod
+    def from_reporter(cls, reporter: "Reporter") -> "ReporterInfo":
+        return cls(
+            reporter_id=reporter.id,
+            full_name=reporter.full_name,
+            wallet_address=reporter.wallet_address,
+            institution=reporter.institution,
+            kyc_verified=reporter.kyc_verified,
+        )
+
+
+class ReporterResponse(BaseModel):
+    id: UUID
+    full_name: str
+    wallet_address: str
+    institution: Optional[str] = None
+    kyc_verified: bool
+    created_at: datetime
+
+    @classmethod
+    def from_reporter(cls, reporter: "Reporter") -> "ReporterResponse":
+        return cls(
+            id=reporter.id,
+            full_name=reporter.full_name,
+            wallet_address=reporter.wallet_address,
+            institution=reporter.institution,
+            kyc_verified=reporter.kyc_verified,
+            created_at=reporter.created_at,
+        )
+
+
+class VideoInfo(BaseModel):
+    video_id: UUID
+    video_url: str
+    prepared_tx_hash: Optional[str] = None
+    tx_hash: Optional[str] = None
+
+    @classmethod
+    def from_video(cls, video: "Video") -> "VideoInfo":
+        return cls(
+            video_id=video.id,
+            video_url=video.video_url,
+            prepared_tx_hash=video.prepared_tx_hash,
+            tx_hash=video.tx_hash,
+        )
+
+
+class VideoListItem(BaseModel):
+    video_id: UUID
+    video_url: str
+    platform: str
+    data_hash: str
+    status: str
+    verified: bool
+    prepared_tx_hash: Optional[str] = None
+    tx_hash: Optional[str] = None
+    reporter_wallet: str
+    created_at: datetime
+
+    @classmethod
+    def from_video(cls, video: "Video") -> "VideoListItem":
+        return cls(
+            video_id=video.id,
+            video_url=video.video_url,
+            platform=video.platform,
+            data_hash=video.data_hash,
+            status=video.status,
+            verified=video.verified,
+            prepared_tx_hash=video.prepared_tx_hash,
+            tx_hash=video.tx_hash,
+            reporter_wallet=video.reporter_wallet,
+            created_at=video.created_at,
+        )
+
+
+class VideoPageResponse(BaseModel):
+    items: List[VideoListItem]
+    next_cursor: Optional[str] = None
+
+
+class PrepareResponse(BaseModel):
+    """
+    Yeni kayıt (xdr_for_signing ile), mevcut kayıt ya da aynı istekte tekrar eden video.
+    """
+    message: str
+    video_id: Optional[UUID] = None
+    video_url: Optional[str] = None
+    status: Optional[str] = None
+    data_hash: Optional[str] = None
+    xdr_for_signing: Optional[str] = None
+    prepared_tx_hash: Optional[str] = None
+    already_registered: bool
+
+
+class BatchPrepareResponse(BaseModel):
+    reporter_wallet: str
+    count: int
+    results: List[PrepareResponse]
+
+
+class SubmitResponse(BaseModel):
+    status: str
+    stellar_tx_hash: str
+    # Servis anahtarıyla imzalı, çevrimdışı doğrulanabilir makbuz (receipt_verifier.py)
+    receipt: Optional[str] = None
+
+
+class VerifyResponse(BaseModel):
+    status: str
+    video_url: Optional[str] = None
+    memo_hex: Optional[str] = None
+    data_hash: Optional[str] = None
+    reporter: Optional[ReporterInfo] = None
+    recorded_at: Optional[datetime] = None
+    stellar_transaction_id: Optional[str] = None
+    stellar_ledger: Optional[int] = None
+    stellar_created_at: Optional[str] = None
+    stellar_operation_count: Optional[int] = None
+    blockchain_verified: Optional[bool] = None
+    receipt: Optional[str] = None
+    message: Optional[str] = None
+
+
+class OnChainInfo(BaseModel):
+    tx_hash: str
+    ledger: int
+    reporter_wallet: Optional[str] = None
+    anchored_at: Optional[datetime] = None
+
+
+class DataHashCheckResponse(BaseModel):
+    status: str
+    data_hash: str
+    database_status: str
+    blockchain_status: str
+    video_info: Optional[VideoInfo] = None
+    reporter_info: Optional[ReporterInfo] = None
+    onchain_info: Optional[OnChainInfo] = None
+    message: str
+
+
+class ExcerptResponse(BaseModel):
+    status: str
+    video_id: Optional[UUID] = None
+    video_url: Optional[str] = None
+    data_hash: Optional[str] = None
+    database_status: Optional[str] = None
+    tx_hash: Optional[str] = None
+    offset_seconds: Optional[float] = None
+    matched_segments: Optional[int] = None
+    excerpt_segments: int
+    message: str
+
+
+class ReceiptResponse(BaseModel):
+    video_id: UUID
+    data_hash: str
+    tx_hash: str
+    ledger: int
+    receipt: str
+
+
+class ReceiptKeyResponse(BaseModel):
+    service_account: str
+    network_passphrase: str
+    receipt_version: str
+
+
+class HealthResponse(BaseModel):
+    status: str
+
+
+class WarmupStep(BaseModel):
+    ok: bool
+    ms: float
+    error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    phase: str
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    steps: Dict[str, WarmupStep] = {}
+
+
+# --- Kolon Tipleri ---
+HEX_HASH_LENGTH = 64
+
+
+class InvalidHexHash(ValueError):
+    """
+    Hash kolonuna 64 karakterlik hex olmayan bir değer verildi (istemci/içe aktarma girdisi hatası).
+    """
+
+
+def normalize_hex_hash(value: str) -> str:
+    """
+    64 karakterlik hex hash'i küçük harfe çevirir; değilse InvalidHexHash.
+    """
+    if not isinstance(value, str) or len(value) != HEX_HASH_LENGTH:
+        raise InvalidHexHash(f"{HEX_HASH_LENGTH} karakterlik hex hash bekleniyor: {value!r}")
+    try:
+        bytes.fromhex(value)
+    except ValueError:
+        raise InvalidHexHash(f"{HEX_HASH_LENGTH} karakterlik hex hash bekleniyor: {value!r}") from None
+    return value.lower()
+
+
+class HexBinary(TypeDecorator):
+    """
+    SHA-256 hash'leri ve Stellar işlem hash'leri için: uygulama ve API tarafında 64 karakterlik
+    hex metin, veritabanında 32 byte'lık binary (SQLite BLOB, Postgres bytea). Index boyutu ve
+    karşılaştırma maliyeti yarıya iner; eşitlik sorguları binary index üzerinde birebir aranır.
+    Henüz dönüştürülmemiş (metin) satırlar okunurken olduğu gibi döner (bkz. db._migrate_hash_columns).
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return bytes.fromhex(normalize_hex_hash(value))
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, (bytes, memoryview)):
+            return bytes(value).hex()
+        return value
+
+
 # --- Temel Model Yapısı ---
 class BaseModel(SQLModel):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
@@ -100,14 +362,26 @@ class Reporter(BaseModel, table=True):
 
 # --- 3. Video Modeli ---
 class Video(BaseModel, table=True):
+    # Listeleme endpoint'leri (created_at, id) üzerinde keyset pagination yapar;
+    # filtre + sıralama kolonlarını kapsayan bileşik index'ler her sayfayı sabit maliyette tutar.
+    __table_args__ = (
+        Index("ix_video_created_at_id", "created_at", "id"),
+        Index("ix_video_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_video_reporter_wallet_created_at_id", "reporter_wallet", "created_at", "id"),
+        Index("ix_video_reporter_wallet_status_created_at_id", "reporter_wallet", "status", "created_at", "id"),
+    )
+
     video_url: str = Field(index=True, unique=True)
     platform: str
-    data_hash: str = Field(index=True)
+    data_hash: str = Field(sa_type=HexBinary, index=True)
+    # Yüklenen orijinal dosyanın (işlenmemiş) SHA-256'sı; aynı dosyanın tekrar doğrulanmasında
+    # moviepy'yi atlamak için indekslenir. URL kayıtlarında boştur.
+    raw_hash: Optional[str] = Field(default=None, sa_type=HexBinary, index=True)
 
     # Stellar işlemleri
-    prepared_tx_hash: Optional[str] = Field(default=None)
-    tx_hash: Optional[str] = Field(default=None)
-    verification_tx_hash: Optional[str] = Field(default=None)
+    prepared_tx_hash: Optional[str] = Field(default=None, sa_type=HexBinary)
+    tx_hash: Optional[str] = Field(default=None, sa_type=HexBinary)
+    verification_tx_hash: Optional[str] = Field(default=None, sa_type=HexBinary)
 
     # Reporter doğrulaması için gerekli alan
     reporter_wallet: str = Field(index=True)
@@ -133,4 +407,93 @@ class Video(BaseModel, table=True):
                 "status": "prepared",
                 "verified": False
             }
-        }
\ No newline at end of file
+        }
+
+
+# --- 4. Video Segment Index Modeli ---
+class VideoSegment(SQLModel, table=True):
+    """
+    Videonun GOP hizalı segment hash'leri. (video_id, seq) birincil anahtarı videonun
+    sıralı segment index'idir; segment_hash üzerindeki index alıntı → kaynak video
+    araması için ters index görevi görür.
+    """
+    __tablename__ = "video_segment"
+
+    video_id: UUID = Field(foreign_key="video.id", primary_key=True)
+    seq: int = Field(primary_key=True)
+    segment_hash: str = Field(sa_type=HexBinary, index=True)
+    start_time: float
+    end_time: float
+
+
+# --- 5. Video Durum Olayları ---
+class VideoStatusEvent(SQLModel, table=True):
+    """
+    Video durum geçişlerinin (prepared → sending → verified/failed) kaydı.
+    Artan id, SSE akışında Last-Event-ID olarak kullanılır; böylece yeniden bağlanan
+    istemci ve farklı worker'lardaki dinleyiciler kaçırdıkları olayları buradan okur.
+    """
+    __tablename__ = "video_status_event"
+    __table_args__ = (
+        Index("ix_video_status_event_video_id_id", "video_id", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    video_id: UUID = Field(foreign_key="video.id")
+    status: str
+    tx_hash: Optional[str] = Field(default=None, sa_type=HexBinary)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# --- 6. Zincir Üstü Memo Index'i ---
+class OnChainMemo(SQLModel, table=True):
+    """
+    Servis hesabının Horizon geçmişinden çıkarılan HashMemo kayıtları.
+    DB'de karşılığı olmayan (ör. kaybolmuş) kayıtlar için de memo_hash → işlem eşlemesi sağlar.
+    """
+    __tablename__ = "onchain_memo"
+
+    tx_hash: str = Field(sa_type=HexBinary, primary_key=True)
+    memo_hash: str = Field(sa_type=HexBinary, index=True)
+    ledger: int
+    # İşlemi gönderen servis hesabı (fee-bump'ta ücreti ödeyen hesap)
+    source_account: str
+    # Payment operation'ın kaynağı (muhabir cüzdanı)
+    reporter_wallet: Optional[str] = Field(default=None, index=True)
+    anchored_at: Optional[datetime] = None
+
+
+class IndexerCursor(SQLModel, table=True):
+    """
+    Horizon geçmişini tarayan indexer'ların kaldığı paging_token.
+    """
+    __tablename__ = "indexer_cursor"
+
+    name: str = Field(primary_key=True)
+    paging_token: str
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# --- 7. Arşivlenmiş Videolar ---
+class VideoArchive(SQLModel, table=True):
+    """
+    Retention sweeper'ın video tablosundan taşıdığı, hiç imzalanmamış (prepared) ya da
+    başarısız (failed) kayıtlar. Kolonlar Video ile aynıdır; video_url burada unique değildir,
+    aynı URL silinip tekrar kaydedilebilir.
+    """
+    __tablename__ = "video_archive"
+
+    id: UUID = Field(primary_key=True)
+    created_at: datetime
+    video_url: str = Field(index=True)
+    platform: str
+    data_hash: str = Field(sa_type=HexBinary, index=True)
+    raw_hash: Optional[str] = Field(default=None, sa_type=HexBinary)
+    prepared_tx_hash: Optional[str] = Field(default=None, sa_type=HexBinary)
+    tx_hash: Optional[str] = Field(default=None, sa_type=HexBinary)
+    verification_tx_hash: Optional[str] = Field(default=None, sa_type=HexBinary)
+    reporter_wallet: str
+    status: str
+    verified: bool = False
+    reporter_id: UUID
+    archived_at: datetime = Field(default_factory=datetime.utcnow, index=True)
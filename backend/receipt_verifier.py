@@ -0,0 +1,164 @@
+"""
+RedValid doğrulama makbuzlarını backend'e gitmeden kontrol eden bağımsız doğrulayıcı.
+
+Bu dosya tek başına dağıtılabilir; yalnızca stellar_sdk'ya (imza kontrolü ve isteğe bağlı
+Horizon kontrolü) ihtiyaç duyar. Servis hesabının public key'i bir kez alınıp sabitlenir
+(GET /receipts/service-account) ve her doğrulamada zorunludur; makbuzun içindeki
+service_account alanı güven kaynağı değildir.
+
+Kullanım:
+    python receipt_verifier.py --service-account G... rv1.xxx.yyy
+    python receipt_verifier.py --service-account G... --horizon https://horizon-testnet.stellar.org - < makbuzlar.txt
+"""
+import sys
+import json
+import base64
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+
+RECEIPT_VERSION = "rv1"
+RECEIPT_SIGNING_PREFIX = b"redvalid-receipt-v1."
+TESTNET_PASSPHRASE = "Test SDF Network ; September 2015"
+REQUIRED_FIELDS = ("data_hash", "tx_hash", "ledger", "reporter_wallet", "service_account", "network")
+
+
+class ReceiptError(Exception):
+    """
+    Makbuz biçimi, imzası ya da zincir kaydı beklenenle uyuşmuyor.
+    """
+
+
+def _b64url_decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def decode_receipt(receipt: str) -> Dict[str, Any]:
+    """
+    Makbuzu imzasını kontrol etmeden çözer.
+    """
+    try:
+        version, encoded, _ = receipt.strip().split(".")
+        if version != RECEIPT_VERSION:
+            raise ReceiptError(f"Desteklenmeyen makbuz sürümü: {version}")
+        payload = json.loads(_b64url_decode(encoded))
+    except ReceiptError:
+        raise
+    except Exception as e:
+        raise ReceiptError(f"Makbuz çözülemedi: {e}") from e
+
+    missing = [field for field in REQUIRED_FIELDS if field not in payload]
+    if missing:
+        raise ReceiptError(f"Makbuzda eksik alan: {', '.join(missing)}")
+    return payload
+
+
+def verify_receipt(
+    receipt: str,
+    service_account: str,
+    network_passphrase: str = TESTNET_PASSPHRASE,
+) -> Dict[str, Any]:
+    """
+    İmzayı sabitlenmiş servis hesabına ve ağa göre çevrimdışı kontrol eder; geçerliyse payload'u döner.
+    Makbuzdaki anahtarla kontrol edilmez: herkes kendi anahtarıyla tutarlı bir makbuz üretebilir.
+    """
+    from stellar_sdk import Keypair
+    from stellar_sdk.exceptions import BadSignatureError
+
+    if not service_account:
+        raise ReceiptError("Sabitlenmiş servis hesabı gerekli")
+
+    payload = decode_receipt(receipt)
+    signer = service_account
+    if payload["service_account"] != signer:
+        raise ReceiptError(f"Makbuz başka bir hesap tarafından imzalanmış: {payload['service_account']}")
+    if payload["network"] != network_passphrase:
+        raise ReceiptError(f"Makbuz başka bir ağ için: {payload['network']}")
+
+    _, encoded, signature = receipt.strip().split(".")
+    try:
+        Keypair.from_public_key(signer).verify(RECEIPT_SIGNING_PREFIX + encoded.encode("ascii"), _b64url_decode(signature))
+    except BadSignatureError as e:
+        raise ReceiptError("İmza geçersiz") from e
+    return payload
+
+
+def recheck_on_horizon(payload: Dict[str, Any], horizon_url: str, timeout: float = 10) -> Dict[str, Any]:
+    """
+    Makbuzdaki işlemi Horizon'dan okuyup memo, ledger, kaynak hesap ve muhabiri karşılaştırır.
+    Döner: Horizon işlem kaydı.
+    """
+    import requests
+    from stellar_sdk import FeeBumpTransactionEnvelope, TransactionBuilder
+
+    response = requests.get(f"{horizon_url.rstrip('/')}/transactions/{payload['tx_hash']}", timeout=timeout)
+    if response.status_code == 404:
+        raise ReceiptError("İşlem zincirde bulunamadı")
+    response.raise_for_status()
+    tx = response.json()
+
+    if not tx.get("successful"):
+        raise ReceiptError("İşlem başarısız olarak kaydedilmiş")
+    if int(tx["ledger"]) != int(payload["ledger"]):
+        raise ReceiptError(f"Ledger uyuşmuyor: zincirde {tx['ledger']}, makbuzda {payload['ledger']}")
+    if tx.get("memo_type") != "hash" or base64.b64decode(tx.get("memo", "")).hex() != payload["data_hash"]:
+        raise ReceiptError("İşlemin memo'su makbuzdaki data_hash ile uyuşmuyor")
+    if tx.get("source_account") != payload["service_account"]:
+        raise ReceiptError(f"İşlem servis hesabından gönderilmemiş: {tx.get('source_account')}")
+
+    envelope = TransactionBuilder.from_xdr(tx["envelope_xdr"], payload["network"])
+    if isinstance(envelope, FeeBumpTransactionEnvelope):
+        envelope = envelope.transaction.inner_transaction_envelope
+    operations = envelope.transaction.operations
+    reporter = operations[0].source.account_id if operations and operations[0].source else None
+    if reporter != payload["reporter_wallet"]:
+        raise ReceiptError(f"İşlemdeki muhabir makbuzla uyuşmuyor: {reporter}")
+    return tx
+
+
+def verify_receipts(
+    receipts: Iterable[str],
+    service_account: str,
+    network_passphrase: str = TESTNET_PASSPHRASE,
+    horizon_url: Optional[str] = None,
+    expected_data_hash: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Makbuzları sırayla doğrular; her biri için {"valid", "payload" | "error"} döner.
+    """
+    results = []
+    for receipt in receipts:
+        try:
+            payload = verify_receipt(receipt, service_account, network_passphrase)
+            if expected_data_hash and payload["data_hash"] != expected_data_hash.lower():
+                raise ReceiptError("Makbuz bu data_hash için değil")
+            if horizon_url:
+                recheck_on_horizon(payload, horizon_url)
+            results.append({"valid": True, "payload": payload})
+        except ReceiptError as e:
+            results.append({"valid": False, "error": str(e)})
+        except Exception as e:
+            results.append({"valid": False, "error": f"Kontrol tamamlanamadı: {e}"})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RedValid doğrulama makbuzlarını çevrimdışı (isteğe bağlı Horizon ile) doğrula.")
+    parser.add_argument("receipts", nargs="+", help="Makbuz(lar); '-' ile stdin'den satır başına bir makbuz")
+    parser.add_argument("--service-account", required=True,
+                        help="Sabitlenmiş servis hesabı (G...; GET /receipts/service-account)")
+    parser.add_argument("--network", default=TESTNET_PASSPHRASE, help="Ağ passphrase'i")
+    parser.add_argument("--horizon", help="Verilirse işlem bu Horizon'dan tekrar kontrol edilir")
+    parser.add_argument("--data-hash", help="Makbuzun bu data_hash için olduğunu da kontrol et")
+    args = parser.parse_args()
+
+    receipts = []
+    for value in args.receipts:
+        if value == "-":
+            receipts.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            receipts.append(value)
+
+    results = verify_receipts(receipts, args.service_account, args.network, args.horizon, args.data_hash)
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    sys.exit(0 if all(result["valid"] for result in results) else 1)
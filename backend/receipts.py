@@ -0,0 +1,87 @@
+import json
+import time
+import base64
+import logging
+from datetime import datetime
+from typing import Optional, Union
+
+from stellar_utils import NETWORK_PASSPHRASE, get_service_keypair, get_service_public_key
+
+logger = logging.getLogger(__name__)
+
+# Makbuz biçimi: "rv1.<payload>.<imza>" (base64url, padding'siz).
+# İmza servis anahtarıyla (ed25519) RECEIPT_SIGNING_PREFIX + payload üzerine atılır;
+# önek, aynı anahtarın imzaladığı Stellar işlemleriyle karışmayı önler.
+# Doğrulama tarafı receipt_verifier.py'dedir ve backend'e bağımlı değildir.
+RECEIPT_VERSION = "rv1"
+RECEIPT_SIGNING_PREFIX = b"redvalid-receipt-v1."
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _timestamp(value: Union[str, datetime, None]) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return value
+
+
+def issue_receipt(
+    data_hash: str,
+    tx_hash: str,
+    ledger: int,
+    reporter_wallet: str,
+    anchored_at: Union[str, datetime, None] = None,
+) -> str:
+    """
+    Zincire yazılmış bir kayıt için servis anahtarıyla imzalı makbuz üretir.
+    anchored_at: ledger kapanış zamanı (Horizon created_at, UTC).
+    """
+    payload = {
+        "v": 1,
+        "data_hash": data_hash,
+        "tx_hash": tx_hash,
+        "ledger": int(ledger),
+        "reporter_wallet": reporter_wallet,
+        "anchored_at": _timestamp(anchored_at),
+        "issued_at": int(time.time()),
+        "service_account": get_service_public_key(),
+        "network": NETWORK_PASSPHRASE,
+    }
+    # Kanonik JSON: doğrulayıcı imzayı payload'un kendisi üzerinden kontrol eder,
+    # yeniden serileştirme gerekmez
+    encoded = _b64url(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    signature = get_service_keypair().sign(RECEIPT_SIGNING_PREFIX + encoded.encode("ascii"))
+    return f"{RECEIPT_VERSION}.{encoded}.{_b64url(signature)}"
+
+
+def transaction_anchors(tx: dict, data_hash: str) -> bool:
+    """
+    Horizon işlem kaydı başarılı ve HashMemo'su (base64) data_hash ise True.
+    """
+    if tx.get("successful") is not True or tx.get("memo_type") != "hash" or not tx.get("memo"):
+        return False
+    return base64.b64decode(tx["memo"]).hex() == data_hash.lower()
+
+
+def receipt_from_transaction(video, tx: dict) -> Optional[str]:
+    """
+    Horizon işlem kaydından (submit sonucu ya da /transactions/{hash}) makbuz üretir.
+    Servis anahtarı yapılandırılmamışsa ya da işlem bu videonun data_hash'ini zincire
+    yazmamışsa (başarısız işlem, farklı memo) None; makbuz yanıtın isteğe bağlı bir parçasıdır.
+    """
+    if not transaction_anchors(tx, video.data_hash):
+        logger.warning(f"Makbuz üretilmedi ({video.id}): işlem {tx.get('hash')} data_hash'i doğrulamıyor")
+        return None
+    try:
+        return issue_receipt(
+            data_hash=video.data_hash,
+            tx_hash=tx["hash"],
+            ledger=tx["ledger"],
+            reporter_wallet=video.reporter_wallet,
+            anchored_at=tx.get("created_at"),
+        )
+    except Exception as e:
+        logger.warning(f"Makbuz üretilemedi ({video.id}): {e}")
+        return None
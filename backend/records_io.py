@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import gzip
+import zlib
+import logging
+import argparse
+from uuid import UUID
+from datetime import datetime
+from typing import Iterable, Iterator, List, Dict, Any, Optional, TextIO
+
+from sqlalchemy import select, DateTime, Uuid, Table
+from sqlmodel import Session
+from dotenv import load_dotenv
+
+from db import engine, create_db_and_tables, insert_ignore_conflicts
+from models import Reporter, Video, HexBinary, normalize_hex_hash
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Sunucu tarafı cursor'dan bir seferde çekilen satır sayısı
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Toplu içe aktarmada tek INSERT ile yazılan satır sayısı
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+# Dışa aktarma sırası: içe aktarmada FK'ler için önce muhabirler yazılır
+EXPORT_TABLES = {
+    "reporter": Reporter.__table__,
+    "video": Video.__table__,
+}
+# Eksik ya da null gelirse kaydın atlandığı alanlar (video.reporter_id cüzdan üzerinden eşlenir)
+REQUIRED_COLUMNS = {
+    "reporter": ("full_name", "wallet_address"),
+    "video": ("video_url", "platform", "data_hash", "reporter_wallet"),
+}
+
+
+# ---------------------
+# EXPORT
+# ---------------------
+def _encode_row(table: Table, row) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"type": table.name}
+    for column in table.columns:
+        value = row._mapping[column]
+        if isinstance(value, UUID):
+            value = str(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        record[column.name] = value
+    return record
+
+
+def iter_export_records(session: Session) -> Iterator[Dict[str, Any]]:
+    """
+    Tabloları sunucu tarafı cursor ile (stream_results) EXPORT_BATCH_SIZE'lık parçalar halinde gezer.
+    ORM nesnesi oluşturulmaz; bellek kullanımı tablo boyutundan bağımsızdır.
+    """
+    connection = session.connection().execution_options(
+        stream_results=True, yield_per=EXPORT_BATCH_SIZE
+    )
+    for table in EXPORT_TABLES.values():
+        result = connection.execute(select(table).order_by(table.c.created_at, table.c.id))
+        for row in result:
+            yield _encode_row(table, row)
+
+
+def iter_export_lines(session: Session, compress: bool = False) -> Iterator[bytes]:
+    """
+    NDJSON satırları üretir. compress=True ise çıktı parça parça gzip'lenir.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 → gzip başlığı
+    buffer: List[bytes] = []
+
+    for record in iter_export_records(session):
+        buffer.append(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        if len(buffer) >= EXPORT_BATCH_SIZE:
+            chunk = b"".join(buffer)
+            buffer.clear()
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_records(output_path: Optional[str], compress: bool = False) -> None:
+    with Session(engine) as session:
+        if output_path is None:
+            # echo=True SQL loglarını stdout'a yazar; NDJSON çıktısına karışmasın
+            engine.echo = False
+            for chunk in iter_export_lines(session, compress=compress):
+                sys.stdout.buffer.write(chunk)
+            return
+
+        with open(output_path, "wb") as f:
+            for chunk in iter_export_lines(session, compress=compress):
+                f.write(chunk)
+
+
+# ---------------------
+# IMPORT
+# ---------------------
+def _decode_record(table: Table, record: Dict[str, Any]) -> Dict[str, Any]:
+    missing = [name for name in REQUIRED_COLUMNS.get(table.name, ()) if record.get(name) is None]
+    if missing:
+        raise ValueError(f"zorunlu alan eksik: {', '.join(missing)}")
+
+    row: Dict[str, Any] = {}
+    for column in table.columns:
+        if column.name not in record:
+            continue
+        value = record[column.name]
+        if value is not None:
+            if isinstance(column.type, Uuid):
+                value = UUID(value)
+            elif isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, HexBinary):
+                # DB'den okunan hash'ler küçük harf hex döner; tekrar kontrolü aynı biçimle yapılır
+                value = normalize_hex_hash(value)
+        row[column.name] = value
+    return row
+
+
+def _decode_records(table: Table, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Çözülemeyen kayıtlar (eksik zorunlu alan, geçersiz hash, UUID ya da tarih) batch'i düşürmez;
+    atlanıp loglanır.
+    """
+    rows = []
+    for record in records:
+        try:
+            rows.append(_decode_record(table, record))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Geçersiz kayıt atlandı ({table.name} {record.get('id')}): {e}")
+    return rows
+
+
+def _import_reporters(session: Session, records: List[Dict[str, Any]]) -> int:
+    table = EXPORT_TABLES["reporter"]
+    rows = _decode_records(table, records)
+    if not rows:
+        return 0
+    result = session.execute(insert_ignore_conflicts(table), rows)
+    return max(result.rowcount, 0)
+
+
+def _import_videos(session: Session, records: List[Dict[str, Any]]) -> int:
+    table = EXPORT_TABLES["video"]
+    rows = _decode_records(table, records)
+
+    # data_hash unique kısıt değil; mevcut ve batch içi tekrarları önceden ayıkla
+    hashes = {row["data_hash"] for row in rows}
+    existing_hashes = set(session.execute(
+        select(table.c.data_hash).where(table.c.data_hash.in_(hashes))
+    ).scalars())
+
+    # Muhabir farklı id ile zaten kayıtlıysa reporter_id cüzdan üzerinden eşlenir
+    wallets = {row["reporter_wallet"] for row in rows}
+    reporter_table = EXPORT_TABLES["reporter"]
+    reporter_ids = dict(session.execute(
+        select(reporter_table.c.wallet_address, reporter_table.c.id)
+        .where(reporter_table.c.wallet_address.in_(wallets))
+    ).all())
+
+    pending = []
+    for row in rows:
+        if row["data_hash"] in existing_hashes:
+            continue
+        reporter_id = reporter_ids.get(row["reporter_wallet"])
+        if reporter_id is None:
+            logger.warning(f"Muhabir bulunamadı, video atlandı: {row.get('video_url')}")
+            continue
+        row["reporter_id"] = reporter_id
+        existing_hashes.add(row["data_hash"])
+        pending.append(row)
+
+    if not pending:
+        return 0
+    result = session.execute(insert_ignore_conflicts(table), pending)
+    return max(result.rowcount, 0)
+
+
+def import_records(session: Session, lines: Iterable[str], batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    NDJSON kayıtlarını batch'ler halinde yazar; her batch tek INSERT + tek commit'tir.
+    video_url / PK çakışmaları ON CONFLICT DO NOTHING ile, data_hash tekrarları
+    önceden yapılan tek bir IN sorgusuyla atlanır.
+    """
+    importers = {"reporter": _import_reporters, "video": _import_videos}
+    stats = {"read": 0, "inserted": 0}
+    batches: Dict[str, List[Dict[str, Any]]] = {name: [] for name in importers}
+
+    def flush(name: str) -> None:
+        if batches[name]:
+            stats["inserted"] += importers[name](session, batches[name])
+            session.commit()
+            batches[name].clear()
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        record_type = record.get("type")
+        if record_type not in importers:
+            logger.warning(f"Bilinmeyen kayıt tipi atlandı: {record_type}")
+            continue
+
+        stats["read"] += 1
+        # Videolar muhabirlere bağlı; video yazmadan önce bekleyen muhabirler yazılır
+        if record_type == "video":
+            flush("reporter")
+        batches[record_type].append(record)
+        if len(batches[record_type]) >= batch_size:
+            flush(record_type)
+
+    flush("reporter")
+    flush("video")
+    stats["skipped"] = stats["read"] - stats["inserted"]
+    return stats
+
+
+def _open_text(path: str) -> TextIO:
+    with open(path, "rb") as f:
+        is_gzip = f.read(2) == b"\x1f\x8b"
+    if is_gzip:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def import_file(path: str, batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, int]:
+    create_db_and_tables()
+    with Session(engine) as session, _open_text(path) as f:
+        return import_records(session, f, batch_size=batch_size)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="RedValid doğrulama kayıtlarını NDJSON olarak dışa/içe aktar.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Reporter + Video tablolarını NDJSON olarak yaz")
+    export_parser.add_argument("-o", "--output", help="Çıktı dosyası (verilmezse stdout)")
+    export_parser.add_argument("--gzip", action="store_true", help="Çıktıyı gzip ile sıkıştır")
+
+    import_parser = subparsers.add_parser("import", help="NDJSON (veya .gz) dosyasını toplu içe aktar")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_records(args.output, compress=args.gzip)
+    else:
+        print(import_file(args.path, batch_size=args.batch_size))
@@ -0,0 +1,210 @@
+import os
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import select, delete, insert, func
+from sqlmodel import Session
+from dotenv import load_dotenv
+
+from db import engine, create_db_and_tables
+from events import video_events
+from models import Video, VideoSegment, VideoStatusEvent, VideoArchive, OnChainMemo
+from memo_indexer import index_account
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "1") == "1"
+# prepared kayıtlar imzalanmadan bu süre geçince arşive taşınır. Hazırlanan işlemin zaman
+# sınırı yoktur; muhabirin imzalayıp göndermesi için makul süreden uzun tutulmalıdır.
+RETENTION_PREPARED_TTL_HOURS = float(os.getenv("RETENTION_PREPARED_TTL_HOURS", "72"))
+RETENTION_FAILED_TTL_HOURS = float(os.getenv("RETENTION_FAILED_TTL_HOURS", "168"))
+# Her transaction'da taşınan en fazla kayıt; yazma kilidi kısa tutulur
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+# Batch'ler arasında diğer yazıcılara kilit bırakmak için bekleme
+RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv("RETENTION_BATCH_PAUSE_SECONDS", "0.05"))
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "900"))
+# Index bakımı (ANALYZE / PRAGMA optimize / incremental_vacuum) aralığı
+RETENTION_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("RETENTION_MAINTENANCE_INTERVAL_SECONDS", "86400"))
+# SQLite incremental_vacuum adımında serbest bırakılan en fazla sayfa
+RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", "2000"))
+
+# status → TTL (saat)
+RETENTION_TTL_HOURS = {
+    "prepared": RETENTION_PREPARED_TTL_HOURS,
+    "failed": RETENTION_FAILED_TTL_HOURS,
+}
+
+ARCHIVE_COLUMNS = [column.name for column in VideoArchive.__table__.columns if column.name != "archived_at"]
+
+
+def _stale_ids(session: Session, status: str, cutoff: datetime) -> List:
+    """
+    (status, created_at, id) index'i üzerinden en eski batch. Zincirde memo'su görülen
+    kayıtlar (işlem API dışında gönderilmiş) atlanır.
+    """
+    statement = select(Video.id).where(Video.status == status, Video.created_at < cutoff)
+    try:
+        account = index_account()
+    except RuntimeError:
+        # Servis hesabı yoksa memo index'i de tutulmaz
+        account = None
+    if account is not None:
+        anchored = select(OnChainMemo.memo_hash).where(
+            OnChainMemo.memo_hash == Video.data_hash,
+            OnChainMemo.source_account == account
+        )
+        statement = statement.where(~anchored.exists())
+    statement = (
+        statement
+        .order_by(Video.created_at, Video.id)
+        .limit(RETENTION_BATCH_SIZE)
+    )
+    return list(session.execute(statement).scalars())
+
+
+def archive_batch(session: Session, status: str, cutoff: datetime) -> int:
+    """
+    Tek transaction'da bir batch'i video_archive'a taşır; segment ve durum olayları silinir.
+    Seçim ile silme arasında durumu değişen (ör. imzalanıp gönderilen) kayıtlar, silme
+    koşulu tekrar kontrol edildiği için yerinde kalır. Döner: taşınan kayıt sayısı.
+    """
+    ids = _stale_ids(session, status, cutoff)
+    if not ids:
+        return 0
+
+    still_stale = (Video.id.in_(ids), Video.status == status, Video.created_at < cutoff)
+    video_ids = select(Video.id).where(*still_stale)
+    session.execute(delete(VideoSegment).where(VideoSegment.video_id.in_(video_ids)))
+    session.execute(delete(VideoStatusEvent).where(VideoStatusEvent.video_id.in_(video_ids)))
+
+    columns = [Video.__table__.c[name] for name in ARCHIVE_COLUMNS]
+    rows = session.execute(delete(Video).where(*still_stale).returning(*columns)).mappings().all()
+    if rows:
+        archived_at = datetime.utcnow()
+        session.execute(
+            insert(VideoArchive),
+            [{**row, "archived_at": archived_at} for row in rows],
+        )
+    session.commit()
+    # Durum akışını dinleyenler "archived" olayını bir sonraki kontrolü beklemeden alır
+    for row in rows:
+        video_events.notify(row["id"])
+    return len(rows)
+
+
+def run_sweep_once(session: Session, now: datetime | None = None) -> Dict[str, int]:
+    """
+    Süresi dolan prepared/failed kayıtları batch batch arşive taşır.
+    """
+    now = now or datetime.utcnow()
+    stats = {"prepared": 0, "failed": 0, "batches": 0}
+    for status, ttl_hours in RETENTION_TTL_HOURS.items():
+        cutoff = now - timedelta(hours=ttl_hours)
+        while True:
+            moved = archive_batch(session, status, cutoff)
+            if not moved:
+                break
+            stats[status] += moved
+            stats["batches"] += 1
+            if moved < RETENTION_BATCH_SIZE:
+                break
+            time.sleep(RETENTION_BATCH_PAUSE_SECONDS)
+    return stats
+
+
+def run_maintenance() -> Dict[str, int]:
+    """
+    Silinen kayıtlardan sonra planlayıcı istatistiklerini tazeler ve boş sayfaları geri verir.
+    SQLite'ta tam VACUUM tüm veritabanını kilitleyip yeniden yazdığı için burada çalışmaz;
+    auto_vacuum=INCREMENTAL ise boş sayfalar RETENTION_VACUUM_PAGES'lik adımlarla bırakılır
+    (dönüşüm için: python retention.py --vacuum). Postgres'te VACUUM autovacuum'a bırakılır.
+    """
+    stats = {"freed_pages": 0}
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA optimize")
+            if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+                before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+                # sqlite3 sürücüsü sonuç döndürmeyen pragmayı tek adım (tek sayfa) çalıştırır;
+                # her çağrı kısa bir yazma kilidi alır, arada diğer yazıcılar ilerleyebilir
+                for _ in range(min(before, RETENTION_VACUUM_PAGES)):
+                    conn.exec_driver_sql("PRAGMA incremental_vacuum(1)")
+                stats["freed_pages"] = before - conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        else:
+            for table in (Video.__table__, VideoSegment.__table__, VideoStatusEvent.__table__):
+                conn.exec_driver_sql(f"ANALYZE {table.name}")
+        conn.commit()
+    return stats
+
+
+def full_vacuum() -> None:
+    """
+    Bakım penceresi için: SQLite'ı auto_vacuum=INCREMENTAL'a çevirip tam VACUUM yapar.
+    Süresince veritabanı kilitlidir; uygulama çalışırken kullanılmamalıdır.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        else:
+            conn.exec_driver_sql("VACUUM ANALYZE")
+
+
+async def retention_loop() -> None:
+    """
+    Uygulama yaşadığı sürece RETENTION_INTERVAL_SECONDS aralıkla temizlik,
+    RETENTION_MAINTENANCE_INTERVAL_SECONDS aralıkla index bakımı yapar.
+    """
+    last_maintenance = time.monotonic()
+    while True:
+        try:
+            stats = await asyncio.to_thread(_run_in_session)
+            if stats["batches"]:
+                logger.info(f"Retention: süresi dolan kayıtlar arşivlendi: {stats}")
+        except Exception as e:
+            logger.warning(f"Retention taraması başarısız: {e}")
+
+        if time.monotonic() - last_maintenance >= RETENTION_MAINTENANCE_INTERVAL_SECONDS:
+            last_maintenance = time.monotonic()
+            try:
+                stats = await asyncio.to_thread(run_maintenance)
+                logger.info(f"Retention: index bakımı tamamlandı: {stats}")
+            except Exception as e:
+                logger.warning(f"Retention: index bakımı başarısız: {e}")
+
+        await asyncio.sleep(RETENTION_INTERVAL_SECONDS)
+
+
+def _run_in_session() -> Dict[str, int]:
+    with Session(engine) as session:
+        return run_sweep_once(session)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Süresi dolan prepared/failed videoları arşive taşı ve index bakımı yap.")
+    parser.add_argument("--maintenance", action="store_true", help="Taramadan sonra ANALYZE / incremental_vacuum çalıştır")
+    parser.add_argument("--vacuum", action="store_true", help="Tam VACUUM (SQLite'ı incremental auto_vacuum'a çevirir; DB kilitlenir)")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    engine.echo = False
+    with Session(engine) as session:
+        print(run_sweep_once(session))
+        total = session.execute(select(func.count()).select_from(VideoArchive.__table__)).scalar()
+        print("Arşivdeki kayıt sayısı:", total)
+    if args.vacuum:
+        full_vacuum()
+        print("VACUUM tamamlandı")
+    elif args.maintenance:
+        print(run_maintenance())
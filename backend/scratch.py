@@ -0,0 +1,191 @@
+import os
+import shutil
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# memfd: anonim bellek dosyası (Linux memfd_create), tmpfs: SCRATCH_TMPFS_DIR altında dosya,
+# disk: sistem temp dizini. memfd desteklenmiyorsa tmpfs, o da yoksa disk kullanılır.
+SCRATCH_MODE = os.getenv("SCRATCH_MODE", "memfd")
+SCRATCH_TMPFS_DIR = os.getenv("SCRATCH_TMPFS_DIR", "/dev/shm")
+# Bellekte (memfd/tmpfs) aynı anda tutulan scratch verisinin üst sınırı; aşılırsa dosya diske yazılır
+SCRATCH_MEMORY_BUDGET_MB = int(os.getenv("SCRATCH_MEMORY_BUDGET_MB", "512"))
+# Boşsa tempfile varsayılanı (TMPDIR)
+SCRATCH_DISK_DIR = os.getenv("SCRATCH_DISK_DIR") or None
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _memfd_supported() -> bool:
+    return hasattr(os, "memfd_create") and os.path.isdir(f"/proc/{os.getpid()}/fd")
+
+
+class ScratchBudget:
+    """
+    Bellek destekli scratch dosyalarına ayrılan byte'ları süreç genelinde sayar.
+    Rezervasyon dosya açılırken size_hint ile yapılır; ffmpeg çıktısı gibi boyutu önceden
+    bilinmeyen dosyalar için tahmindir.
+    """
+
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        self.reserved = 0
+        self.counts = {"memfd": 0, "tmpfs": 0, "disk": 0, "over_budget": 0}
+        self._lock = threading.Lock()
+
+    def try_reserve(self, size: int) -> bool:
+        with self._lock:
+            if self.reserved + size > self.limit_bytes:
+                self.counts["over_budget"] += 1
+                return False
+            self.reserved += size
+            return True
+
+    def release(self, size: int) -> None:
+        with self._lock:
+            self.reserved -= size
+
+    def record(self, kind: str) -> None:
+        with self._lock:
+            self.counts[kind] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"reserved_bytes": self.reserved, "limit_bytes": self.limit_bytes, **self.counts}
+
+
+scratch_budget = ScratchBudget(SCRATCH_MEMORY_BUDGET_MB * 1024 * 1024)
+
+
+class ScratchFile:
+    """
+    ffmpeg/moviepy'ye yol olarak verilebilen geçici dosya.
+
+    memfd dosyalarının dosya sistemi adı yoktur; path /proc/<pid>/fd/<fd> olduğundan alt
+    süreçler (ffmpeg) de açabilir. Bu yol uzantı taşımaz: ffmpeg çıktısında biçim açıkça
+    verilmelidir (-f mp4). Uzantıya bağlı araçlar için scratch_file(named=True) kullanılır.
+    """
+
+    def __init__(self, kind: str, fd: int, path: str):
+        self.kind = kind
+        self.fd = fd
+        self.path = path
+
+    def write(self, source: Union[bytes, BinaryIO]) -> int:
+        """
+        bytes ya da dosya benzeri nesnenin içeriğini dosyanın başından yazar. Döner: byte sayısı.
+        """
+        with open(self.fd, "wb", closefd=False) as f:
+            f.seek(0)
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                f.write(source)
+            else:
+                shutil.copyfileobj(source, f, COPY_CHUNK_SIZE)
+            f.truncate()
+            return f.tell()
+
+    def copy_to(self, destination: BinaryIO) -> int:
+        """
+        Dosyanın (ör. ffmpeg'in path üzerinden yazdığı) içeriğini destination'a kopyalar.
+        """
+        with open(self.path, "rb") as f:
+            shutil.copyfileobj(f, destination, COPY_CHUNK_SIZE)
+        return self.size()
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def size(self) -> int:
+        return os.fstat(self.fd).st_size
+
+
+def _choose_kind(size_hint: int, named: bool) -> str:
+    if SCRATCH_MODE not in ("memfd", "tmpfs"):
+        return "disk"
+    use_memfd = SCRATCH_MODE == "memfd" and not named and _memfd_supported()
+    if not use_memfd and not os.path.isdir(SCRATCH_TMPFS_DIR):
+        return "disk"
+    if not scratch_budget.try_reserve(size_hint):
+        logger.info(f"Scratch bellek bütçesi dolu, dosya diske yazılıyor ({size_hint} byte)")
+        return "disk"
+    return "memfd" if use_memfd else "tmpfs"
+
+
+@contextmanager
+def scratch_file(size_hint: int = 0, suffix: str = ".mp4", named: bool = False) -> Iterator[ScratchFile]:
+    """
+    Bellek destekli (memfd/tmpfs) ya da bütçe aşılırsa disk üzerinde geçici dosya açar.
+    named=True: dosyanın uzantılı gerçek bir adı olur (tmpfs ya da disk).
+    Blok nasıl biterse bitsin (hata dahil) dosya kapatılır, silinir ve bütçe serbest bırakılır.
+    """
+    kind = _choose_kind(size_hint, named)
+    reserved = size_hint if kind != "disk" else 0
+    fd: Optional[int] = None
+    path: Optional[str] = None
+    try:
+        if kind == "memfd":
+            fd = os.memfd_create(f"redvalid-scratch{suffix}", os.MFD_CLOEXEC)
+            file = ScratchFile(kind, fd, f"/proc/{os.getpid()}/fd/{fd}")
+        else:
+            directory = SCRATCH_TMPFS_DIR if kind == "tmpfs" else SCRATCH_DISK_DIR
+            fd, path = tempfile.mkstemp(suffix=suffix, prefix="redvalid_", dir=directory)
+            file = ScratchFile(kind, fd, path)
+        scratch_budget.record(kind)
+        yield file
+    finally:
+        if fd is not None:
+            os.close(fd)
+        if path is not None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if reserved:
+            scratch_budget.release(reserved)
+
+
+@contextmanager
+def scratch_dir(prefix: str = "redvalid_", size_hint: int = 0) -> Iterator[str]:
+    """
+    Birden fazla çıktı dosyası üreten ffmpeg işleri için geçici dizin: bütçe ve mod izin
+    veriyorsa SCRATCH_TMPFS_DIR altında, değilse diskte. Blok bitince dizin silinir.
+    """
+    kind = _choose_kind(size_hint, named=True)
+    reserved = size_hint if kind != "disk" else 0
+    try:
+        directory = SCRATCH_TMPFS_DIR if kind == "tmpfs" else SCRATCH_DISK_DIR
+        work_dir = tempfile.mkdtemp(prefix=prefix, dir=directory)
+        try:
+            yield work_dir
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    finally:
+        if reserved:
+            scratch_budget.release(reserved)
+
+
+def input_size(source: Union[bytes, BinaryIO]) -> int:
+    """
+    Bütçe için girdinin boyutu; seek desteklemeyen akışlarda 0.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    try:
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return size - position
+    except (AttributeError, OSError, ValueError):
+        return 0
@@ -0,0 +1,129 @@
+import os
+import csv
+import logging
+import subprocess
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import List, Dict, Any, Optional, Union
+
+from dotenv import load_dotenv
+
+from db import create_video_segments, get_segments_by_hashes
+from scratch import scratch_file, scratch_dir
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Kayıt sırasında segment hash'leri üretilsin mi
+SEGMENT_INDEX_ENABLED = os.getenv("SEGMENT_INDEX_ENABLED", "1") == "1"
+# Bir eşleşmenin kabulü için aynı hizalamayla eşleşmesi gereken en az segment sayısı.
+# Siyah ekran gibi ortak GOP'lar farklı videolarda aynı olabileceği için varsayılan 2'dir.
+SEGMENT_MIN_MATCHES = int(os.getenv("SEGMENT_MIN_MATCHES", "2"))
+SEGMENT_TIMEOUT_SECONDS = float(os.getenv("SEGMENT_TIMEOUT_SECONDS", "60"))
+
+
+def _ffmpeg_binary() -> str:
+    # moviepy'nin kullandığı ffmpeg (imageio-ffmpeg) ile aynı binary
+    from moviepy.config import FFMPEG_BINARY
+    return FFMPEG_BINARY
+
+
+def compute_segment_hashes(file: Union[str, bytes]) -> List[Dict[str, Any]]:
+    """
+    Videonun ilk video akışını yeniden encode etmeden (-c copy) her keyframe'de böler ve
+    her GOP'un sıkıştırılmış paket verisinin SHA-256'sını üretir (ffmpeg segment + streamhash).
+
+    Yayıncıların -c copy ile kestiği alıntılar keyframe'lerde başladığı için alıntının iç
+    segmentleri kaynağın segmentleriyle byte düzeyinde aynıdır. Hash'ler zaman damgası
+    içermez; alıntının konteyneri ya da zaman çizelgesi farklı olsa da eşleşir.
+
+    Döner: [{"seq", "start_time", "end_time", "segment_hash"}, ...]
+    """
+    # Girdi memfd'de, segment listesi/hash dosyaları tmpfs'te (bütçe aşılırsa diskte) tutulur
+    with ExitStack() as stack:
+        work_dir = stack.enter_context(scratch_dir(prefix="redvalid_seg_"))
+        if isinstance(file, bytes):
+            scratch = stack.enter_context(scratch_file(size_hint=len(file)))
+            scratch.write(file)
+            input_path = scratch.path
+        else:
+            input_path = file
+
+        list_path = os.path.join(work_dir, "segments.csv")
+        cmd = [
+            _ffmpeg_binary(), "-v", "error", "-nostdin",
+            "-i", input_path,
+            "-map", "0:v:0", "-c", "copy",
+            # Çok küçük segment süresi → stream copy'de her keyframe'de yeni segment (GOP başına bir)
+            "-f", "segment", "-segment_time", "0.001",
+            "-segment_format", "streamhash",
+            "-segment_format_options", "hash=sha256",
+            "-segment_list", list_path, "-segment_list_type", "csv",
+            os.path.join(work_dir, "seg%06d.txt"),
+        ]
+        completed = subprocess.run(cmd, capture_output=True, timeout=SEGMENT_TIMEOUT_SECONDS)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Segment hash üretilemedi: {completed.stderr.decode(errors='replace').strip()}")
+
+        segments = []
+        with open(list_path, newline="") as f:
+            for seq, (name, start_time, end_time) in enumerate(csv.reader(f)):
+                with open(os.path.join(work_dir, name)) as segment_file:
+                    # streamhash çıktısı: "0,v,SHA256=<hex>"
+                    segment_hash = segment_file.read().strip().rsplit("=", 1)[1]
+                segments.append({
+                    "seq": seq,
+                    "start_time": float(start_time),
+                    "end_time": float(end_time),
+                    "segment_hash": segment_hash,
+                })
+        return segments
+
+
+def index_video_segments(session, video_id, file: Union[str, bytes]) -> int:
+    """
+    Kayıtlı video için segment index'ini oluşturur. Döner: segment sayısı.
+    """
+    segments = compute_segment_hashes(file)
+    create_video_segments(session, video_id, segments)
+    logger.info(f"Video {video_id} için {len(segments)} segment index'lendi")
+    return len(segments)
+
+
+def find_excerpt_source(session, excerpt_segments: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Alıntının segment hash'lerini ters index'te (segment_hash → video) tek IN sorgusuyla arar.
+    Eşleşmeler (video, GOP sıra farkı) çiftine göre oylanır; aynı hizalamayla en çok segmenti
+    eşleşen video kaynak kabul edilir. Tüm videolar taranmaz.
+
+    Döner: {"video_id", "offset_seconds", "matched_segments", "excerpt_segments"} ya da None
+    """
+    if not excerpt_segments:
+        return None
+
+    by_hash = defaultdict(list)
+    for segment in excerpt_segments:
+        by_hash[segment["segment_hash"]].append(segment)
+
+    # (video_id, kaynak seq - alıntı seq) → [(alıntı segmenti, kaynak segmenti)]
+    votes = defaultdict(list)
+    for source in get_segments_by_hashes(session, list(by_hash)):
+        for segment in by_hash[source.segment_hash]:
+            votes[(source.video_id, source.seq - segment["seq"])].append((segment, source))
+
+    if not votes:
+        return None
+
+    (video_id, _), pairs = max(votes.items(), key=lambda item: len(item[1]))
+    if len(pairs) < min(SEGMENT_MIN_MATCHES, len(excerpt_segments)):
+        return None
+
+    # Zaman kayması ilk eşleşen segmentten hesaplanır
+    segment, source = min(pairs, key=lambda pair: pair[0]["seq"])
+    return {
+        "video_id": video_id,
+        "offset_seconds": round(source.start_time - segment["start_time"], 3),
+        "matched_segments": len(pairs),
+        "excerpt_segments": len(excerpt_segments),
+    }
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Aynı anahtarla eşzamanlı gelen işleri tek çalıştırmada birleştirir (single-flight).
+    İlk gelen (leader) işi başlatır; iş sürerken aynı anahtarla gelenler yeni bir iş
+    başlatmadan aynı sonucu (ya da hatayı) bekler. İş bitince anahtar serbest kalır;
+    sonraki istekler önbellek değil yeni bir çalıştırma görür.
+
+    İş ayrı bir task olarak çalışır: bekleyenlerden biri (leader dahil) iptal edilse de
+    diğerleri için tamamlanır. Bu yüzden iş, isteğin session'ını değil kendi session'ını
+    kullanmalıdır. Bekleyenlerin hepsi ayrılırsa (istemciler koptu, süre doldu) iş kimse
+    için çalışmasın diye task iptal edilir.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Döner: (sonuç, shared). shared=True: sonuç başka bir isteğin başlattığı işten geldi.
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.shared += 1
+            logger.info(f"{self.name} single-flight: {key} için süren işe katılındı")
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task), shared
+        finally:
+            self._leave(key, task)
+
+    def _leave(self, key: str, task: asyncio.Task) -> None:
+        remaining = self._waiters.pop(task) - 1
+        if remaining:
+            self._waiters[task] = remaining
+        elif not task.done():
+            logger.info(f"{self.name} single-flight: {key} için bekleyen kalmadı, iş iptal ediliyor")
+            # Sonraki istekler iptal edilen işe katılmasın, yeni bir çalıştırma başlatsın
+            if self._calls.get(key) is task:
+                del self._calls[key]
+            task.cancel()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Bekleyeni kalmamış (hepsi iptal edilmiş) işin hatası "never retrieved" uyarısı vermesin
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "leaders": self.leaders, "shared": self.shared}
+
+
+# Kayıt (prepare) ve doğrulama (verify/upload) işleri ayrı tutulur: aynı dosya için
+# sonuçları farklıdır. Anahtar ham içerik hash'i ya da video URL'sidir.
+registration_flights = SingleFlight("registration")
+verification_flights = SingleFlight("verification")
+# Aynı tx hash için eşzamanlı Horizon sorguları tek isteğe (tek bütçe token'ına) iner
+horizon_lookup_flights = SingleFlight("horizon_lookup")
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import builtins
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# REDVALID_IMPORT_REPORT=1 ile modül bazında import maliyeti ölçülür ve başlangıçta loglanır.
+# Not: dotenv henüz yüklenmeden okunur; değişken ortamda (shell / process manager) verilmelidir.
+IMPORT_REPORT_ENABLED = os.getenv("REDVALID_IMPORT_REPORT", "0") == "1"
+IMPORT_REPORT_LIMIT = int(os.getenv("REDVALID_IMPORT_REPORT_LIMIT", "25"))
+
+_original_import = builtins.__import__
+_timings: Dict[str, Tuple[float, float]] = {}
+_local = threading.local()
+_installed_at = None
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Göreli ya da zaten yüklenmiş modüller ölçülmez (hızlı yol)
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        # (kümülatif süre, alt importlar hariç kendi süresi)
+        _timings.setdefault(name, (elapsed, elapsed - children))
+
+
+def install_if_enabled() -> bool:
+    """
+    Etkinse builtins.__import__'u sarmalar. app.py'de diğer tüm import'lardan önce çağrılmalıdır.
+    Lazy yüklenen modüller (moviepy, stellar_sdk) ilk kullanımda ölçülmeye devam eder.
+    """
+    global _installed_at
+    if not IMPORT_REPORT_ENABLED or _installed_at is not None:
+        return False
+    _installed_at = time.perf_counter()
+    builtins.__import__ = _timed_import
+    return True
+
+
+def import_report(limit: int = IMPORT_REPORT_LIMIT) -> List[Tuple[str, float, float]]:
+    """
+    Kümülatif süreye göre sıralı (modül, kümülatif_saniye, kendi_saniye) listesi.
+    """
+    rows = [(name, total, own) for name, (total, own) in _timings.items()]
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:limit]
+
+
+def log_import_report(label: str = "startup") -> None:
+    if _installed_at is None:
+        return
+
+    since_install = time.perf_counter() - _installed_at
+    logger.info(f"Import raporu ({label}): {len(_timings)} modül, kurulumdan beri {since_install * 1000:.1f} ms")
+    for name, total, own in import_report():
+        logger.info(f"  {total * 1000:9.1f} ms  (kendi {own * 1000:8.1f} ms)  {name}")
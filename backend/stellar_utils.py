@@ -1,30 +1,61 @@
+from __future__ import annotations
+
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from typing import Optional, Tuple, List
-from stellar_sdk import (
-    TransactionBuilder, Server, Network, Keypair,
-    Asset, TransactionEnvelope, Memo, MuxedAccount
+from typing import Optional, Tuple, List, TYPE_CHECKING
+import asyncio
+
+from horizon_pool import HORIZON_URLS, SubmitOutcomeUnknown, get_horizon_pool
+from horizon_budget import HorizonBudgetExceeded
+from singleflight import horizon_lookup_flights
+from fee_oracle import (
+    get_fee_oracle,
+    FEE_BUMP_AFTER_LEDGERS,
+    FEE_MAX_BUMPS,
+    LEDGER_CLOSE_SECONDS,
+    INCLUSION_POLL_SECONDS,
 )
-from stellar_sdk.memo import HashMemo
 
-from stellar_sdk.exceptions import BadRequestError
-import asyncio
+# stellar_sdk ve PyNaCl import maliyeti yüksek; ilk kullanımda yüklenir (soğuk başlangıç).
+if TYPE_CHECKING:
+    from stellar_sdk import Keypair, Server, TransactionEnvelope
 
 # ---------------------
 # CONFIG
 # ---------------------
-HORIZON_URL = "https://horizon-testnet.stellar.org"
+HORIZON_URL = HORIZON_URLS[0]
 NETWORK_PASSPHRASE = "Test SDF Network ; September 2015"
-SERVER = Server(HORIZON_URL)
 
 load_dotenv()
 
-SERVICE_SECRET_KEY = os.environ.get("STELLAR_SECRET")
-if not SERVICE_SECRET_KEY:
-    raise RuntimeError("STELLAR_SECRET environment variable required")
 
-SERVICE_KEYPAIR = Keypair.from_secret(SERVICE_SECRET_KEY)
-SERVICE_PUBLIC_KEY = SERVICE_KEYPAIR.public_key
+# ---------------------
+# LAZY SINGLETONS
+# ---------------------
+def get_server() -> Server:
+    """
+    Sağlık skoru en iyi olan Horizon endpoint'inin istemcisi.
+    Failover/hedge gereken çağrılar doğrudan get_horizon_pool() üzerinden yapılmalıdır.
+    """
+    return get_horizon_pool().best().server
+
+
+@lru_cache(maxsize=None)
+def get_service_keypair() -> Keypair:
+    """
+    Servis (fee payer) anahtar çifti ilk kullanımda STELLAR_SECRET'tan oluşturulur.
+    """
+    from stellar_sdk import Keypair
+
+    service_secret_key = os.environ.get("STELLAR_SECRET")
+    if not service_secret_key:
+        raise RuntimeError("STELLAR_SECRET environment variable required")
+    return Keypair.from_secret(service_secret_key)
+
+
+def get_service_public_key() -> str:
+    return get_service_keypair().public_key
 
 
 # ---------------------
@@ -64,19 +95,38 @@ def mark_transaction_submitted(prepared_tx_hash: str, horizon_tx_hash: str, ledg
 # ---------------------
 # HELPERS (VALIDATION)
 # ---------------------
-def signature_hints_for_envelope(envelope: TransactionEnvelope) -> List[bytes]:
-    """
-    Envelope'daki imza hint'lerini byte listesi olarak döndür.
-    """
-    return [sig.signature_hint for sig in envelope.signatures]
-
-
-def expected_signature_hint(public_key: str) -> bytes:
+def verify_envelope_signatures(
+        envelope: TransactionEnvelope,
+        public_keys: List[str]
+) -> Tuple[bool, str]:
     """
-    Bir public key için Stellar signature hint (4 byte) üret.
+    Envelope'daki imzaları transaction hash'ine karşı ed25519 ile kriptografik olarak doğrular.
+    Her public key için hint'i eşleşen imzalardan en az biri geçerli olmalıdır.
+    Döner: (True/False, message)
     """
-    kp = Keypair.from_public_key(public_key)
-    return kp.signature_hint()
+    from stellar_sdk import Keypair
+    from nacl.signing import VerifyKey
+    from nacl.exceptions import BadSignatureError
+
+    tx_hash = envelope.hash()
+    for public_key in public_keys:
+        kp = Keypair.from_public_key(public_key)
+        hint = kp.signature_hint()
+        candidates = [sig.signature for sig in envelope.signatures if sig.signature_hint == hint]
+        if not candidates:
+            return False, f"Eksik imza (hint bulunamadı): {public_key}"
+
+        verify_key = VerifyKey(kp.raw_public_key())
+        for signature in candidates:
+            try:
+                verify_key.verify(tx_hash, signature)
+                break
+            except BadSignatureError:
+                continue
+        else:
+            return False, f"Geçersiz imza: {public_key}"
+
+    return True, "İmzalar doğrulandı"
 
 
 def validate_envelope_contents(
@@ -92,6 +142,9 @@ def validate_envelope_contents(
       - Operation.source reporter_public_key olarak ayarlanmış mı? (özel: Ping-Pong için)
     Döner: (True/False, message)
     """
+    from stellar_sdk import MuxedAccount
+    from stellar_sdk.memo import HashMemo
+
     # Memo kontrolü
     memo = envelope.transaction.memo
     if not isinstance(memo, HashMemo):
@@ -115,7 +168,7 @@ def validate_envelope_contents(
     if dest is None or amount is None:
         return False, "Operation destination/amount bilgisi eksik"
 
-    if dest != SERVICE_PUBLIC_KEY:
+    if dest != get_service_public_key():
         return False, f"Operation destination beklenen servis hesabı değil ({dest})"
 
     # Eğer spesifik bir amount bekliyorsan burayı kontrol et (örn "0.0000001")
@@ -155,17 +208,58 @@ def prepare_stellar_transaction(
     if not is_verified_reporter(reporter_public_key):
         raise PermissionError("Reporter KYC doğrulaması yok")
 
-    account = SERVER.load_account(SERVICE_PUBLIC_KEY)
+    account = _load_service_account()
+    return _build_prepared_transaction(account, reporter_public_key, data_hash)
+
+
+def prepare_stellar_transactions_batch(
+    reporter_public_key: str,
+    data_hashes: List[str],
+    account=None
+) -> List[Tuple[str, str]]:
+    """
+    Aynı muhabirin birden fazla videosu için işlemleri tek bir load_account ile hazırlar.
+    Her build() servis hesabının sequence numarasını bir artırdığından envelope'lar ardışık
+    sequence numarası taşır ve Horizon'a bu sırayla gönderilmelidir.
+    account: önceden yüklenmiş servis hesabı; verilirse sequence kaldığı yerden devam eder
+    (ardışık batch'ler aynı sequence'ları tekrar kullanmaz).
+    Döner: data_hashes sırasıyla (xdr_for_reporter, prepared_tx_hash) listesi
+    """
+    if not is_verified_reporter(reporter_public_key):
+        raise PermissionError("Reporter KYC doğrulaması yok")
+
+    if not data_hashes:
+        return []
+
+    if account is None:
+        account = _load_service_account()
+    return [
+        _build_prepared_transaction(account, reporter_public_key, data_hash)
+        for data_hash in data_hashes
+    ]
+
+
+def _load_service_account():
+    service_public_key = get_service_public_key()
+    return get_horizon_pool().read(lambda server: server.load_account(service_public_key), priority="account")
+
 
+def _build_prepared_transaction(account, reporter_public_key: str, data_hash: str) -> Tuple[str, str]:
+    from stellar_sdk import TransactionBuilder, Asset
+    from stellar_sdk.memo import HashMemo
+
+    service_public_key = get_service_public_key()
+
+    # Taban ücret fee_stats'tan (önbellekli) seçilir; yoğunlukta sabit 100 stroop ile işlem kuyrukta kalır
     builder = TransactionBuilder(
         source_account=account,
         network_passphrase=NETWORK_PASSPHRASE,
-        base_fee=100
+        base_fee=get_fee_oracle().base_fee()
     )
 
     # Payment operation: source=reporter_public_key -> muhabirin imzası gerekecek
     builder.append_payment_op(
-        destination=SERVICE_PUBLIC_KEY,
+        destination=service_public_key,
         asset=Asset.native(),
         amount="0.0000001",
         source=reporter_public_key
@@ -174,11 +268,11 @@ def prepare_stellar_transaction(
     # MemoHash: Stellar binary 32 byte ister
     builder.add_memo(HashMemo(bytes.fromhex(data_hash)))
 
-    # Build transaction (servis hesabı sequence numarası ile)
+    # Build transaction (servis hesabı sequence numarası ile; account nesnesinin sequence'ı artar)
     tx = builder.build()
 
     # Servis hesabı imzalıyor (fee payer imzası)
-    tx.sign(SERVICE_KEYPAIR)
+    tx.sign(get_service_keypair())
 
     # Muhabire gönderilecek XDR (henüz muhabir imzası yok)
     xdr_for_reporter = tx.to_xdr()
@@ -201,15 +295,25 @@ def prepare_stellar_transaction(
 # ---------------------
 # BLOCKCHAIN QUERY FUNCTIONS
 # ---------------------
-async def verify_transaction_on_blockchain(tx_hash: str) -> Optional[dict]:
+async def verify_transaction_on_blockchain(tx_hash: str, priority: str = "lookup") -> Optional[dict]:
     """
     Stellar blockchain'de transaction hash ile sorgulama yapar.
+    Aynı hash için süren bir sorgu varsa ona katılınır. Horizon bütçesi bu öncelik için
+    yetmezse HorizonBudgetExceeded fırlatılır (endpoint'ler 503'e çevirir).
     """
-    try:
-        tx = await asyncio.to_thread(
-            lambda: SERVER.transactions().transaction(tx_hash).call()
+    def lookup():
+        # Idempotent okuma: yavaş endpoint'te ikinci endpoint'e hedge edilir
+        return asyncio.to_thread(
+            get_horizon_pool().read,
+            lambda server: server.transactions().transaction(tx_hash).call(),
+            priority
             )
+
+    try:
+        tx, _ = await horizon_lookup_flights.do(f"{priority}:{tx_hash}", lookup)
         return tx  # bulunduysa dict benzeri response döner
+    except HorizonBudgetExceeded:
+        raise
     except Exception:
         return None
 
@@ -217,11 +321,104 @@ async def verify_transaction_on_blockchain(tx_hash: str) -> Optional[dict]:
 # ---------------------
 # TRANSACTION SUBMIT
 # ---------------------
+async def _wait_for_inclusion(tx_hash: str, ledgers: int) -> Optional[dict]:
+    """
+    İşlem `ledgers` ledger süresi içinde ağa dahil olursa Horizon kaydını, olmazsa None döner.
+    Fee-bump edilmiş işlemler iç (inner) hash ile de sorgulanabilir.
+    """
+    deadline = asyncio.get_running_loop().time() + ledgers * LEDGER_CLOSE_SECONDS
+    while True:
+        try:
+            # Gönderilmiş işlemin takibi submit önceliğindedir
+            tx = await verify_transaction_on_blockchain(tx_hash, priority="submit")
+        except HorizonBudgetExceeded:
+            tx = None
+        if tx is not None:
+            return tx
+        if asyncio.get_running_loop().time() >= deadline:
+            return None
+        await asyncio.sleep(INCLUSION_POLL_SECONDS)
+
+
+def _build_fee_bump(envelope: TransactionEnvelope, base_fee: int):
+    """
+    Muhabir imzalı iç işlemi, ücreti servis hesabının ödediği bir fee-bump ile sarar.
+    İç işlemin imzaları değişmediği için muhabirin tekrar imzalaması gerekmez.
+    """
+    from stellar_sdk import TransactionBuilder
+
+    fee_bump = TransactionBuilder.build_fee_bump_transaction(
+        fee_source=get_service_public_key(),
+        base_fee=base_fee,
+        inner_transaction_envelope=envelope,
+        network_passphrase=NETWORK_PASSPHRASE
+    )
+    fee_bump.sign(get_service_keypair())
+    return fee_bump
+
+
+def _successful(tx: dict) -> Optional[dict]:
+    """
+    Ledger'a dahil edilen ama uygulanırken başarısız olan (ör. op_underfunded) işlem
+    kaydedilmiş sayılmaz; sequence tüketildiği için fee-bump ile de kurtarılamaz.
+    """
+    if tx.get("successful") is False:
+        print("İşlem ledger'a dahil edildi ama başarısız oldu:", tx.get("hash"), tx.get("result_xdr"))
+        return None
+    return tx
+
+
+async def submit_until_included(envelope: TransactionEnvelope) -> Optional[dict]:
+    """
+    İşlemi ledger'a dahil olmayı beklemeden (/transactions_async) gönderir ve hash'ini izler.
+    FEE_BUMP_AFTER_LEDGERS ledger içinde dahil edilmezse daha yüksek ücretli fee-bump ile
+    yeniden gönderir (en fazla FEE_MAX_BUMPS kez).
+    Döner: başarılı Horizon işlem kaydı ya da None (ledger'a girip başarısız oldu).
+    Son fee-bump'tan sonra da dahil edilmediyse SubmitOutcomeUnknown: iç işlem ve fee-bump
+    Horizon kuyruğunda olup sonradan dahil edilebilir, başarısız sayılmaz.
+    """
+    from stellar_sdk.exceptions import BadRequestError
+
+    pool = get_horizon_pool()
+    tx_hash = envelope.hash_hex()
+
+    try:
+        response = await asyncio.to_thread(pool.submit, envelope, True)
+    except BadRequestError as e:
+        if e.status != 409:
+            raise
+        # DUPLICATE: aynı işlem zaten kuyrukta (ör. muhabir isteği tekrarladı); izlemeye geçilir
+        print("İşlem zaten gönderilmiş (DUPLICATE), izleniyor:", tx_hash)
+        response = {}
+    if response.get("ledger"):
+        # Önceki bir deneme zaten ağa ulaşmış (pool hash sorgusundan dönen kayıt)
+        return _successful(response)
+
+    fee = envelope.transaction.fee // len(envelope.transaction.operations)
+    for attempt in range(FEE_MAX_BUMPS + 1):
+        tx = await _wait_for_inclusion(tx_hash, FEE_BUMP_AFTER_LEDGERS)
+        if tx is not None:
+            return _successful(tx)
+        if attempt == FEE_MAX_BUMPS:
+            break
+
+        fee = get_fee_oracle().bump_fee(fee)
+        print(f"İşlem {FEE_BUMP_AFTER_LEDGERS} ledger içinde dahil edilmedi, fee-bump ({fee} stroop):", tx_hash)
+        try:
+            await asyncio.to_thread(pool.submit, _build_fee_bump(envelope, fee), True)
+        except Exception as e:
+            # Fee-bump reddedilse de iç işlem kuyrukta olabilir; izlemeye devam edilir
+            print("Fee-bump gönderilemedi:", e)
+
+    print("İşlem izleme süresinde ağa dahil edilmedi, sonucu bilinmiyor:", tx_hash)
+    raise SubmitOutcomeUnknown(tx_hash)
+
+
 async def submit_stellar_transaction(
         signed_xdr: str,
         expected_data_hash: str,
         expected_reporter_public_key: str,
-        prepared_tx_hash: str) -> Optional[str]:
+        prepared_tx_hash: str) -> Optional[dict]:
     """
     Muhabirin imzaladığı XDR'ı alır, içeriğini ve imzaları doğrular, sonra Horizon'a gönderir.
     Parametreler:
@@ -229,8 +426,11 @@ async def submit_stellar_transaction(
       - expected_data_hash: DB'de tuttuğun data_hash (hex string)
       - expected_reporter_public_key: Muhabirin public key'i (kontrol için)
       - prepared_tx_hash: Önceden DB'de tutulan prepared hash (log/bağlantı için)
-    Döner: Horizon tarafından dönen transaction hash ya da None (hata)
+    Döner: Horizon işlem kaydı (hash, ledger, created_at) ya da None (hata)
     """
+    from stellar_sdk import TransactionEnvelope
+    from stellar_sdk.exceptions import BadRequestError
+
     try:
         envelope = TransactionEnvelope.from_xdr(signed_xdr, NETWORK_PASSPHRASE)
 
@@ -240,23 +440,19 @@ async def submit_stellar_transaction(
             print("Envelope içeri doğrulaması başarısız:", msg)
             return None
 
-        # 2) İmzaların gerçekten SERVICE ve REPORTER tarafından atıldığını kontrol et (hint)
-        hints = signature_hints_for_envelope(envelope)
-        service_hint = expected_signature_hint(SERVICE_PUBLIC_KEY)
-        reporter_hint = expected_signature_hint(expected_reporter_public_key)
-
-        if service_hint not in hints:
-            print("Eksik servis imzası (hint bulunamadı)")
-            return None
-        if reporter_hint not in hints:
-            print("Eksik reporter imzası (hint bulunamadı)")
+        # 2) İmzaların gerçekten SERVICE ve REPORTER tarafından atıldığını kriptografik olarak doğrula.
+        # Geçersiz imzalı envelope'lar Horizon'a gitmeden burada reddedilir.
+        ok, msg = verify_envelope_signatures(
+            envelope, [get_service_public_key(), expected_reporter_public_key]
+        )
+        if not ok:
+            print("İmza doğrulaması başarısız:", msg)
             return None
 
-        # NOT: hint kontrolü temel bir kontrol sağlar; ek doğrulama istersen
-        # envelope.verify([Keypair.from_public_key(...)]) gibi kriptografik doğrulama ekle.
-
-        # 3) Submit transaction (network call)
-        response = await asyncio.to_thread(SERVER.submit_transaction, envelope)
+        # 3) Submit transaction; gerekirse fee-bump ile yeniden gönderilir
+        response = await submit_until_included(envelope)
+        if response is None:
+            return None
 
         horizon_tx_hash = response.get("hash")
         ledger = response.get("ledger")
@@ -264,11 +460,13 @@ async def submit_stellar_transaction(
         # DB update: submitted
         mark_transaction_submitted(prepared_tx_hash=prepared_tx_hash, horizon_tx_hash=horizon_tx_hash, ledger=ledger)
 
-        return horizon_tx_hash
+        return response
 
     except BadRequestError as e:
         print("Stellar İşlem Hatası:", e, getattr(e, "response", None))
         return None
+    except (HorizonBudgetExceeded, SubmitOutcomeUnknown):
+        raise
     except Exception as e:
         print("Bilinmeyen Hata:", e)
         return None
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# Backend modülleri düz (paketsiz) import edilir
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def serve(handler_class):
+    """
+    Handler'ı 127.0.0.1'de rastgele bir portta arka plan thread'inde çalıştırır.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def service_keypair(monkeypatch):
+    """
+    Testlik servis anahtarı; get_service_keypair önbelleği test başında ve sonunda temizlenir.
+    """
+    from stellar_sdk import Keypair
+    from stellar_utils import get_service_keypair
+
+    keypair = Keypair.random()
+    monkeypatch.setenv("STELLAR_SECRET", keypair.secret)
+    get_service_keypair.cache_clear()
+    yield keypair
+    get_service_keypair.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def sample_clip(tmp_path_factory) -> str:
+    from segment_index import _ffmpeg_binary
+
+    path = str(tmp_path_factory.mktemp("media") / "sample.mp4")
+    subprocess.run(
+        [
+            _ffmpeg_binary(), "-v", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=duration=2:size=160x120:rate=10",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-g", "10", path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return path
+
+
+def signed_envelope(state):
+    """
+    Stand-in'deki yeni bir hesaptan imzalı, HashMemo'lu tek ödemeli işlem.
+    """
+    from stellar_sdk import Account, Keypair, TransactionBuilder, Asset
+    from stellar_sdk.memo import HashMemo
+    from horizon_standin import NETWORK_PASSPHRASE
+
+    keypair = Keypair.random()
+    account = Account(keypair.public_key, int(state.account(keypair.public_key)["sequence"]))
+    tx = (
+        TransactionBuilder(account, network_passphrase=NETWORK_PASSPHRASE, base_fee=100)
+        .append_payment_op(destination=keypair.public_key, asset=Asset.native(), amount="0.0000001")
+        .add_memo(HashMemo(bytes(32)))
+        .set_timeout(60)
+        .build()
+    )
+    tx.sign(keypair)
+    return tx
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+import app
+from admission import AdmissionRejected, VideoJobLimiter
+
+
+async def _hold(limiter, key, order, release):
+    async with limiter.slot(key):
+        order.append(key)
+        await release.wait()
+
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+def test_slots_round_robin_between_keys():
+    async def scenario():
+        limiter = VideoJobLimiter(max_concurrent=1, max_queued=10, retry_after=5)
+        order = []
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, "holder", order, release))
+        await asyncio.sleep(0)
+
+        # A'nın toplu yüklemesi B'den önce kuyruğa girer
+        tasks = [asyncio.create_task(_hold(limiter, "reporter:A", order, release)) for _ in range(3)]
+        tasks += [asyncio.create_task(_hold(limiter, "reporter:B", order, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert limiter.queued == 5
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        assert limiter.stats()["active"] == limiter.queued == 0
+        return order
+
+    assert _run(scenario()) == ["holder", "reporter:A", "reporter:B", "reporter:A", "reporter:B", "reporter:A"]
+
+
+def test_full_queue_rejects_with_retry_after():
+    async def scenario():
+        limiter = VideoJobLimiter(max_concurrent=1, max_queued=1, retry_after=7)
+        order = []
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, "a", order, release))
+        waiter = asyncio.create_task(_hold(limiter, "b", order, release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as info:
+            async with limiter.slot("c"):
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return info.value.retry_after
+
+    assert _run(scenario()) == 7
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        limiter = VideoJobLimiter(max_concurrent=1, max_queued=1, retry_after=5)
+        order = []
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, "a", order, release))
+        waiter = asyncio.create_task(_hold(limiter, "b", order, release))
+        await asyncio.sleep(0)
+
+        # İstemci vazgeçti; kuyruktaki yeri bir sonraki isteğe açılır
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.queued == 0
+        late = asyncio.create_task(_hold(limiter, "c", order, release))
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(holder, late)
+        return order
+
+    assert _run(scenario()) == ["a", "c"]
+
+
+def test_rejection_is_503_with_retry_after():
+    response = asyncio.run(app.admission_rejected_handler(None, AdmissionRejected(7)))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
@@ -0,0 +1,47 @@
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+from stellar_sdk import Account, Keypair, TransactionEnvelope
+from sqlmodel import Session, SQLModel, create_engine
+
+import stellar_utils
+from bulk_register import BulkStats, Checkpoint, register_entries
+from models import Reporter
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch, service_keypair):
+    monkeypatch.setattr(stellar_utils, "get_fee_oracle", lambda: SimpleNamespace(base_fee=lambda: 100))
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _entries(start, count):
+    return [
+        {"path": f"/clips/{i}.mp4", "size": 1, "mtime_ns": 1,
+         "data_hash": hashlib.sha256(f"data-{i}".encode()).hexdigest(),
+         "raw_hash": hashlib.sha256(f"raw-{i}".encode()).hexdigest()}
+        for i in range(start, start + count)
+    ]
+
+
+def test_chunks_continue_service_sequence(session, tmp_path):
+    reporter = Reporter(full_name="R", wallet_address=Keypair.random().public_key)
+    session.add(reporter)
+    session.commit()
+
+    account = Account(stellar_utils.get_service_public_key(), 1000)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.ndjson"))
+    stats = BulkStats()
+    # Her batch hesabı yeniden yüklemez; ikinci batch birincinin bıraktığı sequence'tan devam eder
+    assert register_entries(session, reporter, _entries(0, 2), checkpoint, stats, account)
+    assert register_entries(session, reporter, _entries(2, 2), checkpoint, stats, account)
+
+    sequences = [
+        TransactionEnvelope.from_xdr(entry["xdr_for_signing"], stellar_utils.NETWORK_PASSPHRASE).transaction.sequence
+        for entry in checkpoint.entries.values()
+    ]
+    assert sequences == [1001, 1002, 1003, 1004]
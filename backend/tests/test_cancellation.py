@@ -0,0 +1,102 @@
+import io
+import sys
+import time
+import asyncio
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import cancellation
+import hashing
+from cancellation import ClientDisconnected, DeadlineExceeded, request_scope, run_stage
+from models import Reporter, Video
+
+
+class DisconnectingRequest:
+    """
+    İstemcinin after saniye sonra bağlantıyı kapattığı istek.
+    """
+
+    method = "POST"
+    url = SimpleNamespace(path="/videos/prepare-transaction/upload")
+
+    def __init__(self, after: float):
+        self.disconnect_at = time.monotonic() + after
+
+    async def is_disconnected(self) -> bool:
+        return time.monotonic() >= self.disconnect_at
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cancel.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def slow_ffmpeg(monkeypatch):
+    """
+    validate_video yerine uzun süren bir alt süreç başlatır; başlatılan süreçler listede tutulur.
+    """
+    monkeypatch.setattr(subprocess, "Popen", cancellation._TrackedPopen)
+    monkeypatch.setattr(cancellation, "DISCONNECT_POLL_SECONDS", 0.05)
+    processes = []
+
+    def validate_video(file):
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        processes.append(process)
+        process.wait()
+        return True, {"hash": "ab" * 32}
+
+    monkeypatch.setattr(hashing, "validate_video", validate_video)
+    return processes
+
+
+async def _register(request, session, reporter, deadline_seconds=60):
+    async with request_scope(request, deadline_seconds):
+        data_hash = await run_stage(
+            "validate", hashing.generate_hash_from_video_file, io.BytesIO(b"video"), session, "00" * 32
+        )
+        return await run_stage(
+            "prepare",
+            hashing.process_video_preparation,
+            session=session,
+            data_hash=data_hash,
+            video_identifier="uploaded_video",
+            reporter=reporter,
+        )
+
+
+def _reporter(session):
+    reporter = Reporter(full_name="R", wallet_address="G" + "A" * 55)
+    session.add(reporter)
+    session.commit()
+    return reporter
+
+
+def test_disconnect_kills_subprocess_and_creates_no_video(session, slow_ffmpeg):
+    reporter = _reporter(session)
+
+    start = time.monotonic()
+    with pytest.raises(ClientDisconnected):
+        asyncio.run(_register(DisconnectingRequest(after=0.3), session, reporter))
+
+    # ffmpeg 30 sn uyuyacaktı; iptal onu öldürür ve kayıt aşamasına geçilmez
+    assert time.monotonic() - start < 5
+    assert len(slow_ffmpeg) == 1
+    assert slow_ffmpeg[0].poll() is not None
+    assert session.exec(select(Video)).all() == []
+
+
+def test_request_deadline_kills_subprocess(session, slow_ffmpeg):
+    reporter = _reporter(session)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(_register(DisconnectingRequest(after=60), session, reporter, deadline_seconds=0.3))
+
+    assert slow_ffmpeg[0].poll() is not None
+    assert session.exec(select(Video)).all() == []
@@ -0,0 +1,106 @@
+import json
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+import app
+import db
+import retention
+from models import Reporter, VideoStatusEvent
+
+
+class ConnectedRequest:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(app, "engine", engine)
+    monkeypatch.setattr(db, "GROUP_COMMIT_ENABLED", False)
+    # Periyodik kontrol testten uzun; olaylar yalnızca hub ile gelirse akış ilerler
+    monkeypatch.setattr(app, "EVENTS_POLL_SECONDS", 30)
+    return engine
+
+
+@pytest.fixture
+def video(engine):
+    with Session(engine) as session:
+        reporter = Reporter(full_name="R", wallet_address="G" + "A" * 55)
+        session.add(reporter)
+        session.commit()
+        return db.create_video_record(
+            session, reporter.id, "https://example.com/v", "web", "ab" * 32,
+            reporter_wallet=reporter.wallet_address
+        )
+
+
+def _parse(chunk: str) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return {**fields, "data": json.loads(fields["data"])}
+
+
+async def _collect(stream, write=None) -> list:
+    """
+    retry satırından sonraki olayları akış kapanana kadar toplar; write ilk olaydan sonra
+    worker thread'de çalışır.
+    """
+    assert (await stream.__anext__()).startswith("retry:")
+    events = []
+    async for chunk in stream:
+        events.append(_parse(chunk))
+        if write is not None:
+            await asyncio.to_thread(write)
+            write = None
+    return events
+
+
+def _event_ids(engine, video_id) -> list:
+    with Session(engine) as session:
+        return [event.id for event in db.get_status_events_after(session, video_id)]
+
+
+def test_hub_wakes_stream_without_polling(engine, video):
+    def verify():
+        with Session(engine) as session:
+            db.update_video_status(session, video.id, status="verified", tx_hash="cd" * 32)
+
+    stream = app._video_event_stream(ConnectedRequest(), video.id, None, {})
+    events = asyncio.run(asyncio.wait_for(_collect(stream, verify), timeout=5))
+
+    assert [event["data"]["status"] for event in events] == ["prepared", "verified"]
+    assert events[1]["data"]["tx_hash"] == "cd" * 32
+
+
+def test_last_event_id_replays_only_missed_events(engine, video):
+    with Session(engine) as session:
+        db.update_video_status(session, video.id, status="sending")
+        db.update_video_status(session, video.id, status="verified")
+    first, *missed = _event_ids(engine, video.id)
+
+    stream = app._video_event_stream(ConnectedRequest(), video.id, first, {})
+    events = asyncio.run(asyncio.wait_for(_collect(stream), timeout=5))
+
+    assert [int(event["id"]) for event in events] == missed
+    assert [event["data"]["status"] for event in events] == ["sending", "verified"]
+
+
+def test_archived_video_closes_stream(engine, video):
+    def archive():
+        with Session(engine) as session:
+            assert retention.archive_batch(session, "prepared", datetime.utcnow() + timedelta(hours=1)) == 1
+
+    with Session(engine) as session:
+        db.update_video_status(session, video.id, status="prepared")
+    first = _event_ids(engine, video.id)[0]
+
+    stream = app._video_event_stream(ConnectedRequest(), video.id, first, {})
+    events = asyncio.run(asyncio.wait_for(_collect(stream, archive), timeout=5))
+
+    assert [event["event"] for event in events] == ["status", "archived"]
+    with Session(engine) as session:
+        assert session.get(VideoStatusEvent, first) is None
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from group_commit import GroupCommitWriter
+from models import Reporter
+
+
+def test_writer_survives_loop_error(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'gc.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    writer = GroupCommitWriter(engine, window_ms=1)
+
+    def broken_collect(item):
+        raise RuntimeError("collect bozuldu")
+
+    # _commit_batch dışındaki bir hata çağırana döner, thread ayakta kalır
+    monkeypatch.setattr(writer, "_collect", broken_collect)
+    with pytest.raises(RuntimeError):
+        writer.submit(lambda session: 1)
+    monkeypatch.undo()
+
+    assert writer._thread.is_alive()
+    assert writer.submit(lambda session: 2) == 2
+    writer.stop()
+
+
+def test_concurrent_writes_share_commits(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'gc.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    writer = GroupCommitWriter(engine, window_ms=20)
+
+    def write(i):
+        def add(session):
+            reporter = Reporter(full_name=f"R{i}", wallet_address=f"G{i:055d}")
+            session.add(reporter)
+            return reporter
+
+        reporter = writer.submit(add)
+        # submit döndüğünde yazım commit edilmiştir: başka bir bağlantıdan görünür
+        with Session(engine) as session:
+            return session.get(Reporter, reporter.id) is not None
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        durable = list(pool.map(write, range(64)))
+    writer.stop()
+
+    assert all(durable)
+    assert writer.writes == 64
+    assert writer.commits < writer.writes
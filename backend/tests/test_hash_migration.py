@@ -0,0 +1,78 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.schema import CreateTable
+from sqlmodel import Session, SQLModel, create_engine
+
+import db
+from models import Video
+
+DATA_HASH = "ab" * 32
+RAW_HASH = "cd" * 32
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(db, "engine", engine)
+    return engine
+
+
+def _create_text_schema(engine):
+    # HexBinary'den önceki şema: hash kolonları hex metin (VARCHAR)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            conn.exec_driver_sql(str(CreateTable(table).compile(engine)).replace(" BLOB", " VARCHAR"))
+
+
+def _insert_legacy_video(engine, data_hash, raw_hash=None):
+    reporter_id, video_id = uuid4(), uuid4()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO reporter (id, created_at, full_name, wallet_address, kyc_verified) VALUES (?, ?, ?, ?, 0)",
+            (reporter_id.hex, "2026-01-01 00:00:00.000000", "R", f"G{video_id.hex}"),
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO video (id, created_at, video_url, platform, data_hash, raw_hash, reporter_wallet, status,"
+            " verified, reporter_id) VALUES (?, ?, ?, 'web', ?, ?, ?, 'prepared', 0, ?)",
+            (video_id.hex, "2026-01-01 00:00:00.000000", f"https://example.com/{video_id}", data_hash, raw_hash,
+             f"G{video_id.hex}", reporter_id.hex),
+        )
+    return video_id
+
+
+def _column_types(engine, video_id):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            "SELECT typeof(data_hash), typeof(raw_hash), typeof(tx_hash) FROM video WHERE id = ?", (video_id.hex,)
+        ).one()
+
+
+def test_text_hashes_are_migrated_to_blob(engine):
+    _create_text_schema(engine)
+    video_id = _insert_legacy_video(engine, DATA_HASH, RAW_HASH)
+    assert _column_types(engine, video_id) == ("text", "text", "null")
+
+    db.create_db_and_tables()
+
+    assert _column_types(engine, video_id) == ("blob", "blob", "null")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA user_version").scalar() == db.HASH_SCHEMA_VERSION
+        assert conn.exec_driver_sql("SELECT length(data_hash) FROM video").scalar() == 32
+    with Session(engine) as session:
+        video = session.get(Video, video_id)
+        assert (video.data_hash, video.raw_hash, video.tx_hash) == (DATA_HASH, RAW_HASH, None)
+        assert db.get_video_by_data_hash(session, DATA_HASH).id == video_id
+
+
+def test_invalid_hash_is_left_as_text_and_migration_runs_once(engine):
+    _create_text_schema(engine)
+    valid_id = _insert_legacy_video(engine, DATA_HASH)
+    invalid_id = _insert_legacy_video(engine, "not-a-hash")
+
+    db.create_db_and_tables()
+    assert _column_types(engine, valid_id)[0] == "blob"
+    assert _column_types(engine, invalid_id)[0] == "text"
+
+    # user_version işaretlendi; sonraki açılışta tablolar taranmaz
+    assert db._migrate_hash_columns() == {}
@@ -0,0 +1,196 @@
+import time
+
+import pytest
+
+import horizon_budget
+import horizon_pool
+from horizon_budget import HorizonBudgetExceeded
+from horizon_pool import SubmitOutcomeUnknown
+from conftest import serve, signed_envelope
+from horizon_pool import HorizonPool
+from horizon_standin import HorizonState, make_handler, start_standin
+
+
+def root(server):
+    return server.root().call()
+
+
+@pytest.fixture
+def standins():
+    servers = []
+
+    def start(**kwargs):
+        server, state = start_standin(**kwargs)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}", state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_slow_read_is_hedged_to_second_endpoint(standins):
+    slow_url, _ = standins(latency_ms=1500)
+    fast_url, _ = standins()
+    pool = HorizonPool([slow_url, fast_url], hedge_delay=0.1)
+    for endpoint in pool.endpoints:
+        endpoint.server  # istemci kurulumu ölçüme girmesin
+
+    start = time.monotonic()
+    assert pool.read(root)["horizon_version"] == "standin"
+    assert time.monotonic() - start < 1.0
+
+    # Hedge kazananı gecikme ortalamasıyla öne geçer; sonraki okuma doğrudan ona gider
+    time.sleep(1.6)
+    slow, fast = pool.endpoints
+    assert fast.latency < slow.latency
+    assert pool._candidates()[0] is fast
+
+
+def test_fast_read_is_not_hedged(standins):
+    first_url, _ = standins()
+    second_url, _ = standins()
+    pool = HorizonPool([first_url, second_url], hedge_delay=0.5)
+
+    pool.read(root)
+    first, second = pool.endpoints
+    assert first.latency > 0
+    assert second.latency == 0.0
+
+
+def test_breaker_opens_and_half_opens(standins, monkeypatch):
+    monkeypatch.setattr(horizon_pool, "HORIZON_BREAKER_COOLDOWN_SECONDS", 0.3)
+    failing_url, _ = standins(fail_rate=1.0)
+    healthy_url, _ = standins()
+    pool = HorizonPool([failing_url, healthy_url], hedge_delay=5)
+    failing, healthy = pool.endpoints
+
+    # Başarısız endpoint'ten sonra okuma sağlıklı olana geçer (failover)
+    for _ in range(horizon_pool.HORIZON_BREAKER_THRESHOLD):
+        with pytest.raises(Exception):
+            pool._call(failing, root)
+    assert failing.state == "open"
+
+    # Açık devre aday listesinde yer almaz
+    assert pool.read(root)["horizon_version"] == "standin"
+    assert pool._candidates() == [healthy]
+    assert failing.consecutive_failures == horizon_pool.HORIZON_BREAKER_THRESHOLD
+
+    time.sleep(0.35)
+    assert failing.state == "half_open"
+    # Half-open'da aynı anda tek deneme isteği geçer
+    assert failing.try_acquire()
+    assert not failing.try_acquire()
+
+    # Başarısız deneme devreyi yeniden açar
+    with pytest.raises(Exception):
+        pool._call(failing, root)
+    assert failing.state == "open"
+
+
+def test_half_open_probe_success_closes_breaker(monkeypatch):
+    monkeypatch.setattr(horizon_pool, "HORIZON_BREAKER_COOLDOWN_SECONDS", 0.2)
+    outage = {"active": True}
+
+    class FlakyHandler(make_handler(HorizonState())):
+        def _inject(self):
+            if outage["active"]:
+                self._send(503, {"status": 503, "title": "Service Unavailable (injected)"})
+                return False
+            return super()._inject()
+
+    server = serve(FlakyHandler)
+    pool = HorizonPool([f"http://127.0.0.1:{server.server_port}"])
+    endpoint = pool.endpoints[0]
+    try:
+        for _ in range(horizon_pool.HORIZON_BREAKER_THRESHOLD):
+            with pytest.raises(Exception):
+                pool.read(root)
+        assert endpoint.state == "open"
+
+        outage["active"] = False
+        time.sleep(0.25)
+        assert endpoint.state == "half_open"
+        # Deneme isteği başarılı: devre kapanır
+        assert pool.read(root)["horizon_version"] == "standin"
+        assert endpoint.state == "closed"
+        assert endpoint.consecutive_failures == 0
+    finally:
+        server.shutdown()
+
+
+def test_submit_fails_over_on_error():
+    state = HorizonState(ledger_seconds=0.05)
+    broken = serve(make_handler(state, fail_rate=1.0))
+    healthy = serve(make_handler(state))
+    try:
+        pool = HorizonPool([f"http://127.0.0.1:{broken.server_port}", f"http://127.0.0.1:{healthy.server_port}"])
+        envelope = signed_envelope(state)
+        response = pool.submit(envelope)
+        assert response["hash"] == envelope.hash_hex()
+        assert dict(state.results) == {"tx_success": 1}
+    finally:
+        broken.shutdown()
+        healthy.shutdown()
+
+
+def test_submit_checks_hash_before_resending(monkeypatch):
+    # İlk endpoint işlemi alıp uygular ama yanıtı istemcinin zaman aşımından sonra gelir.
+    # İkinci endpoint'e tekrar gönderilmeden önce hash sorgulanmalı, işlem bulunmalıdır.
+    monkeypatch.setattr(horizon_pool, "HORIZON_SUBMIT_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(horizon_budget, "HORIZON_BUDGET_ENABLED", True)
+    state = HorizonState(ledger_seconds=0.05)
+    slow = serve(make_handler(state, latency_ms=500))
+    lagging = serve(make_handler(state, latency_ms=600))
+    try:
+        pool = HorizonPool([f"http://127.0.0.1:{slow.server_port}", f"http://127.0.0.1:{lagging.server_port}"])
+        envelope = signed_envelope(state)
+        response = pool.submit(envelope)
+
+        assert response["hash"] == envelope.hash_hex()
+        assert response["ledger"]
+        # Tek başarılı gönderim; ikinci endpoint'e tekrar gönderilmedi (tx_duplicate yok)
+        assert dict(state.results) == {"tx_success": 1}
+        assert pool.endpoints[0].consecutive_failures == 1
+        # Gönderim + hash sorgusu: istek başına bir token
+        assert [endpoint.budget.granted["submit"] for endpoint in pool.endpoints] == [1, 1]
+    finally:
+        slow.shutdown()
+        lagging.shutdown()
+
+
+def test_single_endpoint_timeout_reports_unknown_outcome(monkeypatch):
+    # Tek endpoint'te zaman aşımı: işlem uygulanmış olabilir, ham bağlantı hatası dönmemeli
+    monkeypatch.setattr(horizon_pool, "HORIZON_SUBMIT_TIMEOUT_SECONDS", 0.2)
+    state = HorizonState(ledger_seconds=0.05)
+    slow = serve(make_handler(state, latency_ms=500))
+    try:
+        pool = HorizonPool([f"http://127.0.0.1:{slow.server_port}"])
+        envelope = signed_envelope(state)
+        with pytest.raises(SubmitOutcomeUnknown) as info:
+            pool.submit(envelope)
+        assert info.value.tx_hash == envelope.hash_hex()
+    finally:
+        slow.shutdown()
+
+
+@pytest.mark.parametrize("timed_out_first", [True, False])
+def test_submit_budget_error_reports_unknown_outcome(monkeypatch, timed_out_first):
+    # Bütçe, zaman aşımına uğramış bir denemeden sonra tükenirse işlem ağa ulaşmış olabilir
+    monkeypatch.setattr(horizon_pool, "HORIZON_SUBMIT_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(horizon_budget, "HORIZON_BUDGET_ENABLED", True)
+    state = HorizonState(ledger_seconds=0.05)
+    slow = serve(make_handler(state, latency_ms=500))
+    exhausted = serve(make_handler(state))
+    try:
+        pool = HorizonPool([f"http://127.0.0.1:{slow.server_port}", f"http://127.0.0.1:{exhausted.server_port}"])
+        blocked = pool.endpoints[1:] if timed_out_first else pool.endpoints
+        for endpoint in blocked:
+            endpoint.budget.blocked_until = time.monotonic() + 60
+
+        with pytest.raises(HorizonBudgetExceeded) as info:
+            pool.submit(signed_envelope(state))
+        assert info.value.maybe_submitted is timed_out_first
+    finally:
+        slow.shutdown()
+        exhausted.shutdown()
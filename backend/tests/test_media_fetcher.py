@@ -0,0 +1,135 @@
+import os
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from conftest import serve
+from media_fetcher import MediaFetcher, FetchError
+from add_video import validate_video
+
+
+def media_handler(clip_path: str, delay: float = 0.0):
+    with open(clip_path, "rb") as f:
+        clip = f.read()
+
+    class MediaHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.startswith("/redirect"):
+                # /redirect?http://... -> Location
+                self.send_response(302)
+                self.send_header("Location", self.path.split("?", 1)[1])
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.path != "/clip.mp4":
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(clip)))
+            self.end_headers()
+            for i in range(0, len(clip), 4096):
+                time.sleep(delay)
+                self.wfile.write(clip[i:i + 4096])
+
+    return MediaHandler
+
+
+@pytest.fixture
+def media_server(sample_clip):
+    server = serve(media_handler(sample_clip))
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_fetched_content_hashes_like_upload(media_server, sample_clip):
+    fetcher = MediaFetcher(allow_private=True)
+    with fetcher.fetch_to_file(f"{media_server}/clip.mp4") as path:
+        fetched_ok, fetched = validate_video(path)
+    local_ok, local = validate_video(sample_clip)
+
+    assert fetched_ok and local_ok
+    assert fetched["hash"] == local["hash"]
+    assert not os.path.exists(path)
+
+
+def test_size_limit(media_server, sample_clip):
+    fetcher = MediaFetcher(allow_private=True, max_bytes=os.path.getsize(sample_clip) // 2)
+    with pytest.raises(FetchError) as exc:
+        with fetcher.fetch_to_file(f"{media_server}/clip.mp4"):
+            pass
+    assert exc.value.status_code == 400
+
+
+def test_time_limit(sample_clip):
+    server = serve(media_handler(sample_clip, delay=0.2))
+    try:
+        fetcher = MediaFetcher(allow_private=True, timeout=0.3)
+        with pytest.raises(FetchError) as exc:
+            with fetcher.fetch_to_file(f"http://127.0.0.1:{server.server_port}/clip.mp4"):
+                pass
+        assert exc.value.status_code == 504
+    finally:
+        server.shutdown()
+
+
+def test_remote_error_status(media_server):
+    with pytest.raises(FetchError) as exc:
+        with MediaFetcher(allow_private=True).fetch_to_file(f"{media_server}/missing.mp4"):
+            pass
+    assert exc.value.status_code == 502
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/clip.mp4",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.1/clip.mp4",
+    "http://[::1]/clip.mp4",
+    "http://localhost/clip.mp4",
+    "file:///etc/passwd",
+])
+def test_non_public_addresses_rejected(url):
+    with pytest.raises(FetchError) as exc:
+        with MediaFetcher().fetch_to_file(url):
+            pass
+    assert exc.value.status_code == 400
+
+
+def test_connection_to_private_address_blocked_after_resolution(media_server, monkeypatch):
+    # DNS kontrolünden sonra adres değişse de (rebinding) soket seviyesinde engellenir
+    fetcher = MediaFetcher()
+    monkeypatch.setattr(fetcher, "check_url", lambda url: None)
+    with pytest.raises(FetchError) as exc:
+        with fetcher.fetch_to_file(f"{media_server}/clip.mp4"):
+            pass
+    assert exc.value.status_code == 400
+    assert "engellendi" in str(exc.value)
+
+
+def test_redirect_hops_are_checked(media_server):
+    port = media_server.rsplit(":", 1)[1]
+    fetcher = MediaFetcher(allow_private=True, allowed_hosts=["localhost"])
+
+    with fetcher.fetch_to_file(f"http://localhost:{port}/redirect?http://localhost:{port}/clip.mp4") as path:
+        assert os.path.getsize(path) > 0
+
+    # İzin listesindeki host, listede olmayan bir adrese yönlendiremez
+    with pytest.raises(FetchError) as exc:
+        with fetcher.fetch_to_file(f"http://localhost:{port}/redirect?http://127.0.0.1:{port}/clip.mp4"):
+            pass
+    assert exc.value.status_code == 400
+
+
+def test_redirect_limit(media_server):
+    fetcher = MediaFetcher(allow_private=True, max_redirects=1)
+    url = f"{media_server}/redirect?{media_server}/redirect?{media_server}/clip.mp4"
+    with pytest.raises(FetchError) as exc:
+        with fetcher.fetch_to_file(url):
+            pass
+    assert exc.value.status_code == 400
@@ -0,0 +1,64 @@
+import base64
+
+import pytest
+from stellar_sdk import Account, Asset, Keypair, TransactionBuilder
+
+from memo_indexer import decode_memo_record
+from stellar_utils import NETWORK_PASSPHRASE
+
+SERVICE = Keypair.random().public_key
+OTHER = Keypair.random().public_key
+DATA_HASH = "ab" * 32
+
+
+def _record(**overrides):
+    record = {
+        "hash": "cd" * 32,
+        "memo_type": "hash",
+        "memo": base64.b64encode(bytes.fromhex(DATA_HASH)).decode(),
+        "ledger": "12",
+        "source_account": SERVICE,
+        "successful": True,
+        "created_at": "2026-01-01T00:00:00Z",
+    }
+    record.update(overrides)
+    return record
+
+
+def test_service_transaction_is_indexed():
+    row = decode_memo_record(_record(), SERVICE)
+    assert row["memo_hash"] == DATA_HASH
+    assert row["source_account"] == SERVICE
+
+
+def test_fee_bump_paid_by_service_is_indexed():
+    row = decode_memo_record(_record(source_account=OTHER, fee_account=SERVICE), SERVICE)
+    assert row["source_account"] == SERVICE
+
+
+def _envelope_xdr(reporter, fee_bump):
+    tx = (
+        TransactionBuilder(Account(SERVICE, 1), network_passphrase=NETWORK_PASSPHRASE, base_fee=100)
+        .append_payment_op(destination=SERVICE, asset=Asset.native(), amount="0.0000001", source=reporter)
+        .set_timeout(60)
+        .build()
+    )
+    if fee_bump:
+        tx = TransactionBuilder.build_fee_bump_transaction(SERVICE, 200, tx, NETWORK_PASSPHRASE)
+    return tx.to_xdr()
+
+
+@pytest.mark.parametrize("fee_bump", [False, True])
+def test_reporter_is_read_from_envelope(fee_bump):
+    row = decode_memo_record(_record(envelope_xdr=_envelope_xdr(OTHER, fee_bump)), SERVICE)
+    assert row["reporter_wallet"] == OTHER
+
+
+@pytest.mark.parametrize("overrides", [
+    {"source_account": OTHER},
+    {"source_account": OTHER, "fee_account": OTHER},
+    {"successful": False},
+    {"memo_type": "text"},
+])
+def test_foreign_or_failed_transaction_is_skipped(overrides):
+    assert decode_memo_record(_record(**overrides), SERVICE) is None
@@ -0,0 +1,94 @@
+import time
+import base64
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from stellar_sdk import Account, Asset, Keypair, TransactionBuilder
+from stellar_sdk.memo import HashMemo
+
+import receipt_verifier
+from conftest import serve
+from horizon_standin import HorizonState, NETWORK_PASSPHRASE, make_handler
+from receipts import receipt_from_transaction
+from receipt_verifier import ReceiptError, recheck_on_horizon, verify_receipt
+
+DATA_HASH = "ab" * 32
+
+
+@pytest.fixture
+def service(service_keypair):
+    return service_keypair
+
+
+def _video():
+    return SimpleNamespace(id=uuid4(), data_hash=DATA_HASH, reporter_wallet=Keypair.random().public_key)
+
+
+def _tx(**overrides):
+    tx = {
+        "hash": "cd" * 32,
+        "ledger": 12,
+        "created_at": "2026-01-01T00:00:00Z",
+        "successful": True,
+        "memo_type": "hash",
+        "memo": base64.b64encode(bytes.fromhex(DATA_HASH)).decode(),
+    }
+    tx.update(overrides)
+    return tx
+
+
+def test_receipt_verifies_against_pinned_account(service):
+    receipt = receipt_from_transaction(_video(), _tx())
+    payload = verify_receipt(receipt, service.public_key)
+    assert payload["data_hash"] == DATA_HASH
+
+
+def test_receipt_from_other_key_is_rejected(service):
+    receipt = receipt_from_transaction(_video(), _tx())
+    with pytest.raises(ReceiptError):
+        verify_receipt(receipt, Keypair.random().public_key)
+    # Makbuzun kendi anahtarına geri dönülmez
+    with pytest.raises(ReceiptError):
+        verify_receipt(receipt, "")
+    assert not receipt_verifier.verify_receipts([receipt], None)[0]["valid"]
+
+
+@pytest.mark.parametrize("overrides", [
+    {"successful": False},
+    {"memo": base64.b64encode(bytes(32)).decode()},
+    {"memo_type": "none", "memo": None},
+])
+def test_no_receipt_for_transaction_not_anchoring_video(service, overrides):
+    assert receipt_from_transaction(_video(), _tx(**overrides)) is None
+
+
+@pytest.mark.parametrize("fee_bump", [False, True])
+def test_receipt_rechecks_on_horizon(service, fee_bump):
+    state = HorizonState(ledger_seconds=0.05)
+    server = serve(make_handler(state))
+    video = _video()
+
+    account = Account(service.public_key, int(state.account(service.public_key)["sequence"]))
+    tx = (
+        TransactionBuilder(account, network_passphrase=NETWORK_PASSPHRASE, base_fee=100)
+        .append_payment_op(destination=service.public_key, asset=Asset.native(), amount="0.0000001",
+                           source=video.reporter_wallet)
+        .add_memo(HashMemo(bytes.fromhex(DATA_HASH)))
+        .set_timeout(60)
+        .build()
+    )
+    if fee_bump:
+        tx = TransactionBuilder.build_fee_bump_transaction(service.public_key, 200, tx, NETWORK_PASSPHRASE)
+    status, record = state.submit(tx.to_xdr())
+    assert status == 200
+    time.sleep(0.2)
+
+    payload = verify_receipt(receipt_from_transaction(video, record), service.public_key)
+    try:
+        assert recheck_on_horizon(payload, f"http://127.0.0.1:{server.server_port}")["hash"] == record["hash"]
+        payload["reporter_wallet"] = Keypair.random().public_key
+        with pytest.raises(ReceiptError):
+            recheck_on_horizon(payload, f"http://127.0.0.1:{server.server_port}")
+    finally:
+        server.shutdown()
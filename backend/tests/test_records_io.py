@@ -0,0 +1,58 @@
+import json
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlmodel import Session, SQLModel, create_engine
+
+from models import InvalidHexHash, Reporter, Video, normalize_hex_hash
+from records_io import import_records
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'io.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _lines(data_hashes):
+    reporter_id = str(uuid4())
+    yield json.dumps({"type": "reporter", "id": reporter_id, "full_name": "R", "wallet_address": "GWALLET",
+                      "created_at": "2026-01-01T00:00:00"})
+    for i, data_hash in enumerate(data_hashes):
+        yield json.dumps({"type": "video", "id": str(uuid4()), "video_url": f"https://example.com/{i}",
+                          "platform": "web", "data_hash": data_hash, "reporter_wallet": "GWALLET",
+                          "reporter_id": reporter_id, "status": "prepared", "verified": False,
+                          "created_at": "2026-01-01T00:00:00"})
+
+
+def test_invalid_hash_is_skipped_not_fatal(session):
+    stats = import_records(session, _lines(["AB" * 32, "xyz", "ab" * 31]))
+    assert stats == {"read": 4, "inserted": 2, "skipped": 2}
+    assert list(session.execute(select(Video.data_hash)).scalars()) == ["ab" * 32]
+    assert session.execute(select(Reporter.wallet_address)).scalar() == "GWALLET"
+
+
+def test_hash_column_rejects_non_hex(session):
+    with pytest.raises(InvalidHexHash):
+        normalize_hex_hash("zz" * 32)
+    session.add(Video(video_url="https://example.com/x", platform="web", data_hash="not-a-hash",
+                      reporter_wallet="GWALLET", reporter_id=uuid4(), status="prepared"))
+    with pytest.raises(Exception) as info:
+        session.commit()
+    assert isinstance(getattr(info.value, "orig", None), InvalidHexHash)
+
+
+def test_missing_required_field_is_skipped_not_fatal(session):
+    lines = list(_lines(["ab" * 32, "cd" * 32, "ef" * 32]))
+    without_hash = json.loads(lines[2])
+    del without_hash["data_hash"]
+    without_wallet = json.loads(lines[3])
+    del without_wallet["reporter_wallet"]
+    lines[2:4] = [json.dumps(without_hash), json.dumps(without_wallet)]
+
+    stats = import_records(session, lines)
+    assert stats == {"read": 4, "inserted": 2, "skipped": 2}
+    assert list(session.execute(select(Video.data_hash)).scalars()) == ["ab" * 32]
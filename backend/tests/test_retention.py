@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+from stellar_sdk import Keypair
+
+import retention
+from models import OnChainMemo, Reporter, Video, VideoArchive, VideoStatusEvent
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch, service_keypair):
+    monkeypatch.setattr(retention, "RETENTION_BATCH_PAUSE_SECONDS", 0)
+    monkeypatch.setattr(retention, "RETENTION_TTL_HOURS", {"prepared": 72, "failed": 168})
+    engine = create_engine(f"sqlite:///{tmp_path / 'retention.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def _add_video(session, status, age_hours):
+    reporter = session.exec(select(Reporter)).first()
+    if reporter is None:
+        reporter = Reporter(full_name="R", wallet_address="G" + "A" * 55)
+        session.add(reporter)
+        session.commit()
+    count = len(session.exec(select(Video.id)).all())
+    video = Video(
+        created_at=NOW - timedelta(hours=age_hours), video_url=f"https://example.com/{count}", platform="web",
+        data_hash=f"{count + 1:064x}", reporter_wallet=reporter.wallet_address, reporter_id=reporter.id,
+        status=status
+    )
+    session.add(video)
+    session.add(VideoStatusEvent(video_id=video.id, status=status))
+    session.commit()
+    return video.id
+
+
+def _remaining(session):
+    return set(session.exec(select(Video.id)).all())
+
+
+def _archived(session):
+    return set(session.exec(select(VideoArchive.id)).all())
+
+
+def test_sweep_archives_only_rows_past_their_ttl(session, monkeypatch):
+    monkeypatch.setattr(retention, "RETENTION_BATCH_SIZE", 2)
+    stale_prepared = {_add_video(session, "prepared", 73 + i) for i in range(3)}
+    fresh_prepared = _add_video(session, "prepared", 71)
+    # 100 saatlik failed kayıt prepared TTL'ini geçti ama kendi TTL'ini (168) geçmedi
+    fresh_failed = _add_video(session, "failed", 100)
+    stale_failed = _add_video(session, "failed", 169)
+    sent = _add_video(session, "sending", 500)
+
+    stats = retention.run_sweep_once(session, now=NOW)
+
+    assert stats == {"prepared": 3, "failed": 1, "batches": 3}
+    assert _remaining(session) == {fresh_prepared, fresh_failed, sent}
+    assert _archived(session) == stale_prepared | {stale_failed}
+    assert session.exec(select(VideoStatusEvent).where(VideoStatusEvent.video_id.in_(stale_prepared))).all() == []
+
+
+def test_memo_anchored_rows_are_not_archived(session, service_keypair):
+    anchored = _add_video(session, "prepared", 100)
+    foreign = _add_video(session, "prepared", 100)
+    # Servis hesabı memo'yu zincire yazmış (işlem API dışında gönderilmiş) → kayıt korunur
+    session.add(OnChainMemo(tx_hash="aa" * 32, memo_hash=session.get(Video, anchored).data_hash, ledger=1,
+                            source_account=service_keypair.public_key))
+    # Aynı memo'yu başka bir hesabın yazması kaydı korumaz
+    session.add(OnChainMemo(tx_hash="bb" * 32, memo_hash=session.get(Video, foreign).data_hash, ledger=1,
+                            source_account=Keypair.random().public_key))
+    session.commit()
+
+    assert retention.archive_batch(session, "prepared", NOW - timedelta(hours=72)) == 1
+    assert _remaining(session) == {anchored}
+    assert _archived(session) == {foreign}
+
+
+def test_row_changed_after_selection_is_left_in_place(engine, session, monkeypatch):
+    signed = _add_video(session, "prepared", 100)
+    stale = _add_video(session, "prepared", 100)
+    select_stale = retention._stale_ids
+
+    def stale_ids_then_submit(*args):
+        ids = select_stale(*args)
+        # Seçimden hemen sonra muhabir imzalayıp gönderdi (başka bir bağlantıdan)
+        with Session(engine) as other:
+            other.get(Video, signed).status = "sending"
+            other.commit()
+        return ids
+
+    monkeypatch.setattr(retention, "_stale_ids", stale_ids_then_submit)
+
+    assert retention.archive_batch(session, "prepared", NOW - timedelta(hours=72)) == 1
+    session.expire_all()
+    assert _remaining(session) == {signed}
+    assert _archived(session) == {stale}
+    assert session.get(Video, signed).status == "sending"
+    assert session.exec(select(VideoStatusEvent).where(VideoStatusEvent.video_id == signed)).all()
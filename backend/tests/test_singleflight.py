@@ -0,0 +1,129 @@
+import asyncio
+
+from singleflight import SingleFlight
+
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+def test_concurrent_callers_share_one_run():
+    async def scenario():
+        flights = SingleFlight("test")
+        calls = []
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return "kayıt"
+
+        waiters = [asyncio.create_task(flights.do("raw:ab", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return calls, results, flights.stats()
+
+    calls, results, stats = _run(scenario())
+    assert calls == [1]
+    assert results == [("kayıt", False), ("kayıt", True), ("kayıt", True)]
+    assert stats == {"in_flight": 0, "leaders": 1, "shared": 2}
+
+
+def test_error_is_shared_and_key_is_released():
+    async def scenario():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+        runs = []
+
+        async def failing():
+            runs.append(1)
+            await release.wait()
+            raise ValueError("validate_video başarısız")
+
+        waiters = [asyncio.create_task(flights.do("raw:ab", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        errors = await asyncio.gather(*waiters, return_exceptions=True)
+
+        # İş bitti; sonraki çağrı önbellek değil yeni bir çalıştırma görür
+        async def succeeding():
+            runs.append(2)
+            return "yeni"
+
+        return errors, await flights.do("raw:ab", succeeding), runs
+
+    errors, retry, runs = _run(scenario())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert retry == ("yeni", False)
+    assert runs == [1, 2]
+
+
+def test_leader_leaving_does_not_cancel_shared_work():
+    async def scenario():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "kayıt"
+
+        leader = asyncio.create_task(flights.do("raw:ab", work))
+        follower = asyncio.create_task(flights.do("raw:ab", work))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        release.set()
+        return await follower
+
+    assert _run(scenario()) == ("kayıt", True)
+
+
+def test_work_is_cancelled_when_all_waiters_leave():
+    async def scenario():
+        flights = SingleFlight("test")
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.create_task(flights.do("raw:ab", work)) for _ in range(2)]
+        await started.wait()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+        # İptal edilen işe katılınmaz; yeni çağrı yeni bir çalıştırma başlatır
+        async def fresh():
+            return "yeni"
+
+        return flights.stats()["in_flight"], await flights.do("raw:ab", fresh)
+
+    in_flight, result = _run(scenario())
+    assert in_flight == 0
+    assert result == ("yeni", False)
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(
+            flights.do("raw:ab", lambda: work("a")),
+            flights.do("raw:cd", lambda: work("b")),
+        )
+
+    assert _run(scenario()) == [("a", False), ("b", False)]
+
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from stellar_sdk import Keypair, TransactionBuilder, TransactionEnvelope
+from stellar_sdk.decorated_signature import DecoratedSignature
+
+import stellar_utils
+from conftest import serve, signed_envelope
+import horizon_pool
+from horizon_pool import HorizonPool, SubmitOutcomeUnknown
+from horizon_standin import HorizonState, make_handler, NETWORK_PASSPHRASE
+
+
+@pytest.fixture
+def horizon(monkeypatch):
+    monkeypatch.setattr(stellar_utils, "INCLUSION_POLL_SECONDS", 0.05)
+    servers = []
+
+    def start(state, **handler_options):
+        server = serve(make_handler(state, **handler_options))
+        servers.append(server)
+        pool = HorizonPool([f"http://127.0.0.1:{server.server_port}"])
+        monkeypatch.setattr(stellar_utils, "get_horizon_pool", lambda: pool)
+        return state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_included_transaction_is_returned(horizon):
+    state = horizon(HorizonState(ledger_seconds=0.05))
+    envelope = signed_envelope(state)
+    tx = asyncio.run(stellar_utils.submit_until_included(envelope))
+    assert tx["hash"] == envelope.hash_hex()
+    assert tx["successful"] is True
+
+
+def test_failed_transaction_is_not_reported_as_included(horizon):
+    # İşlem ledger'a dahil edilir ama uygulanırken başarısız olur (ör. op_underfunded)
+    state = horizon(HorizonState(ledger_seconds=0.05, tx_fail_rate=1.0))
+    envelope = signed_envelope(state)
+    assert asyncio.run(stellar_utils.submit_until_included(envelope)) is None
+
+
+def test_duplicate_submission_keeps_polling(horizon):
+    state = horizon(HorizonState(ledger_seconds=0.05))
+    envelope = signed_envelope(state)
+    # İlk gönderim başka bir istekten geldi; tekrar gönderim 409 DUPLICATE alır
+    assert state.submit(envelope.to_xdr())[0] == 200
+
+    tx = asyncio.run(stellar_utils.submit_until_included(envelope))
+    assert tx["hash"] == envelope.hash_hex()
+    assert state.results["tx_duplicate"] == 1
+
+
+def test_standin_accepts_fee_bump_envelope(service_keypair):
+    state = HorizonState(ledger_seconds=0.05)
+    inner = signed_envelope(state)
+    bump = TransactionBuilder.build_fee_bump_transaction(service_keypair.public_key, 200, inner, NETWORK_PASSPHRASE)
+    bump.sign(service_keypair)
+
+    assert state.submit(bump.to_xdr())[0] == 200
+    # İç işlem fee-bump ile zaten gönderildi
+    assert state.submit(inner.to_xdr())[0] == 409
+
+
+def test_submit_timeout_propagates_as_unknown_outcome(horizon, monkeypatch):
+    monkeypatch.setattr(horizon_pool, "HORIZON_SUBMIT_TIMEOUT_SECONDS", 0.2)
+    state = horizon(HorizonState(ledger_seconds=0.05), latency_ms=500)
+    envelope = signed_envelope(state)
+    with pytest.raises(SubmitOutcomeUnknown):
+        asyncio.run(stellar_utils.submit_until_included(envelope))
+
+
+def test_not_included_after_bumps_is_unknown_not_failed(horizon, monkeypatch):
+    # İşlem kuyrukta kalıyor (ledger kapanmıyor); izleme süresi dolunca başarısız sayılmaz
+    monkeypatch.setattr(stellar_utils, "FEE_MAX_BUMPS", 0)
+    monkeypatch.setattr(stellar_utils, "FEE_BUMP_AFTER_LEDGERS", 1)
+    monkeypatch.setattr(stellar_utils, "LEDGER_CLOSE_SECONDS", 0.2)
+    state = horizon(HorizonState(ledger_seconds=100))
+    envelope = signed_envelope(state)
+    with pytest.raises(SubmitOutcomeUnknown) as info:
+        asyncio.run(stellar_utils.submit_until_included(envelope))
+    assert info.value.tx_hash == envelope.hash_hex()
+
+
+@pytest.mark.parametrize("forgery", ["tampered", "wrong_key"])
+def test_forged_reporter_signature_is_rejected_before_horizon(horizon, service_keypair, monkeypatch, forgery):
+    # İçerik kontrolü ayrı test ediliyor; burada kapı yalnızca imza doğrulaması
+    monkeypatch.setattr(stellar_utils, "validate_envelope_contents", lambda *args: (True, ""))
+    state = horizon(HorizonState(ledger_seconds=0.05))
+    envelope = signed_envelope(state)
+    reporter = envelope.transaction.source.account_id
+    envelope.sign(service_keypair)
+    original = envelope.signatures[0]
+
+    if forgery == "tampered":
+        signature = bytes([original.signature[0] ^ 1]) + original.signature[1:]
+    else:
+        # Hint muhabirinkiyle aynı, imza başka bir anahtardan
+        signature = Keypair.random().sign(envelope.hash())
+    forged = TransactionEnvelope.from_xdr(envelope.to_xdr(), NETWORK_PASSPHRASE)
+    forged.signatures[0] = DecoratedSignature(original.signature_hint, signature)
+
+    assert stellar_utils.verify_envelope_signatures(envelope, [service_keypair.public_key, reporter])[0]
+    ok, message = stellar_utils.verify_envelope_signatures(forged, [service_keypair.public_key, reporter])
+    assert not ok and reporter in message
+
+    result = asyncio.run(stellar_utils.submit_stellar_transaction(forged.to_xdr(), "00" * 32, reporter, "prepared"))
+    assert result is None
+    assert state.stats()["transactions"] == 0
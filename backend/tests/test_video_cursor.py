@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from db import decode_video_cursor, encode_video_cursor, list_videos
+from models import Reporter, Video
+
+START = datetime(2026, 1, 1, 12, 0, 0, 123456)
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cursor.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _add_videos(session, created_ats, wallet="G" + "A" * 55):
+    reporter = Reporter(full_name="R", wallet_address=wallet)
+    session.add(reporter)
+    session.commit()
+    for i, created_at in enumerate(created_ats):
+        session.add(Video(
+            created_at=created_at, video_url=f"https://example.com/{wallet[-4:]}/{i}", platform="web",
+            data_hash=f"{len(wallet) + i:064x}", reporter_wallet=wallet, reporter_id=reporter.id
+        ))
+    session.commit()
+
+
+def _pages(session, limit, **filters):
+    seen, after = [], None
+    while True:
+        page = list_videos(session, after=after, limit=limit, **filters)
+        seen.extend(video.id for video in page)
+        if len(page) < limit:
+            return seen
+        after = decode_video_cursor(encode_video_cursor(page[-1]))
+
+
+def test_cursor_round_trip(session):
+    _add_videos(session, [START])
+    video = list_videos(session)[0]
+    assert decode_video_cursor(encode_video_cursor(video)) == (video.created_at, video.id)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_video_cursor("not-a-cursor")
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5])
+def test_pages_have_no_duplicates_or_gaps_across_ties(session, limit):
+    # Toplu kayıtlar aynı created_at'i paylaşır; sayfa sınırı bu grubun ortasına düşer
+    _add_videos(session, [START] * 4 + [START - timedelta(seconds=1)] * 3 + [START + timedelta(seconds=1)])
+    videos = session.exec(select(Video)).all()
+    expected = [video.id for video in sorted(videos, key=lambda v: (v.created_at, v.id.hex), reverse=True)]
+
+    assert _pages(session, limit) == expected
+
+
+def test_filtered_pages_follow_the_same_order(session):
+    _add_videos(session, [START] * 3, wallet="G" + "A" * 55)
+    _add_videos(session, [START] * 3, wallet="G" + "B" * 55)
+
+    pages = _pages(session, 2, reporter_wallet="G" + "B" * 55)
+    assert len(pages) == len(set(pages)) == 3
+    assert {session.get(Video, video_id).reporter_wallet for video_id in pages} == {"G" + "B" * 55}
@@ -0,0 +1,202 @@
+import io
+import os
+import time
+import asyncio
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+from dotenv import load_dotenv
+
+from db import engine
+from models import Video
+from scratch import scratch_file
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# ---------------------
+# CONFIG
+# ---------------------
+# Kapalıysa uygulama açılır açılmaz hazır (ready) sayılır
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+# Bu sürede bitmeyen warm-up beklenmez; uygulama yine de hazır işaretlenir
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "60"))
+WARMUP_HORIZON = os.getenv("WARMUP_HORIZON", "1") == "1"
+WARMUP_VIDEO = os.getenv("WARMUP_VIDEO", "1") == "1"
+# Sentetik klip: ffmpeg lavfi testsrc, birkaç GOP'luk küçük bir H.264 dosyası
+WARMUP_CLIP_SECONDS = 2
+WARMUP_CLIP_SIZE = "128x72"
+
+
+class WarmupState:
+    """
+    Warm-up aşamasının durumu: pending → running → ready. /readyz bunu raporlar.
+    Adım hataları hazır olmayı engellemez (ör. Horizon erişilemezse istekler yine
+    havuzun kendi hata yönetimiyle karşılanır); adım sonuçları yanıtta görünür.
+    """
+
+    def __init__(self):
+        self.phase = "pending"
+        self.steps: Dict[str, dict] = {}
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == "ready"
+
+    def record(self, name: str, elapsed: float, error: Optional[Exception] = None) -> None:
+        self.steps[name] = {"ok": error is None, "ms": round(elapsed * 1000, 1)}
+        if error is not None:
+            self.steps[name]["error"] = str(error)
+
+    def stats(self) -> dict:
+        return {
+            "phase": self.phase,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": self.steps,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def warm_database() -> None:
+    """
+    Bağlantı havuzunu açar ve video tablosunun ilk sayfalarını önbelleğe alır.
+    Şema kontrolü (create_db_and_tables) lifespan'de warm-up'tan önce yapılır.
+    """
+    with Session(engine) as session:
+        session.exec(select(Video.id).order_by(Video.created_at.desc()).limit(1)).first()
+
+
+def warm_horizon() -> None:
+    """
+    Havuzdaki her Horizon endpoint'ine paralel bir kök isteği: istemciler oluşturulur,
+    TLS bağlantıları açılıp keep-alive havuzunda kalır ve gecikme ortalamaları dolar.
+    """
+    from horizon_pool import get_horizon_pool
+
+    pool = get_horizon_pool()
+
+    def probe(endpoint) -> Optional[Exception]:
+        try:
+            pool._call(endpoint, lambda server: server.root().call(), priority="background")
+            return None
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(pool.endpoints)) as executor:
+        errors = [error for error in executor.map(probe, pool.endpoints) if error is not None]
+    if len(errors) == len(pool.endpoints):
+        raise errors[0]
+
+
+def warm_service_account() -> None:
+    """
+    Servis anahtarını oluşturur, hesabı yükler ve fee_stats önbelleğini doldurur.
+    """
+    from stellar_utils import get_service_keypair, _load_service_account
+    from fee_oracle import get_fee_oracle
+
+    get_service_keypair()
+    _load_service_account()
+    get_fee_oracle().fee_stats()
+
+
+def _write_synthetic_clip(path: str) -> None:
+    from segment_index import _ffmpeg_binary
+
+    subprocess.run(
+        [
+            _ffmpeg_binary(), "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc=duration={WARMUP_CLIP_SECONDS}:size={WARMUP_CLIP_SIZE}:rate=10",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-g", "10",
+            # memfd yolu uzantı taşımaz; biçim açıkça verilir
+            "-f", "mp4", path,
+        ],
+        check=True,
+        capture_output=True,
+        timeout=WARMUP_TIMEOUT_SECONDS,
+    )
+
+
+def warm_video_pipeline() -> None:
+    """
+    Küçük bir sentetik klibi yükleme yolundan geçirir: ffmpeg binary araması, moviepy
+    import'u, scratch dosyaları, validate_video ve segment hash'leri.
+    """
+    from add_video import validate_video
+    from segment_index import compute_segment_hashes
+
+    with scratch_file(size_hint=256 * 1024) as clip:
+        _write_synthetic_clip(clip.path)
+        content = clip.read_bytes()
+
+    is_valid, result = validate_video(io.BytesIO(content))
+    if not is_valid:
+        raise RuntimeError(result["error"])
+    compute_segment_hashes(content)
+
+
+def _run_steps(steps: List[Tuple[str, Callable[[], None]]]) -> None:
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            warmup_state.record(name, time.perf_counter() - start)
+        except Exception as e:
+            warmup_state.record(name, time.perf_counter() - start, e)
+            logger.warning(f"Warm-up adımı başarısız ({name}): {e}")
+
+
+def _step_groups() -> List[List[Tuple[str, Callable[[], None]]]]:
+    # Ağ adımları ile yerel (CPU/ffmpeg) adımlar birbirini beklemeden ayrı thread'lerde çalışır
+    local = [("database", warm_database)]
+    if WARMUP_VIDEO:
+        local.append(("video_pipeline", warm_video_pipeline))
+    network = []
+    if WARMUP_HORIZON:
+        network = [("horizon", warm_horizon), ("service_account", warm_service_account)]
+    return [group for group in (local, network) if group]
+
+
+async def warm_up() -> None:
+    """
+    Lifespan'den arka plan görevi olarak başlatılır; bitince (ya da WARMUP_TIMEOUT_SECONDS
+    dolunca) uygulama hazır işaretlenir.
+    """
+    warmup_state.started_at = datetime.utcnow()
+    if not WARMUP_ENABLED:
+        warmup_state.phase = "ready"
+        warmup_state.finished_at = warmup_state.started_at
+        return
+
+    warmup_state.phase = "running"
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(asyncio.to_thread(_run_steps, group) for group in _step_groups())),
+            WARMUP_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"Warm-up {WARMUP_TIMEOUT_SECONDS:.0f} saniyede bitmedi; uygulama yine de hazır işaretlendi")
+    finally:
+        warmup_state.phase = "ready"
+        warmup_state.finished_at = datetime.utcnow()
+    logger.info(f"Warm-up tamamlandı ({(time.perf_counter() - start) * 1000:.0f} ms): {warmup_state.steps}")
+
+
+if __name__ == "__main__":
+    # Soğuk bir süreçte adım sürelerini ölçer
+    logging.basicConfig(level=logging.INFO)
+    engine.echo = False
+    asyncio.run(warm_up())
+    for name, step in warmup_state.steps.items():
+        print(f"{name:16} {step}")